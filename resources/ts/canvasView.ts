@@ -4,7 +4,6 @@
 class CanvasView {
 	data: Data;
 	structure: { [key: string]: PersonStructure };
-	details: { [key: string]: PersonDetails };
 
 	tree: Tree | null;
 	canvas: HTMLCanvasElement | null;
@@ -35,7 +34,6 @@ class CanvasView {
 	constructor(data: Data) {
 		this.data = data;
 		this.structure = data.structure;
-		this.details = data.details;
 		this.tree = null;
 		this.canvas = null;
 		this.context = null;
@@ -227,11 +225,11 @@ class CanvasView {
 			return;
 		}
 
-		for (let ancestor of node.flatAncestors) {
-			if (ancestor === null || this.tree === null) {
+		for (let ancestor of this.data.getAncestorIds(node.person.id)) {
+			if (this.tree === null) {
 				continue;
 			}
-			let ancestorNode = this.tree.lookupNodeById(ancestor[0]);
+			let ancestorNode = this.tree.lookupNodeById(ancestor);
 			if (ancestorNode != null) {
 				ancestorNode.ancestorFocus = true;
 			}
@@ -249,12 +247,14 @@ class CanvasView {
 	}
 
 	/**
-	 * Shows the details of a person in the info frame.
+	 * Shows the details of a person in the info frame (loading them first, if they haven't been yet).
 	 * @param personId    The person whose details we display
 	 */
-	showDetailedView(personId: string) {
-		if (personId in this.details) {
-			showInInfoWindow(showPersonDetails(this, this.data, this.details[personId]));
+	async showDetailedView(personId: string) {
+		let details = await this.data.getDetails(personId).catch(() => null);
+
+		if (details !== null) {
+			showInInfoWindow(showPersonDetails(this, this.data, details));
 		}
 		else {
 			showError("Person lookup failed", true);
@@ -270,7 +270,8 @@ class CanvasView {
 	 * @param scaling   Do we change positions, or merely scale?
 	 */
 	setFocusPosition(node: string, x: number, y: number, scaling: boolean = false) {
-		this.tree = new Tree(this.structure, this.details, this.getTopAncestor(node));
+		const root = this.getTopAncestor(node);
+		this.tree = new Tree(this.structure, root, this.data.getLayout(root));
 
 		if (this.tree === null || this.canvas === null) {
 			return;
@@ -73,7 +73,6 @@ function makeNodeText(person: PersonStructure): StyledText[] {
  */
 class PersonNode implements INode {
 	person: PersonStructure;
-	details: PersonDetails;
 	text: StyledText[];
 	private cachedDimensions: null | number[];
 	sidePadding: number;
@@ -92,17 +91,14 @@ class PersonNode implements INode {
 	group: null | PersonNodeGroup;
 	redirects: boolean;
 	redirectsTo: string;
-	flatAncestors: Array<Array<number | string>>;
 
 
 	/**
 	 * Constructs a PersonNode instance.
 	 * @param _person		The PersonStructure of this person
-	 * @param pDetails	The PersonDetails of this person
 	 */
-	constructor(_person: PersonStructure, pDetails: PersonDetails) {
+	constructor(_person: PersonStructure) {
 		this.person = _person;
-		this.details = pDetails;
 		this.text = makeNodeText(_person); // Generates the text for this node
 		this.cachedDimensions = null;
 
@@ -120,9 +116,8 @@ class PersonNode implements INode {
 		this.inFocus = false; // Is this the node currently in focus
 		this.ancestorFocus = false; // Is this node the ancestor of the currently focused node?
 		this.group = null; // by default we have no group
-		this.redirects = pDetails.redirects;
-		this.redirectsTo = pDetails.redirectsTo;
-		this.flatAncestors = pDetails.ancestors;
+		this.redirects = _person.redirects;
+		this.redirectsTo = _person.redirectsTo;
 	}
 
 	/**
@@ -341,11 +336,12 @@ class PersonNode implements INode {
 			canvasView.context.drawImage(image, x + this.getWidth() - dim, y, dim, dim);
 		}
 
-		// What should we use as the user image?
-		if (this.details["pics"].length > 0) {
-			canvasView.context.drawImage(loadImage(this.details["pics"][0]), x, y, dim, dim);
+		// What should we use as the user image? (A thumbnail, if there is one - the icon's tiny)
+		const pic = (this.person["pic"] !== "") ? canvasView.data.pictureUrl(this.person["pic"], dim) : null;
+		if (pic !== null) {
+			canvasView.context.drawImage(loadImage(pic), x, y, dim, dim);
 		}
-		else if (this.details["notes"].length > 0) {
+		else if (this.person["hasNotes"]) {
 			/* If we have any notes and NO custom image, denote it with the notes icon */
 			canvasView.context.drawImage(imageIcons.notes, x, y, dim, dim);
 		}
@@ -14,10 +14,14 @@ interface PersonStructure {
 	childrenHidden: boolean;
 	birth: string[];
 	death: string[];
+	redirects: boolean;
+	redirectsTo: string;
+	pic: string;
+	hasNotes: boolean;
 }
 
 /**
- * A person object from the details.json file.
+ * A person object from one of the details shards (see manifest.json).
  * Represents a person's details: their life events,
  */
 interface PersonDetails {
@@ -28,5 +32,4 @@ interface PersonDetails {
 	events: Array<string[]>;
 	redirects: boolean;
 	redirectsTo: string;
-	ancestors: Array<Array<number | string>>;
 }
\ No newline at end of file
@@ -4,11 +4,14 @@
  */
 function flattenTree(node: INode) {
 	let flattened: INode[] = [];
+	// The nodes we've already added (so checking is constant-time, instead of searching the array)
+	let seen = new Set<INode>();
 
 	function flattenTreeHelper(n: INode) {
 		// This person + direct ancestors + direct descendents
 		for (let person of [n].concat(n.ancestors).concat(n.descendents)) {
-			if (!flattened.includes(person)) {
+			if (!seen.has(person)) {
+				seen.add(person);
 				flattened.push(person); // add to the array if it isn't already
 				flattenTreeHelper(person);
 			}
@@ -27,7 +30,6 @@ class Tree {
 	person: string;
 
 	structure: { [key: string]: PersonStructure };
-	details: { [key: string]: PersonDetails };
 	savedNodes: { [key: string]: INode };
 
 	boundaries: null | number[];
@@ -35,21 +37,22 @@ class Tree {
 
 	nodes: INode;
 	flatNodes: INode[];
+	layout: { [key: string]: number } | null;
 
 	/**
 	 * Constructs a Tree instance.
 	 * @param structure     The map of PersonStructures
-	 * @param details       The map of PersonDetails
 	 * @param person        The ID of the base person
+	 * @param layout        The pre-computed layout of this tree, if there is one (see Data.getLayout)
 	 */
-	constructor(structure: { [key: string]: PersonStructure },
-							details: { [key: string]: PersonDetails }, person: string) {
+	constructor(structure: { [key: string]: PersonStructure }, person: string,
+							layout: { [key: string]: number } | null = null) {
 
 		this.person = person;
 		this.structure = structure;
-		this.details = details;
 		this.savedNodes = {};
 		this.boundaries = null;
+		this.layout = layout;
 		this.nodes = this.makeNode(person, 0); // Start with the base person, generation 0
 		this.isPositioned = false;
 		this.flatNodes = flattenTree(this.nodes);
@@ -70,15 +73,14 @@ class Tree {
 		let newNode: INode;
 
 		// If this person has no spouses, they are not part of a PersonNodeGroup.
-		console.log(person);
 		if (this.structure[person].spouses.length === 0) {
-			newNode = new PersonNode(this.structure[person], this.details[person]);
+			newNode = new PersonNode(this.structure[person]);
 			this.savedNodes[person] = newNode;
 		}
 		// This person IS part of a PersonNodeGroup - we generate the group here.
 		else {
 			let personList = [person].concat(this.structure[person].spouses);
-			let nodes = personList.map(p => new PersonNode(this.structure[p], this.details[p]));
+			let nodes = personList.map(p => new PersonNode(this.structure[p]));
 			newNode = new PersonNodeGroup(nodes);
 
 			// Update the list of saved nodes
@@ -326,6 +328,51 @@ class Tree {
 		}
 	}
 
+	/**
+	 * Positions the nodes from the pre-computed layout (the center of each node, by its first ID).
+	 * The layout was made with estimated text widths, so it's only used if no nodes end up too close together.
+	 * Returns whether the layout was used.
+	 * @private
+	 */
+	private applyLayout(): boolean {
+		if (this.layout === null) {
+			return false;
+		}
+
+		// Every node that's drawn (the base person, and everyone below them)
+		let drawn = [this.nodes];
+		let seen = new Set<INode>(drawn);
+		for (let i = 0; i < drawn.length; i++) {
+			for (let desc of drawn[i].descendents) {
+				if (!seen.has(desc)) {
+					seen.add(desc);
+					drawn.push(desc);
+				}
+			}
+		}
+
+		let rows: { [key: number]: INode[] } = {};
+		for (let node of drawn) {
+			const center = this.layout[node.getId()];
+			if (center === undefined) {
+				return false; // The layout doesn't match this tree
+			}
+			node.setX(center * scale - node.getWidth() / 2);
+			(rows[node.generation] = rows[node.generation] || []).push(node);
+		}
+
+		// Check each generation, left to right, for nodes that are (nearly) overlapping
+		for (let gen in rows) {
+			let row = rows[gen].sort((a, b) => a.getX() - b.getX());
+			for (let i = 1; i < row.length; i++) {
+				if (row[i].getX() < row[i - 1].getX() + row[i - 1].getWidth() + horizontalMargin / 2) {
+					return false;
+				}
+			}
+		}
+		return true;
+	}
+
 	/**
 	 * Calculate the final position of a node
 	 * @param node              The node for which we do the calculation.
@@ -378,7 +425,10 @@ class Tree {
 	 */
 	position(canvasView: CanvasView) {
 		this.verticalSpacing(canvasView);
-		this.calculateInitialX(this.nodes);
+		// Use the pre-computed layout if we can, and work it out from scratch if we can't
+		if (!this.applyLayout()) {
+			this.calculateInitialX(this.nodes);
+		}
 		this.calculateFinalPos(this.nodes, 0);
 	}
 
@@ -357,8 +357,15 @@ function showPersonDetails(canvasView: CanvasView, data: Data, curPerson: Person
 
 
 	// Handle the pictures
+	// They're shown as thumbnails about as wide as the info window (if there are any), and in full when clicked
+	const pictureWidth = (document.getElementById("info-window") as HTMLElement).clientWidth || window.innerWidth / 4;
 
 	for (let picture of curPerson["pics"]) {
+		const thumbnail = data.pictureUrl(picture, pictureWidth);
+		if (thumbnail === null) {
+			continue; // The picture is missing
+		}
+
 		let eventDiv = document.createElement('div');
 
 		let divClass = (styleNumber == 0) ? "detailRow" : "detailRow1";
@@ -369,10 +376,10 @@ function showPersonDetails(canvasView: CanvasView, data: Data, curPerson: Person
 
 		const image = document.createElement('img');
 		image.onclick = function () {
-			imgBox(this)
+			imgBox(picture)
 		};
 		image.className = "eventPicture";
-		image.src = picture;
+		image.src = thumbnail;
 
 		eventDiv.appendChild(image);
 		eventsDivContainer.appendChild(eventDiv);
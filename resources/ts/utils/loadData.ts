@@ -1,18 +1,276 @@
+/**
+ * The manifest (manifest.json): which format the data was written in, which shard files the details are split across,
+ * and the name of each of the other files (by what's in them - eg. "structure", "searchIndex", "layouts").
+ * The files are named after their contents, so they can be cached for good - only the manifest has to be checked.
+ */
+interface DataManifest {
+	format: string;
+	shardCount: number;
+	shards: string[];
+	files: { [key: string]: string };
+}
+
+
+/**
+ * The pre-computed layouts (layouts.json, see util/layout.py): the center of each node (by its first ID),
+ *    for the trees of the most commonly viewed roots.
+ */
+interface DataLayouts {
+	generationLimit: number;
+	roots: { [key: string]: { [key: string]: number } };
+}
+
+
+/**
+ * The media manifest (media.json, see util/media.py): the size and thumbnails (by their size) of each picture,
+ *    and the pictures that are missing.
+ */
+interface DataMedia {
+	sizes: number[];
+	pictures: { [key: string]: { thumbnails: { [key: string]: string }, width?: number, height?: number } };
+	missing: string[];
+}
+
+
+/**
+ * The pre-sorted indexes (indexes.json): (person ID, label) pairs, sorted by the label,
+ *    for the index windows (by surname and birth year).
+ */
+interface DataIndexes {
+	surname: string[][];
+	birthYear: string[][];
+}
+
+
+/**
+ * The place table (places.json, see Gazetteer in util/gedcomUtils.py): every place's [settlement, region, country]
+ *    (sorted), and the people born, married, etc. in each one, as [place number, person IDs] pairs (in place order).
+ */
+interface DataPlaces {
+	places: string[][];
+	births: [number, string[]][];
+	deaths: [number, string[]][];
+	marriages: [number, string[]][];
+	burials: [number, string[]][];
+}
+
+
 class Data {
 	structure: { [key: string]: PersonStructure };
 	structure_raw: PersonStructure[];
 	details: { [key: string]: PersonDetails };
-	burials: string[][];
+	manifest: DataManifest;
+	pedigree: Pedigree;
 	birthdays: string[][];
+	layouts: DataLayouts | null;
+	media: DataMedia | null;
+
+	private shardRequests: { [key: number]: Promise<void> };
+	private searchIndexRequest: Promise<SearchIndex> | null;
+	private indexesRequest: Promise<DataIndexes> | null;
+	private placesRequest: Promise<DataPlaces> | null;
+	private names: { [key: string]: PersonStructure };
+	private missingPictures: Set<string>;
 
-	constructor(structure: PersonStructure[], details: { [key: string]: PersonDetails },
-							burials: string[][], birthdays: string[][]) {
+	constructor(structure: PersonStructure[], manifest: DataManifest, birthdays: string[][],
+							layouts: DataLayouts | null = null, media: DataMedia | null = null) {
 		this.structure = {};
 		this.structure_raw = structure;
 		structure.map((p: PersonStructure) => this.structure[p["id"]] = p);
-		this.details = details;
-		this.burials = burials;
+		// Only holds the details we've loaded so far (see getDetails)
+		this.details = {};
+		this.manifest = manifest;
+		this.pedigree = new Pedigree(structure);
 		this.birthdays = birthdays;
+		this.layouts = layouts;
+		this.media = media;
+		this.missingPictures = new Set(media !== null ? media.missing : []);
+		this.shardRequests = {};
+		this.searchIndexRequest = null;
+		this.indexesRequest = null;
+		this.placesRequest = null;
+
+		// Everyone by their (displayed) name, for findPersonByName
+		this.names = {};
+		for (let person of structure) {
+			const name = displayName(person["name"]);
+			if (!(name in this.names)) {
+				this.names[name] = person;
+			}
+		}
+	}
+
+	/**
+	 * Gets the address of one of the data files (see DataManifest), or null if there isn't one.
+	 * @param name  What's in the file (eg. "searchIndex").
+	 */
+	fileUrl(name: string): string | null {
+		return fileUrl(this.manifest, name);
+	}
+
+	/**
+	 * Finds which details shard the given person is in.
+	 * This is a 32-bit FNV-1a hash of the ID, and has to match shardOf in util/export.py
+	 * @param id  The ID of the person.
+	 */
+	shardOf(id: string): number {
+		let hash = 0x811c9dc5;
+		for (let byte of new TextEncoder().encode(id)) {
+			hash = Math.imul(hash ^ byte, 0x01000193) >>> 0;
+		}
+		return hash % this.manifest.shardCount;
+	}
+
+	/**
+	 * Fetches the given details shard (if we haven't already).
+	 * @param shard The number of the shard.
+	 */
+	private loadShard(shard: number): Promise<void> {
+		if (!(shard in this.shardRequests)) {
+			this.shardRequests[shard] = getJsonData(`data/${this.manifest.shards[shard]}`)
+			.then((shardData: { [key: string]: PersonDetails }) => {
+				Object.assign(this.details, shardData);
+			})
+			.catch(error => {
+				// Let it be tried again next time
+				delete this.shardRequests[shard];
+				throw error;
+			});
+		}
+		return this.shardRequests[shard];
+	}
+
+	/**
+	 * Makes sure the details of all the given people are loaded (into this.details).
+	 * @param ids The IDs of the people.
+	 */
+	async loadDetails(ids: string[]) {
+		const shards = new Set(ids.map(id => this.shardOf(id)));
+		await Promise.all(Array.from(shards).map(shard => this.loadShard(shard)));
+	}
+
+	/**
+	 * Gets the PersonDetails of the given person, loading their shard if needed.
+	 * @param id  The ID of the person.
+	 */
+	async getDetails(id: string): Promise<PersonDetails | null> {
+		if (!(id in this.details)) {
+			await this.loadDetails([id]);
+		}
+		return (id in this.details) ? this.details[id] : null;
+	}
+
+	/**
+	 * Gets the IDs of all of the given person's ancestors (straight from the structure, so nothing has to be loaded).
+	 * @param id  The ID of the person.
+	 */
+	getAncestorIds(id: string): string[] {
+		return this.pedigree.ancestorIds(id);
+	}
+
+	/**
+	 * Gets the search index (fetching it the first time it's asked for).
+	 */
+	getSearchIndex(): Promise<SearchIndex> {
+		if (this.searchIndexRequest === null) {
+			this.searchIndexRequest = getJsonData(this.fileUrl("searchIndex") as string)
+			.then((indexData: SearchIndexData) => new SearchIndex(indexData))
+			.catch(error => {
+				// Let it be tried again next time
+				this.searchIndexRequest = null;
+				throw error;
+			});
+		}
+		return this.searchIndexRequest;
+	}
+
+	/**
+	 * Gets the pre-sorted indexes (fetching them the first time they're asked for).
+	 */
+	getIndexes(): Promise<DataIndexes> {
+		if (this.indexesRequest === null) {
+			this.indexesRequest = getJsonData(this.fileUrl("indexes") as string)
+			.catch(error => {
+				// Let it be tried again next time
+				this.indexesRequest = null;
+				throw error;
+			});
+		}
+		return this.indexesRequest;
+	}
+
+	/**
+	 * Gets the place table (fetching it the first time it's asked for).
+	 */
+	getPlaces(): Promise<DataPlaces> {
+		if (this.placesRequest === null) {
+			this.placesRequest = getJsonData(this.fileUrl("places") as string)
+			.catch(error => {
+				// Let it be tried again next time
+				this.placesRequest = null;
+				throw error;
+			});
+		}
+		return this.placesRequest;
+	}
+
+	/**
+	 * Gets the (person ID, place) pairs for an index window, grouped by place (in the place table's order).
+	 * @param kind  Which people: "births", "deaths", "marriages" or "burials".
+	 */
+	async getPlaceIndex(kind: "births" | "deaths" | "marriages" | "burials"): Promise<string[][]> {
+		const places = await this.getPlaces();
+		let rows: string[][] = [];
+		for (let [place, ids] of places[kind]) {
+			const name = placeName(places.places[place]);
+			for (let id of ids) {
+				rows.push([id, name]);
+			}
+		}
+		return rows;
+	}
+
+	/**
+	 * Gets the pre-computed layout of the tree from the given root (if there is one).
+	 * @param root  The ID of the root person.
+	 */
+	getLayout(root: string): { [key: string]: number } | null {
+		// (A layout made for a different generation limit would be for a different tree)
+		if (this.layouts === null || this.layouts.generationLimit !== generationLimit || !(root in this.layouts.roots)) {
+			return null;
+		}
+		return this.layouts.roots[root];
+	}
+
+	/**
+	 * Gets the address to load the given picture from: the smallest thumbnail that's at least the given size
+	 * (or the picture itself, if there isn't one), or null if the picture is missing.
+	 * @param url     The picture's address (as in the structure and details).
+	 * @param pixels  How big (the longest side, in CSS pixels) the picture will be shown.
+	 */
+	pictureUrl(url: string, pixels: number): string | null {
+		if (this.media === null) {
+			return url;
+		}
+		if (this.missingPictures.has(url)) {
+			return null;
+		}
+
+		const picture = this.media.pictures[url];
+		if (picture === undefined) {
+			return url;
+		}
+
+		// (High-DPI screens need more pixels for the same size)
+		const wanted = pixels * (window.devicePixelRatio || 1);
+		let best: string | null = null;
+		for (let size in picture.thumbnails) {
+			if (Number(size) >= wanted && (best === null || Number(size) < Number(best))) {
+				best = size;
+			}
+		}
+		// (The thumbnails are named after their contents, so they can be cached for good)
+		return (best === null) ? url : `data/${picture.thumbnails[best]}`;
 	}
 
 	/**
@@ -21,13 +279,7 @@ class Data {
 	 */
 	findPersonByName(name: string) {
 		name = name.replaceAll("/", "");
-
-		for (let person of this.structure_raw) {
-			if (displayName(person["name"]) === name) {
-				return person;
-			}
-		}
-		return null;
+		return (name in this.names) ? this.names[name] : null;
 	}
 
 	/**
@@ -40,6 +292,25 @@ class Data {
 }
 
 
+/**
+ * Gets the address of one of the data files in the manifest, or null if there isn't one.
+ * @param manifest  The manifest
+ * @param name      What's in the file (eg. "structure")
+ */
+function fileUrl(manifest: DataManifest, name: string): string | null {
+	return (name in manifest.files) ? `data/${manifest.files[name]}` : null;
+}
+
+
+/**
+ * Puts a place back together from its [settlement, region, country] (see DataPlaces).
+ * @param place The parts of the place (any of them can be empty)
+ */
+function placeName(place: string[]): string {
+	return place.filter(part => part !== "").join(", ");
+}
+
+
 /**
  * Grabs the contents of a JSON file, and then executes the given callback.
  * @param address   The address of the file
@@ -52,34 +323,139 @@ async function getJsonData(address: string) {
 
 
 /**
- * Loads all the JSON data (and parses it).
+ * Grabs the contents of a binary file.
+ * @param address   The address of the file
+ */
+async function getBinaryData(address: string) {
+	let ret = fetch(address).then(r => r.arrayBuffer());
+	console.log(`Fetching ${address}`);
+	return ret;
+}
+
+
+/**
+ * Reads the columnar data file (data.bin, see util/columnar.py for the layout) with typed arrays,
+ * and rebuilds the same structure and birthdays that the JSON files hold.
+ * @param buffer  The contents of the file
+ */
+function readColumnar(buffer: ArrayBuffer): [PersonStructure[], string[][]] {
+	const view = new DataView(buffer);
+	const magic = String.fromCharCode(...Array.from(new Uint8Array(buffer, 0, 4)));
+	if (magic !== "FTVC" || view.getUint32(4, true) !== 2) {
+		throw new Error("Unsupported data file");
+	}
+
+	const headerLength = view.getUint32(8, true);
+	const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 12, headerLength)));
+	const bodyStart = 12 + headerLength;
+
+	// (The columns are 4-byte aligned, so they can be viewed in place)
+	const column = (spec: { offset: number, length: number }) => new Int32Array(buffer, bodyStart + spec.offset, spec.length);
+
+	// The string table: one blob of text, cut up at the given (UTF-16) offsets
+	const offsets = column(header.strings);
+	const text = new TextDecoder().decode(new Uint8Array(buffer, bodyStart + header.strings.text, header.strings.textLength));
+	let strings: string[] = new Array(offsets.length - 1);
+	for (let i = 0; i < strings.length; i++) {
+		strings[i] = text.substring(offsets[i], offsets[i + 1]);
+	}
+
+	function table(name: string): [number, { [key: string]: Int32Array }] {
+		let columns: { [key: string]: Int32Array } = {};
+		for (let columnName in header.tables[name].columns) {
+			columns[columnName] = column(header.tables[name].columns[columnName]);
+		}
+		return [header.tables[name].count, columns];
+	}
+
+	function listValues(columns: { [key: string]: Int32Array }, field: string, i: number): string[] {
+		const starts = columns[`${field}.start`];
+		let values = [];
+		for (let j = starts[i]; j < starts[i + 1]; j++) {
+			values.push(strings[columns[field][j]]);
+		}
+		return values;
+	}
+
+	let [count, columns] = table("structure");
+	let structure: PersonStructure[] = new Array(count);
+	for (let i = 0; i < count; i++) {
+		structure[i] = {
+			id: strings[columns.id[i]],
+			name: strings[columns.name[i]],
+			sex: strings[columns.sex[i]],
+			parents: listValues(columns, "parents", i),
+			spouses: listValues(columns, "spouses", i),
+			children: listValues(columns, "children", i),
+			parentsHidden: columns.parentsHidden[i] !== 0,
+			childrenHidden: columns.childrenHidden[i] !== 0,
+			birth: [strings[columns.birthDate[i]], strings[columns.birthPlace[i]]],
+			death: [strings[columns.deathDate[i]], strings[columns.deathPlace[i]]],
+			redirects: columns.redirects[i] !== 0,
+			redirectsTo: strings[columns.redirectsTo[i]],
+			pic: strings[columns.pic[i]],
+			hasNotes: columns.hasNotes[i] !== 0,
+		};
+	}
+
+	/**
+	 * Reads a table of (person ID, string) pairs.
+	 * @param name  The name of the table
+	 * @param field The name of the string column
+	 */
+	function pairs(name: string, field: string): string[][] {
+		let [count, columns] = table(name);
+		let result: string[][] = new Array(count);
+		for (let i = 0; i < count; i++) {
+			result[i] = [strings[columns.id[i]], strings[columns[field][i]]];
+		}
+		return result;
+	}
+
+	return [structure, pairs("birthdays", "date")];
+}
+
+
+/**
+ * Loads the JSON data needed to start (and parses it).
+ * The details are only loaded as they're needed (see Data.getDetails).
  */
 async function loadData() {
-	/* We append this every time to ensure that the JSON files aren't kept in the cache.
-	Fixes an issue where, for some reason, JSON files wouldn't reflect an update.
-	For example, they'd call a person which no longer existed (since only some of the files would
-	update?, or not reflect changes). */
+	/* The manifest is the one file that's never kept in the cache (we append this every time), so we always
+	get the latest files. Everything else is named after its contents, so a changed file always has a new name,
+	and the browser can keep the old ones for as long as it likes. */
 	const rand = Math.random().toString(36).substr(2, 5);
 
-	// All the files we need
-	const structureFile = "data/structure.json?" + rand;
-	const detailsFile = "data/details.json?" + rand;
-	const burialsFile = "data/burials.json?" + rand;
-	const birthdaysFile = "data/birthdays.json?" + rand;
+	// The manifest tells us which format everything else is in, and what it's called
+	const manifest: DataManifest = await getJsonData("data/manifest.json?" + rand);
 
-	// Get the structure file
-	let structureData: PersonStructure[] = await getJsonData(structureFile);
+	// The layouts and the media manifest are optional - if they can't be loaded, the viewer just does without them
+	//    (it works the trees out itself, and loads the full-size pictures)
+	const optionalData = (name: string) => {
+		const file = fileUrl(manifest, name);
+		return (file === null) ? Promise.resolve(null) : getJsonData(file).catch(() => null);
+	};
+	let layoutsData: Promise<DataLayouts | null> = optionalData("layouts");
+	let mediaData: Promise<DataMedia | null> = optionalData("media");
 
-	// Get the details file
-	let detailsData: { [key: string]: PersonDetails } = await getJsonData(detailsFile);
+	if (manifest.format === "columnar") {
+		// The structure and birthdays are both in the one file
+		const [structure, birthdays] = readColumnar(await getBinaryData(fileUrl(manifest, "data") as string));
+		return new Data(structure, manifest, birthdays, await layoutsData, await mediaData);
+	}
 
-	// Get the burials file
-	let burialsData: string[][] = await getJsonData(burialsFile);
+	// All the files we need
+	const structureFile = fileUrl(manifest, "structure") as string;
+	const birthdaysFile = fileUrl(manifest, "birthdays") as string;
+
+	// Get the structure file
+	let structureData: Promise<PersonStructure[]> = getJsonData(structureFile);
 
 	// Get birthdays
-	let birthdaysData: string[][] = await getJsonData(birthdaysFile);
+	let birthdaysData: Promise<string[][]> = getJsonData(birthdaysFile);
 
 	// Return data as soon as all of our work has finished
-	return await Promise.all([structureData, detailsData, burialsData, birthdaysData])
-	.then(() => new Data(structureData, detailsData, burialsData, birthdaysData));
-}
\ No newline at end of file
+	return await Promise.all([structureData, birthdaysData, layoutsData, mediaData])
+	.then(([structure, birthdays, layouts, media]) =>
+			new Data(structure, manifest, birthdays, layouts, media));
+}
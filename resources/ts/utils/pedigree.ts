@@ -0,0 +1,119 @@
+/**
+ * A compact index of everyone's parents, built from the structure.
+ * People are numbered in structure order, and each person's parents are a slice of one flat typed array
+ *    (parentList[parentStart[i]] up to parentList[parentStart[i + 1]]).
+ * Dummy people (see PersonStructure.redirects) stand in for someone else, so they're numbered as that person.
+ */
+class Pedigree {
+	ids: string[];
+	numbers: { [key: string]: number };
+	parentStart: Int32Array;
+	parentList: Int32Array;
+
+	/**
+	 * Constructs a Pedigree instance.
+	 * @param structure	The (raw) list of PersonStructures
+	 */
+	constructor(structure: PersonStructure[]) {
+		this.ids = structure.map(p => p.id);
+		this.numbers = {};
+		this.ids.forEach((id, i) => this.numbers[id] = i);
+
+		// Dummy people share the number of whoever they redirect to
+		for (let person of structure) {
+			if (person.redirects && person.redirectsTo in this.numbers) {
+				this.numbers[person.id] = this.numbers[person.redirectsTo];
+			}
+		}
+
+		this.parentStart = new Int32Array(structure.length + 1);
+		let parents: number[] = [];
+
+		structure.forEach((person, i) => {
+			this.parentStart[i] = parents.length;
+			for (let parent of person.parents) {
+				if (parent in this.numbers) {
+					parents.push(this.numbers[parent]);
+				}
+			}
+		});
+		this.parentStart[structure.length] = parents.length;
+		this.parentList = Int32Array.from(parents);
+	}
+
+	/**
+	 * Finds how many generations up each of the given person's ancestors is (taking the shortest path).
+	 * The person themselves is included, at 0.
+	 * Ancestors are in the order they're reached (nearest generations first).
+	 * @param id	The ID of the person
+	 */
+	distances(id: string): Map<number, number> {
+		let result = new Map<number, number>();
+		if (!(id in this.numbers)) {
+			return result;
+		}
+
+		// Breadth-first, so the first time we reach someone is by the shortest path
+		let queue = [this.numbers[id]];
+		result.set(queue[0], 0);
+
+		for (let i = 0; i < queue.length; i++) {
+			const person = queue[i];
+			const generation = result.get(person) as number;
+
+			for (let j = this.parentStart[person]; j < this.parentStart[person + 1]; j++) {
+				const parent = this.parentList[j];
+				if (!result.has(parent)) {
+					result.set(parent, generation + 1);
+					queue.push(parent);
+				}
+			}
+		}
+		return result;
+	}
+
+	/**
+	 * Gets the IDs of all of the given person's ancestors.
+	 * @param id	The ID of the person
+	 */
+	ancestorIds(id: string): string[] {
+		let result = [];
+		for (let [ancestor, generation] of this.distances(id)) {
+			if (generation > 0) {
+				result.push(this.ids[ancestor]);
+			}
+		}
+		return result;
+	}
+
+	/**
+	 * Checks if the given person is an ancestor of (or the same person as) the other.
+	 * @param ancestor	The possible ancestor
+	 * @param id				The person whose ancestors we check
+	 */
+	isAncestor(ancestor: string, id: string): boolean {
+		return ancestor in this.numbers && this.distances(id).has(this.numbers[ancestor]);
+	}
+
+	/**
+	 * Finds the nearest common ancestor of two people (the one with the fewest generations between them).
+	 * Either person can be the common ancestor themselves (ie. father and son, the father is the common ancestor).
+	 * Returns the ancestor's ID, and how many generations up they are from each person (or null if they aren't related).
+	 * @param p1	The first person
+	 * @param p2	The second person
+	 */
+	nearestCommonAncestor(p1: string, p2: string): [string, number, number] | null {
+		const distances1 = this.distances(p1);
+		const distances2 = this.distances(p2);
+
+		let best: [string, number, number] | null = null;
+		for (let [ancestor, generation1] of distances1) {
+			const generation2 = distances2.get(ancestor);
+
+			if (generation2 !== undefined && (best === null || generation1 + generation2 < best[1] + best[2])) {
+				best = [this.ids[ancestor], generation1, generation2];
+			}
+		}
+		return best;
+	}
+}
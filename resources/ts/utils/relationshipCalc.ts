@@ -6,56 +6,7 @@
  */
 function relationshipCalculator(person1: string, person2: string, data: Data): string {
 	const langArray: { [key: string]: any } = getLang();
-	const details = data.details;
-
-	/**
-	 * Finds the least common ancestor of two given people
-	 * @param p1  The first person
-	 * @param p2  The second person
-	 */
-	function leastCommonAncestor(p1: string, p2: string) {
-		let ancestors1 = details[p1]["ancestors"];
-		let ancestors2 = details[p2]["ancestors"];
-
-		// We include the initial people in the ancestor lists as well
-		//    Needed in case one person IS the common ancestor
-		//    (ie. father and son, father is the LC ancestor)
-		ancestors1.push([p1, 0]);
-		ancestors2.push([p2, 0]);
-
-		let commonAncestors = [];
-		for (let a1 of ancestors1) {
-			for (let a2 of ancestors2) {
-				if (a1[0] === a2[0]) {
-					// We know that a[1] and a2[1] are always numbers (due to the order), but TS doesn't
-					// @ts-ignore
-					commonAncestors.push([a1[0], a1[1] + a2[1]]);
-				}
-			}
-		}
-
-		// Sort by the generational spacing (ascending order)
-		commonAncestors.sort(function (a, b) {
-			return a[1] - b[1]
-		});
-
-		return commonAncestors.length > 0 ? commonAncestors[0] : null;
-	}
-
-	/**
-	 * Finds how far away the given ancestor is
-	 * @param person    The base person
-	 * @param ancestor  Their ancestor
-	 */
-	function distanceToAncestor(person: string, ancestor: string): number {
-		for (let a of details[person]["ancestors"]) {
-			if (a[0] === ancestor) {
-				return a[1] as number;
-			}
-		}
-
-		throw new Error(`${ancestor} is not an ancestor of ${person}`)
-	}
+	const pedigree = data.pedigree;
 
 	/**
 	 * Parses the given number into the cousin number.
@@ -99,15 +50,17 @@ function relationshipCalculator(person1: string, person2: string, data: Data): s
 		}
 	}
 
-	let lcAncestor = leastCommonAncestor(person1, person2);
+	// The nearest common ancestor, and how many generations up they are from each person
+	//    (either person can be the common ancestor themselves, ie. father and son)
+	let lcAncestor = pedigree.nearestCommonAncestor(person1, person2);
 
 	// If we don't have a shared ancestor, don't bother going any further
 	if (lcAncestor === null) {
 		return langArray["noRelation"];
 	}
 
-	const generationA = distanceToAncestor(person1, lcAncestor[0]);
-	const generationB = distanceToAncestor(person2, lcAncestor[0]);
+	const generationA = lcAncestor[1];
+	const generationB = lcAncestor[2];
 
 	const sexA = data.structure[person1]["sex"].toUpperCase();
 	const sexB = data.structure[person2]["sex"].toUpperCase();
@@ -147,12 +100,8 @@ function relationshipCalculator(person1: string, person2: string, data: Data): s
 			}
 		}
 
-		// Creates an array of all the IDs of p2's ancestors
-		let ancestors2 = data.details[p2]["ancestors"].map((a: (string | number)[]) => a[0]);
-
-
 		for (let child of parents1children) {
-			if (ancestors2.includes(child)) {
+			if (pedigree.isAncestor(child, p2)) {
 				return data.structure[child]["sex"].toUpperCase();
 			}
 		}
@@ -190,9 +139,8 @@ function relationshipCalculator(person1: string, person2: string, data: Data): s
 
 			// Iterate over p2's parents
 			for (let parent2 of parents2) {
-				let ancestorsB = data.details[parent2]["ancestors"].map((a: (string | number)[]) => a[0]);
 				// Check if the ancestor is on this parent's side
-				if (ancestorsB.includes(lcAncestor[0])) {
+				if (pedigree.isAncestor(lcAncestor[0], parent2)) {
 					parentSex = data.structure[parent2]["sex"].toUpperCase();
 				}
 			}
@@ -0,0 +1,135 @@
+/**
+ * The search index from the searchIndex.json file.
+ * Every name is boiled down to plain lowercase Latin words (tokens), and each token has a posting list:
+ *    the (ascending) positions in structure.json of the people with that word in one of their names.
+ */
+interface SearchIndexData {
+	transliteration: { [key: string]: string };
+	tokens: string[];
+	postings: number[][];
+}
+
+
+/**
+ * Looks people up by (the beginnings of) the words in their names.
+ * Search terms are tokenized the same way the names were (see tokenize in util/searchIndex.py),
+ *    so Cyrillic and Latin spellings find the same people.
+ */
+class SearchIndex {
+	transliteration: { [key: string]: string };
+	tokens: string[];
+	postings: number[][];
+	private matched: Int32Array;
+
+	// Has to match SEPARATORS in util/searchIndex.py
+	private static separators = /[\s!-\/:-@\[-`{-~«»‘’“”„]+/;
+
+	/**
+	 * Constructs a SearchIndex instance.
+	 * @param data	The contents of searchIndex.json
+	 */
+	constructor(data: SearchIndexData) {
+		this.transliteration = data.transliteration;
+		this.tokens = data.tokens;
+		this.postings = data.postings;
+
+		// One counter for every person in the index (see search)
+		let people = 0;
+		for (let postings of this.postings) {
+			for (let person of postings) {
+				people = Math.max(people, person + 1);
+			}
+		}
+		this.matched = new Int32Array(people);
+	}
+
+	/**
+	 * Boils the given text down to the plain lowercase Latin words we index.
+	 * @param text	The text to tokenize
+	 */
+	tokenize(text: string): string[] {
+		text = text.toLowerCase().normalize("NFC");
+		text = Array.from(text).map(c => (c in this.transliteration) ? this.transliteration[c] : c).join("");
+		text = text.normalize("NFKD").replace(/[\u0300-\u036f]/g, "");
+		return text.split(SearchIndex.separators).filter(token => token !== "");
+	}
+
+	/**
+	 * Finds the first token that isn't less than the given one (binary search).
+	 * @param token	The token to look for
+	 */
+	private lowerBound(token: string): number {
+		let low = 0;
+		let high = this.tokens.length;
+
+		while (low < high) {
+			const mid = (low + high) >>> 1;
+			if (this.tokens[mid] < token) {
+				low = mid + 1;
+			}
+			else {
+				high = mid;
+			}
+		}
+		return low;
+	}
+
+	/**
+	 * Gets the posting lists of every token starting with the given prefix.
+	 * @param prefix	The prefix
+	 */
+	private prefixPostings(prefix: string): number[][] {
+		let result = [];
+		for (let i = this.lowerBound(prefix); i < this.tokens.length && this.tokens[i].startsWith(prefix); i++) {
+			result.push(this.postings[i]);
+		}
+		return result;
+	}
+
+	/**
+	 * Finds everyone with a name matching every word of the query (as a prefix of one of their words).
+	 * Returns their positions in structure.json, in order.
+	 * @param query	The search query
+	 */
+	search(query: string): number[] {
+		let terms = this.tokenize(query).map(term => this.prefixPostings(term));
+		if (terms.length === 0) {
+			return [];
+		}
+
+		// Start from the term with the fewest matches
+		const size = (postings: number[][]) => postings.reduce((total, p) => total + p.length, 0);
+		terms.sort((a, b) => size(a) - size(b));
+
+		// matched[person] counts how many of the terms so far the person has matched
+		// (A person can match a term through more than one of their words, so each term only counts once)
+		let candidates = [];
+		for (let postings of terms[0]) {
+			for (let person of postings) {
+				if (this.matched[person] === 0) {
+					this.matched[person] = 1;
+					candidates.push(person);
+				}
+			}
+		}
+
+		for (let i = 1; i < terms.length; i++) {
+			for (let postings of terms[i]) {
+				for (let person of postings) {
+					if (this.matched[person] === i) {
+						this.matched[person] = i + 1;
+					}
+				}
+			}
+		}
+
+		let result = Int32Array.from(candidates.filter(person => this.matched[person] === terms.length));
+
+		// Leave the counts clean for next time
+		for (let person of candidates) {
+			this.matched[person] = 0;
+		}
+
+		return Array.from(result.sort());
+	}
+}
@@ -7,6 +7,7 @@ let verticalMargin = baseVM * scale;
 let horizontalMargin = baseHM * scale;
 let nodeBorderMargin = baseBM * scale;
 const generationLimit = 6;
+const searchResultLimit = 100; // The most search results we show at once
 const mouseClickRadius = 50;
 const bgColor: { [key: string]: string } = {"m": "#ACE2F2", "f": "#F8AFD7", "": "#d3d3d3"}; // background colors
 
@@ -172,16 +173,6 @@ function displayFirstName(name: string) {
 	return name.split("/")[0].trim();
 }
 
-/**
- * Parses the surname for display.
- * @param name  The name to parse
- */
-function displaySurname(name: string) {
-	let s = name.split("/", 2);
-	return s.length == 2 ? s[1].trim() : "";
-	// FOr some reason, this returned "" before in ALL CASES
-}
-
 
 /**
  * Initializes all of the interface buttons
@@ -189,8 +180,6 @@ function displaySurname(name: string) {
  * @param view	Our CanvasView
  */
 function initInterfaceButtons(data: Data, view: CanvasView) {
-	const rawStructure = data.structure_raw;
-
 	/**
 	 * Generates the info window with some given information.
 	 * @param dataSrc		The source of data to be displayed
@@ -275,11 +264,21 @@ function initInterfaceButtons(data: Data, view: CanvasView) {
 	// Index button
 	(document.getElementById("indexbutton") as HTMLElement).onclick =
 			function (_: MouseEvent) {
-				// We generate an 2D array of [id, surname] for each person
-				let namesArray = rawStructure.map(
-						(p: PersonStructure) => [p["id"], displaySurname(p["name"])]);
+				// (The [id, surname] pairs are already sorted by the converter)
+				data.getIndexes().then(indexes => generateInfoWindow(indexes.surname, "Index/Індех"));
+			};
 
-				return generateInfoWindow(namesArray, "Index/Індех");
+	// Birth years button
+	(document.getElementById("yearbutton") as HTMLElement).onclick =
+			function (_: MouseEvent) {
+				data.getIndexes().then(indexes => generateInfoWindow(indexes.birthYear, "Birth years"));
+			};
+
+	// Birthplaces button
+	(document.getElementById("placebutton") as HTMLElement).onclick =
+			function (_: MouseEvent) {
+				// (Everyone's grouped by place already, in the place table)
+				data.getPlaceIndex("births").then(rows => generateInfoWindow(rows, "Birthplaces"));
 			};
 
 	// Birthdays button
@@ -294,7 +293,7 @@ function initInterfaceButtons(data: Data, view: CanvasView) {
 	// Burial button
 	(document.getElementById("burialbutton") as HTMLElement).onclick =
 			function (_: MouseEvent) {
-				generateInfoWindow(data.burials, "Burials")
+				data.getPlaceIndex("burials").then(rows => generateInfoWindow(rows, "Burials"));
 			};
 
 	// HELP BUTTON
@@ -386,6 +385,8 @@ function initSearchBar(searchInput: HTMLInputElement,
 	// When the search box is selected, all the text is highlighted
 	searchInput.addEventListener("focus", (event: FocusEvent) => {
 		(event.currentTarget as HTMLInputElement).select()
+		// Start fetching the search index, so it's (hopefully) ready by the time anything is typed
+		data.getSearchIndex().catch(() => null);
 	});
 
 
@@ -395,7 +396,7 @@ function initSearchBar(searchInput: HTMLInputElement,
 	});
 
 	// Handle what happens on user input
-	searchInput.addEventListener("input", (_: Event) => {
+	searchInput.addEventListener("input", async (_: Event) => {
 		// Each time the input changes, we empty the list and start anew
 		while (searchResults.firstChild) {
 			searchResults.removeChild(searchResults.firstChild);
@@ -410,28 +411,30 @@ function initSearchBar(searchInput: HTMLInputElement,
 		// Make the results visible
 		searchResults.style.display = "block";
 
-		const splitInput = searchInput.value.toLowerCase().split(" ");
-		// Do we have any hits for the search results?
-		let anyMatches = false;
+		// The search index only gets loaded the first time it's needed
+		const query = searchInput.value;
+		const matches = await data.getSearchIndex().then(index => index.search(query)).catch(() => null);
 
+		// Don't show stale results if the input changed while we were waiting
+		if (query !== searchInput.value) {
+			return;
+		}
+
+		if (matches === null) {
+			searchResults.appendChild(document.createTextNode("Search could not be loaded"));
+			return;
+		}
 
-		for (let person of rawStructure) {
-			// Checks if the names match
-			let name = displayName(person["name"]).toLowerCase();
-			let match = splitInput.every(t => name.includes(t));
+		// Dummy placeholders are already left out of the index
+		for (let i of matches.slice(0, searchResultLimit)) {
+			searchResults.appendChild(generateResultRow(rawStructure[i]));
+		}
 
-			if (match) {
-				// We filter out any dummy placeholders from the search results
-				// Dummy nodes have an integer after the real person's ID.
-				// Real person: @XXXXX@, dummy link to real person: @XXXXX@X
-				if (person["id"].endsWith("@")) {
-					anyMatches = true;
-					searchResults.appendChild(generateResultRow(person));
-				}
-			}
+		if (matches.length > searchResultLimit) {
+			searchResults.appendChild(document.createTextNode(`${matches.length - searchResultLimit} more...`));
 		}
 
-		if (!anyMatches) {
+		if (matches.length === 0) {
 			searchResults.appendChild(document.createTextNode("No results"));
 		}
 	})
@@ -443,12 +446,19 @@ function initSearchBar(searchInput: HTMLInputElement,
  * @param dateStr The date string in the (near) ISO format.
  * @param months  The months names of the locale.
  */
-function dateToLocale(dateStr: string, months: string[]) {
-	let approximate = dateStr.includes("ABT");
-	let approxStr = approximate ? "ABT " : "";
+function dateToLocale(dateStr: string, months: string[]): string {
+	// Date ranges (BET ... AND ...) are made up of two dates
+	let range = dateStr.match(/^BET (.+) AND (.+)$/);
+	if (range !== null) {
+		return `BET ${dateToLocale(range[1], months)} AND ${dateToLocale(range[2], months)}`;
+	}
+
+	// Keep any qualifier (ABT, BEF, AFT) as a prefix
+	let qualifier = dateStr.match(/^(ABT|BEF|AFT) /);
+	let approxStr = (qualifier !== null) ? qualifier[0] : "";
 
-	// Remove the ABT approximation
-	dateStr = dateStr.replace('ABT ', '');
+	// Remove the qualifier
+	dateStr = dateStr.substring(approxStr.length);
 
 	let dateArr = dateStr.split("-");
 
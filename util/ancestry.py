@@ -0,0 +1,174 @@
+from array import array
+from typing import Dict, List, Tuple
+
+
+# Computes every person's ancestors, as a list of (ancestor ID, generation) pairs
+# Each ancestor is only listed once, at their nearest generation (so pedigree collapse - cousins marrying -
+#   doesn't make the lists grow with the number of paths up the tree)
+# People are finished parents-first, so each list is built once from the parents' finished lists
+#   (instead of walking the whole pedigree again for every person)
+# Parental loops (ie. someone who is their own ancestor) are reported and cut, rather than followed forever
+# Given the previous run's ancestors, only the stale people (see staleDescendants) are recomputed
+def computeAncestors(index, previous=None, stale=()) -> Dict[str, List[Tuple[str, int]]]:
+    ancestors: Dict[str, List[Tuple[str, int]]] = {}
+    if previous is not None:
+        # The previous lists are in parents-first order, and nobody fresh has a stale ancestor
+        ancestors = {personId: personAncestors for personId, personAncestors in previous.items()
+                     if personId not in stale and personId in index.people}
+
+    # People we've started on, but haven't finished yet
+    inProgress = set()
+
+    for root in index.personList:
+        if root.id in ancestors or root.id in inProgress:
+            continue
+
+        # Iterative depth-first search (the trees can be deeper than the recursion limit)
+        # Each entry is a person, and the index of the next parent to visit
+        stack = [(root, 0)]
+        inProgress.add(root.id)
+
+        while stack:
+            person, i = stack[-1]
+
+            if i < len(person.parents):
+                stack[-1] = (person, i + 1)
+                parent = index.getPerson(person.parents[i])
+
+                if parent is None or parent.id in ancestors:
+                    continue
+
+                if parent.id in inProgress:
+                    # We've come back around to someone we're still working on
+                    print(f"Ancestor loop: {parent.name} is both a parent and a descendant of {person.name}")
+                    continue
+
+                inProgress.add(parent.id)
+                stack.append((parent, 0))
+            else:
+                stack.pop()
+                inProgress.remove(person.id)
+                ancestors[person.id] = mergeParentAncestors(person, ancestors)
+
+    return ancestors
+
+
+# Builds a person's ancestor list out of their parents' (already finished) ancestor lists
+# The order matches a depth-first walk up the tree: each parent, followed by their own ancestors
+#   (anyone reached more than once stays where they were first reached, with the nearest generation)
+def mergeParentAncestors(person, ancestors) -> List[Tuple[str, int]]:
+    result: Dict[str, int] = {}
+    for parent in person.parents:
+        result[parent] = 1
+        # A parent without a finished list is either missing, or the far end of a loop
+        for ancestor, i in ancestors.get(parent, ()):
+            if result.get(ancestor, i + 2) > i + 1:
+                result[ancestor] = i + 1
+    return list(result.items())
+
+
+# Finds everyone whose ancestors could have changed: the changed people, and all their descendants
+def staleDescendants(index, changed) -> set:
+    children = {}
+    for person in index.personList:
+        for parent in person.parents:
+            children.setdefault(parent, []).append(person.id)
+
+    stale = set()
+    stack = list(changed)
+    while stack:
+        personId = stack.pop()
+        if personId not in stale:
+            stale.add(personId)
+            stack.extend(children.get(personId, ()))
+    return stale
+
+
+# Gives each person's set of (unique) ancestors, as a sorted array of dense person numbers
+# The ancestor lists are finished parents-first, so each set is just the union of the parents' sets
+def ancestorSets(ancestors) -> Tuple[Dict[str, int], Dict[str, array]]:
+    numbers = {personId: i for i, personId in enumerate(ancestors)}
+    sets: Dict[str, array] = {}
+
+    for personId, personAncestors in ancestors.items():
+        unique = set()
+        # The generation-1 entries are the parents
+        for parent, i in personAncestors:
+            if i == 1 and parent in numbers:
+                unique.add(numbers[parent])
+                unique.update(sets.get(parent, ()))
+        sets[personId] = array("i", sorted(unique))
+
+    return numbers, sets
+
+
+# Finds every marriage between two people who share an ancestor
+# Each marriage is only checked once, in the order it's first come across
+# Given the previous run's verdicts (couple -> shared or not), only couples with a stale spouse are rechecked
+# Returns the marriages, and the verdicts for every couple
+def findIntraFamilyMarriages(index, ancestors, verdicts=None, stale=()) -> Tuple[List[Tuple], Dict]:
+    if verdicts is None:
+        _numbers, sets = ancestorSets(ancestors)
+        verdicts = {}
+    else:
+        # Only a few couples get rechecked, so their sets are just made as needed, straight from their lists
+        sets = LazyAncestorSets(ancestors)
+
+    checked = {}
+    marriages = []
+
+    for person in list(index.personList):
+        for spouse_id in person.spouses:
+            # Families can be missing a spouse
+            spouse = index.getPerson(spouse_id)
+            if spouse is None:
+                continue
+
+            couple = (person.id, spouse.id) if person.id < spouse.id else (spouse.id, person.id)
+            if couple in checked:
+                continue
+
+            if couple in verdicts and person.id not in stale and spouse.id not in stale:
+                shared = verdicts[couple]
+            else:
+                shared = areAncestorsShared(sets.get(person.id, ()), sets.get(spouse.id, ()))
+
+            checked[couple] = shared
+            if shared:
+                marriages.append((person, spouse))
+
+    return marriages, checked
+
+
+# Each person's set of (unique) ancestor IDs, made from their ancestor list the first time it's asked for
+class LazyAncestorSets:
+    def __init__(self, ancestors):
+        self.ancestors = ancestors
+        self.sets = {}
+
+    def get(self, personId, _default=()):
+        if personId not in self.sets:
+            self.sets[personId] = {a for a, _i in self.ancestors.get(personId, ()) if a in self.ancestors}
+        return self.sets[personId]
+
+
+# Checks if two sets of ancestors overlap
+def areAncestorsShared(ancestors1, ancestors2) -> bool:
+    # Can't be any overlap if one list is empty
+    if len(ancestors1) == 0 or len(ancestors2) == 0:
+        return False
+
+    smaller, larger = sorted([ancestors1, ancestors2], key=len)
+    return not set(smaller).isdisjoint(larger)
+
+
+# Splits all of the given marriages in one batch (adding the dummy people to the index)
+def splitMarriages(index, marriages):
+    for person, spouse in marriages:
+        person.splitMarriage(spouse, index)
+
+
+# Finds all the intra-family marriages, then splits them all
+def handleIntraFamilyMarriages(index, ancestors):
+    marriages, _verdicts = findIntraFamilyMarriages(index, ancestors)
+    splitMarriages(index, marriages)
@@ -0,0 +1,88 @@
+import json
+import multiprocessing
+import os
+import time
+import traceback
+
+# The file extensions we treat as GEDCOM files when given a directory
+GEDCOM_EXTENSIONS = (".ged", ".gedcom")
+
+
+# Expands the given paths into a list of GEDCOM files (directories are searched, non-recursively)
+def findGedcomFiles(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.lower().endswith(GEDCOM_EXTENSIONS)))
+        else:
+            files.append(path)
+    return files
+
+
+# Picks an output folder for each file (named after the file, and made unique if two files share a name)
+def outputFolders(files, outputDir):
+    folders = []
+    used = set()
+    for filename in files:
+        name = os.path.splitext(os.path.basename(filename))[0]
+        folder, i = name, 1
+        while folder in used:
+            i += 1
+            folder = f"{name}-{i}"
+        used.add(folder)
+        folders.append(os.path.join(outputDir, folder, ""))
+    return folders
+
+
+# Converts one tree, and reports how it went (this is what each worker runs)
+# Errors are caught and reported, so one bad file doesn't stop the rest
+def convertTree(task):
+    convert, filename, dataFolder, options = task
+    start = time.perf_counter()
+    result = {"file": filename, "output": dataFolder, "people": None, "seconds": None, "error": None}
+
+    try:
+        result["people"] = convert(filename, dataFolder, **options)
+    except Exception as e:
+        traceback.print_exc()
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+# Converts all of the given files, each into its own folder under outputDir,
+#   with up to the given number of trees being converted at once
+def convertAll(convert, files, outputDir, workers, options):
+    # Pool workers can't start pools of their own, so trees converted side by side each get one process
+    if workers > 1:
+        options = {**options, "jobs": 1, "mediaWorkers": 1}
+
+    tasks = [(convert, filename, folder, options) for filename, folder in zip(files, outputFolders(files, outputDir))]
+
+    if workers <= 1:
+        return [convertTree(task) for task in tasks]
+
+    # (chunksize 1, so each worker picks up the next tree as soon as it's done with one)
+    with multiprocessing.Pool(workers) as pool:
+        return list(pool.imap(convertTree, tasks, chunksize=1))
+
+
+# Prints a table of how long each tree took (and whether it worked), and how long the whole batch took
+def printSummary(results, elapsed):
+    print(f"\n{'file':<40} {'people':>8} {'seconds':>8}  status")
+    for result in results:
+        people = result["people"] if result["people"] is not None else "-"
+        status = "ok" if result["error"] is None else result["error"]
+        print(f"{result['file']:<40} {people:>8} {result['seconds']:>8.2f}  {status}")
+
+    failed = sum(result["error"] is not None for result in results)
+    print(f"\n{len(results) - failed} of {len(results)} trees converted in {elapsed:.2f}s")
+
+
+# Writes the summary out as JSON (report.json, in the output directory)
+def writeReport(results, outputDir):
+    os.makedirs(outputDir, exist_ok=True)
+    with open(os.path.join(outputDir, "report.json"), "w+", encoding="utf8") as f:
+        json.dump(results, f, indent=4)
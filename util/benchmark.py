@@ -0,0 +1,308 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import columnar
+import export
+import gedcomUtils as gu
+import main
+import profiling
+import synthetic
+import treeGraph
+
+
+# Times the full conversion of a synthetic tree, for each of the given sizes
+def benchmarkConversion(sizes):
+    print(f"{'people':>10} {'seconds':>10} {'ms/person':>10}")
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "tree.ged")
+            n = synthetic.writeSyntheticGedcom(filename, size)
+
+            start = time.perf_counter()
+            main.convert(filename, os.path.join(folder, "data", ""))
+            elapsed = time.perf_counter() - start
+
+        print(f"{n:>10} {elapsed:>10.2f} {1000 * elapsed / n:>10.3f}")
+
+
+# Times the full conversion of a synthetic tree with 1, 2, 4 and 8 worker processes
+def benchmarkJobs(sizes):
+    jobCounts = [1, 2, 4, 8]
+    print(f"{'people':>10} " + " ".join(f"{f'{jobs} jobs':>10}" for jobs in jobCounts))
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "tree.ged")
+            n = synthetic.writeSyntheticGedcom(filename, size)
+
+            times = []
+            for jobs in jobCounts:
+                start = time.perf_counter()
+                main.convert(filename, os.path.join(folder, "data", ""), stream=True, jobs=jobs)
+                times.append(time.perf_counter() - start)
+
+        print(f"{n:>10} " + " ".join(f"{t:>9.2f}s" for t in times))
+
+
+# Measures the peak memory of reading a synthetic tree and building its people,
+# with the python-gedcom parser and with the streaming reader
+def benchmarkMemory(sizes):
+    print(f"{'people':>10} {'parser MB':>10} {'stream MB':>10}")
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "tree.ged")
+            n = synthetic.writeSyntheticGedcom(filename, size)
+
+            peaks = []
+            for stream in [False, True]:
+                tracemalloc.start()
+                index = gu.GedcomIndex(*main.readGedcom(filename, stream))
+                for indiv in index.individuals:
+                    index.addPerson(gu.Person(indiv, index))
+                peaks.append(tracemalloc.get_traced_memory()[1] / 2 ** 20)
+                tracemalloc.stop()
+                del index
+
+        print(f"{n:>10} {peaks[0]:>10.1f} {peaks[1]:>10.1f}")
+
+
+# Measures how much memory the people themselves hold on to, once the GEDCOM records are dropped
+def benchmarkPersonMemory(sizes):
+    print(f"{'people':>10} {'MB':>10} {'bytes/person':>13}")
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "tree.ged")
+            n = synthetic.writeSyntheticGedcom(filename, size)
+
+            tracemalloc.start()
+            index = gu.GedcomIndex(*main.readGedcom(filename, stream=True))
+            for indiv in index.individuals:
+                index.addPerson(gu.Person(indiv, index))
+
+            # Drop everything but the people
+            index.individuals, index.families, index.objects, index.notes = None, {}, {}, {}
+            gc.collect()
+            retained = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del index
+
+        print(f"{n:>10} {retained / 2 ** 20:>10.1f} {retained / n:>13.0f}")
+
+
+# Compares the JSON and columnar output formats: the time to write them, their size, and the time to read them back
+def benchmarkFormats(sizes):
+    print(f"{'people':>10} {'format':>10} {'write s':>10} {'MB':>10} {'read s':>10}")
+    jsonFiles = ["structure.json", "birthdays.json"]
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "tree.ged")
+            n = synthetic.writeSyntheticGedcom(filename, size)
+
+            # Convert it once, to get the structure and birthdays
+            dataFolder = os.path.join(folder, "data", "")
+            main.convert(filename, dataFolder, compress=False)
+            # (The files are named after their contents, so the manifest says which is which)
+            files = export.readManifest(os.path.join(dataFolder, "manifest.json"))["files"]
+            tables = []
+            for name in ["structure", "birthdays"]:
+                with open(os.path.join(dataFolder, files[name]), encoding="utf8") as f:
+                    tables.append(json.load(f))
+
+            for outputFormat in ["json", "columnar"]:
+                outputFolder = os.path.join(folder, outputFormat, "")
+                os.makedirs(outputFolder)
+
+                start = time.perf_counter()
+                export.writeTables(outputFolder, outputFormat, *tables)
+                writeTime = time.perf_counter() - start
+
+                files = [os.path.join(outputFolder, name) for name in os.listdir(outputFolder)]
+                megabytes = sum(os.path.getsize(file) for file in files) / 2 ** 20
+
+                start = time.perf_counter()
+                if outputFormat == "columnar":
+                    columnar.readColumnar(os.path.join(outputFolder, "data.bin"))
+                else:
+                    for name in jsonFiles:
+                        with open(os.path.join(outputFolder, name), encoding="utf8") as f:
+                            json.load(f)
+                readTime = time.perf_counter() - start
+
+                print(f"{n:>10} {outputFormat:>10} {writeTime:>10.2f} {megabytes:>10.2f} {readTime:>10.2f}")
+
+
+# Converts one tree (in a fresh process), with the profiler on (see benchmarkScaling)
+def profileConversion(filename, dataFolder, reportFile, options):
+    # (The conversion's own output would drown out the table)
+    sys.stdout = open(os.devnull, "w")
+    profiling.profile(main.convert, filename, dataFolder, reportFile=reportFile, **options)
+
+
+# Runs the whole conversion on synthetic trees of each size, and reports the time, memory and output size
+# Each conversion gets a fresh process, so the peak memory is just that conversion's
+# With reportFile, the results are saved as JSON too (to keep track of them over time)
+def benchmarkScaling(sizes, knobs, outputFormat="json", reportFile=None):
+    context = multiprocessing.get_context("spawn")
+    options = {"stream": True, "outputFormat": outputFormat}
+    results = []
+
+    print(f"{'people':>10} {'GEDCOM MB':>10} {'seconds':>10} {'CPU s':>10} {'peak MB':>10} {'output MB':>10} "
+          f"{'files':>8}")
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "tree.ged")
+            dataFolder = os.path.join(folder, "data", "")
+            profileFile = os.path.join(folder, "profile.json")
+            n = synthetic.writeSyntheticGedcom(filename, size, **knobs)
+
+            process = context.Process(target=profileConversion, args=(filename, dataFolder, profileFile, options))
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                print(f"{n:>10} failed (exit code {process.exitcode})")
+                continue
+
+            with open(profileFile, encoding="utf8") as f:
+                report = json.load(f)
+
+            outputFiles = [os.path.join(root, name) for root, _dirs, names in os.walk(dataFolder) for name in names]
+            result = {
+                "people": n,
+                "gedcomBytes": os.path.getsize(filename),
+                "wall": report["total"]["wall"],
+                "cpu": report["total"]["cpu"],
+                "peakMemory": report["total"]["peakMemory"],
+                "outputBytes": sum(os.path.getsize(file) for file in outputFiles),
+                "outputFiles": len(outputFiles),
+                "stages": {s["name"]: s["wall"] for s in report["stages"]},
+            }
+            results.append(result)
+
+        peak = f"{result['peakMemory'] / 2 ** 20:.1f}" if result["peakMemory"] is not None else "-"
+        print(f"{n:>10} {result['gedcomBytes'] / 2 ** 20:>10.1f} {result['wall']:>10.2f} {result['cpu']:>10.2f} "
+              f"{peak:>10} {result['outputBytes'] / 2 ** 20:>10.1f} {result['outputFiles']:>8}")
+
+    if reportFile is not None:
+        with open(reportFile, "w+", encoding="utf8") as f:
+            json.dump({
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "format": outputFormat,
+                "knobs": knobs,
+                "results": results,
+            }, f, indent=4)
+        print(f"\nResults written to {reportFile}")
+
+
+# How long it takes to load a synthetic tree into a TreeGraph (from the GEDCOM file, and from the converted data),
+#   and how long each kind of query takes on it (the median and 99th percentile of `queries` random ones)
+def benchmarkQueries(sizes, queries=200, seed=0):
+    print(f"{'people':>10} {'query':>14} {'median ms':>10} {'p99 ms':>10} {'results':>10}")
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "tree.ged")
+            dataFolder = os.path.join(folder, "data", "")
+            n = synthetic.writeSyntheticGedcom(filename, size, seed=seed)
+
+            start = time.perf_counter()
+            graph = treeGraph.loadGedcom(filename)
+            print(f"{n:>10} {'load GEDCOM':>14} {1000 * (time.perf_counter() - start):>10.1f}")
+
+            main.convert(filename, dataFolder, stream=True, layoutCount=0, compress=False)
+            start = time.perf_counter()
+            graph = treeGraph.loadData(dataFolder)
+            print(f"{n:>10} {'load data':>14} {1000 * (time.perf_counter() - start):>10.1f}")
+
+        # The same random people, surnames, places and years for every run
+        rng = random.Random(seed)
+        people = [rng.choice(graph.ids) for _ in range(queries)]
+        others = [rng.choice(graph.ids) for _ in range(queries)]
+        surnames = [rng.choice(list(graph.surnameIndex)) for _ in range(queries)]
+        places = [rng.choice(list(graph.birthPlaceIndex)) for _ in range(queries)]
+        burialPlaces = [rng.choice(list(graph.burialPlaceIndex)) for _ in range(queries)]
+        years = [rng.randrange(graph.sortedBirthYears[0], graph.sortedBirthYears[-1] + 1) for _ in range(queries)]
+
+        benchmarks = {
+            "ancestors": lambda i: graph.ancestors(people[i]),
+            "descendants": lambda i: graph.descendants(people[i]),
+            "relatives (3)": lambda i: graph.relatives(people[i], 3),
+            "path": lambda i: graph.path(people[i], others[i]) or [],
+            "surname": lambda i: graph.bySurname(surnames[i]),
+            "buried in": lambda i: graph.buriedIn(burialPlaces[i]),
+            "born between": lambda i: graph.bornBetween(years[i], years[i] + 50),
+            "born in, when": lambda i: graph.find(bornFrom=years[i], bornTo=years[i] + 50, birthPlace=places[i]),
+        }
+        for name, query in benchmarks.items():
+            times = []
+            results = 0
+            for i in range(queries):
+                start = time.perf_counter()
+                results += len(query(i))
+                times.append(time.perf_counter() - start)
+            times.sort()
+            print(f"{n:>10} {name:>14} {1000 * times[len(times) // 2]:>10.3f} "
+                  f"{1000 * times[min(len(times) - 1, len(times) * 99 // 100)]:>10.3f} {results / queries:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the GEDCOM conversion")
+    parser.add_argument("benchmark", choices=["conversion", "jobs", "memory", "people", "formats", "scaling",
+                                                "queries"],
+                        nargs="?", default="conversion",
+                        help="What to benchmark: conversion time, conversion time across worker processes, "
+                             "the memory used to read the tree, the memory held by the people, "
+                             "the JSON and columnar output formats, "
+                             "how the whole conversion scales (time, memory and output size), "
+                             "or how long queries on the tree take (see treeGraph.py)")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        help="Tree sizes (number of people) to benchmark "
+                             "(500 to 8000 by default, 1k to 1M for scaling, or 1k to 100k for queries)")
+    parser.add_argument("--queries", type=int, default=200, help="How many of each query to time (for queries)")
+
+    # The synthetic trees (for scaling, see synthetic.writeSyntheticGedcom)
+    parser.add_argument("--seed", type=int, default=0, help="The random seed for the synthetic trees")
+    parser.add_argument("--generations", type=int, help="How many generations deep the trees are")
+    parser.add_argument("--remarriage-rate", type=float, default=0.1, help="The chance a married person marries again")
+    parser.add_argument("--cousin-rate", type=float, default=0.02, help="The chance a person marries within the tree")
+    parser.add_argument("--objects", type=float, default=0.2, help="Pictures per person (on average)")
+    parser.add_argument("--notes", type=float, default=0.2, help="Notes per person (on average)")
+    parser.add_argument("--loops", type=int, default=0, help="How many people are made their own ancestor")
+    parser.add_argument("--format", choices=["json", "columnar"], default="json",
+                        help="The output format (for scaling)")
+    parser.add_argument("--report", help="Save the scaling results to this JSON file")
+    args = parser.parse_args()
+
+    sizes = args.sizes or [500, 1000, 2000, 4000, 8000]
+    if args.benchmark == "memory":
+        benchmarkMemory(sizes)
+    elif args.benchmark == "jobs":
+        benchmarkJobs(sizes)
+    elif args.benchmark == "people":
+        benchmarkPersonMemory(sizes)
+    elif args.benchmark == "formats":
+        benchmarkFormats(sizes)
+    elif args.benchmark == "scaling":
+        knobs = {"seed": args.seed, "generations": args.generations, "remarriageRate": args.remarriage_rate,
+                 "cousinRate": args.cousin_rate, "objectsPerPerson": args.objects, "notesPerPerson": args.notes,
+                 "loops": args.loops}
+        benchmarkScaling(args.sizes or [1000, 10000, 100000, 1000000], knobs, args.format, args.report)
+    elif args.benchmark == "queries":
+        benchmarkQueries(args.sizes or [1000, 10000, 100000], args.queries, args.seed)
+    else:
+        benchmarkConversion(sizes)
@@ -0,0 +1,200 @@
+import json
+import struct
+import sys
+from array import array
+
+import outputFiles
+
+# The columnar output (data.bin) holds the structure and birthdays as columns of 32-bit integers,
+#   with every string (IDs, names, dates, places...) stored once, in a shared string table
+#
+# Layout (little-endian):
+#   "FTVC", the format version (uint32), the header length (uint32), the header (JSON, padded to 4 bytes),
+#   then the column data (each column is 4-byte aligned)
+#
+# The header says where everything is:
+#   {"strings": {"offset", "length", "text", "textLength"},
+#    "tables": {table: {"count": rows, "columns": {column: {"offset", "length"}}}}}
+# Offsets are in bytes (from the start of the column data), lengths in int32s
+# A list column (eg. parents) is two columns: "<name>.start" (rows + 1 offsets) and "<name>" (all the values)
+#
+# The viewer reads this with typed arrays (see readColumnar in loadData.ts)
+MAGIC = b"FTVC"
+FORMAT_VERSION = 2
+
+
+# Every distinct string, and the number it's referred to by
+class StringTable:
+    def __init__(self):
+        self.numbers = {}
+        self.strings = []
+
+    def add(self, string) -> int:
+        number = self.numbers.get(string)
+        if number is None:
+            number = self.numbers[string] = len(self.strings)
+            self.strings.append(string)
+        return number
+
+    # All the strings as one blob of UTF-8 text, and the offset each one starts at
+    # The offsets count UTF-16 code units (like JavaScript string indices),
+    #   so the viewer can decode the whole blob at once, and cut it up with substring
+    def encode(self):
+        offsets = array("i", [0])
+        for string in self.strings:
+            offsets.append(offsets[-1] + len(string.encode("utf-16-le")) // 2)
+        return offsets, "".join(self.strings).encode("utf8")
+
+
+# The structure table (one row per person, in the same order as structure.json)
+# It's built in one pass, so the structure can be a generator (see export.writeTables)
+def structureColumns(structure, strings):
+    stringFields = ["id", "name", "sex", "redirectsTo", "pic"]
+    flagFields = ["parentsHidden", "childrenHidden", "redirects", "hasNotes"]
+    # The simple birth and death data are (year, place) pairs
+    pairFields = ["birth", "death"]
+    listFields = ["parents", "spouses", "children"]
+
+    columns = {}
+    for field in [*stringFields, *flagFields]:
+        columns[field] = array("i")
+    for field in pairFields:
+        columns[f"{field}Date"], columns[f"{field}Place"] = array("i"), array("i")
+    for field in listFields:
+        columns[f"{field}.start"], columns[field] = array("i", [0]), array("i")
+
+    count = 0
+    for p in structure:
+        count += 1
+        for field in stringFields:
+            columns[field].append(strings.add(p[field]))
+        for field in flagFields:
+            columns[field].append(int(p[field]))
+        for field in pairFields:
+            columns[f"{field}Date"].append(strings.add(p[field][0]))
+            columns[f"{field}Place"].append(strings.add(p[field][1]))
+        for field in listFields:
+            values = columns[field]
+            values.extend([strings.add(i) for i in p[field]])
+            columns[f"{field}.start"].append(len(values))
+
+    return count, columns
+
+
+# The birthdays table ((person ID, date) pairs)
+def pairColumns(rows, strings, field):
+    return len(rows), {
+        "id": array("i", [strings.add(row[0]) for row in rows]),
+        field: array("i", [strings.add(row[1]) for row in rows]),
+    }
+
+
+# Writes the structure and birthdays to one columnar file
+def writeColumnar(filename, structure, birthdays):
+    strings = StringTable()
+    tables = {
+        "structure": structureColumns(structure, strings),
+        "birthdays": pairColumns(birthdays, strings, "date"),
+    }
+    stringOffsets, text = strings.encode()
+
+    # Lay out the column data
+    chunks = []
+    position = 0
+
+    def addChunk(data: bytes):
+        nonlocal position
+        offset = position
+        data += b"\0" * (-len(data) % 4)
+        chunks.append(data)
+        position += len(data)
+        return offset
+
+    def addColumn(values: array):
+        if sys.byteorder == "big":
+            values = array("i", values)
+            values.byteswap()
+        return {"offset": addChunk(values.tobytes()), "length": len(values)}
+
+    header = {
+        "strings": {**addColumn(stringOffsets), "text": addChunk(text), "textLength": len(text)},
+        "tables": {},
+    }
+    for name, (count, columns) in tables.items():
+        header["tables"][name] = {
+            "count": count,
+            "columns": {column: addColumn(values) for column, values in columns.items()},
+        }
+
+    headerBytes = json.dumps(header, separators=(",", ":")).encode("utf8")
+    headerBytes += b" " * (-len(headerBytes) % 4)
+
+    with outputFiles.atomicOpen(filename, "wb") as f:
+        f.write(MAGIC + struct.pack("<II", FORMAT_VERSION, len(headerBytes)) + headerBytes)
+        for chunk in chunks:
+            f.write(chunk)
+
+
+# Reads a columnar file back into the same structure and birthdays lists that the JSON files hold
+def readColumnar(filename):
+    with open(filename, "rb") as f:
+        data = f.read()
+
+    if data[:4] != MAGIC:
+        raise ValueError(f"{filename} is not a columnar data file")
+    version, headerLength = struct.unpack_from("<II", data, 4)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{filename} is version {version}, not {FORMAT_VERSION}")
+
+    header = json.loads(data[12:12 + headerLength])
+    body = memoryview(data)[12 + headerLength:]
+
+    def column(spec):
+        values = array("i")
+        values.frombytes(body[spec["offset"]:spec["offset"] + 4 * spec["length"]])
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+    stringsSpec = header["strings"]
+    offsets = column(stringsSpec)
+    text = bytes(body[stringsSpec["text"]:stringsSpec["text"] + stringsSpec["textLength"]]).decode("utf8")
+    # The offsets count UTF-16 code units, which is what str indices count unless there are astral characters
+    if len(text) != offsets[-1]:
+        text = text.encode("utf-16-le")
+        strings = [text[2 * a:2 * b].decode("utf-16-le") for a, b in zip(offsets, offsets[1:])]
+    else:
+        strings = [text[a:b] for a, b in zip(offsets, offsets[1:])]
+
+    def table(name):
+        spec = header["tables"][name]
+        return spec["count"], {columnName: column(columnSpec) for columnName, columnSpec in spec["columns"].items()}
+
+    def listValues(columns, field, i):
+        starts = columns[f"{field}.start"]
+        return [strings[j] for j in columns[field][starts[i]:starts[i + 1]]]
+
+    count, columns = table("structure")
+    structure = []
+    for i in range(count):
+        structure.append({
+            "id": strings[columns["id"][i]],
+            "name": strings[columns["name"][i]],
+            "sex": strings[columns["sex"][i]],
+            "parents": listValues(columns, "parents", i),
+            "spouses": listValues(columns, "spouses", i),
+            "children": listValues(columns, "children", i),
+            "parentsHidden": bool(columns["parentsHidden"][i]),
+            "childrenHidden": bool(columns["childrenHidden"][i]),
+            "birth": [strings[columns["birthDate"][i]], strings[columns["birthPlace"][i]]],
+            "death": [strings[columns["deathDate"][i]], strings[columns["deathPlace"][i]]],
+            "redirects": bool(columns["redirects"][i]),
+            "redirectsTo": strings[columns["redirectsTo"][i]],
+            "pic": strings[columns["pic"][i]],
+            "hasNotes": bool(columns["hasNotes"][i]),
+        })
+
+    count, columns = table("birthdays")
+    birthdays = [[strings[columns["id"][i]], strings[columns["date"][i]]] for i in range(count)]
+
+    return structure, birthdays
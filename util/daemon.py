@@ -0,0 +1,168 @@
+import http.server
+import json
+import os
+import threading
+import time
+import traceback
+
+import export
+import incremental as incrementalBuild
+import layout
+import media
+import relationships
+
+# The port the status endpoint listens on (only on localhost)
+DEFAULT_PORT = 8765
+
+# How often (in seconds) the GEDCOM file is checked for changes
+POLL_INTERVAL = 0.2
+
+
+# Keeps the tree in memory, and reconverts it whenever the GEDCOM file changes
+# Only the people affected by a change are rebuilt (see incremental.updateTree),
+#   and only the output files that changed are rewritten (see export.writeOutput)
+# The output options are the same as main.convert's
+class ConversionDaemon:
+    def __init__(self, filename, dataFolder="../data/", outputFormat="json", relationshipRoot=None,
+                 layoutCount=layout.DEFAULT_LAYOUTS, withMedia=False, mediaRoot=None, mediaWorkers=1, compress=True):
+        self.filename = filename
+        self.dataFolder = dataFolder
+        self.outputFormat = outputFormat
+        self.relationshipRoot = relationshipRoot
+        self.layoutCount = layoutCount
+        self.withMedia = withMedia
+        self.mediaRoot = mediaRoot
+        self.mediaWorkers = mediaWorkers
+        self.compress = compress
+
+        # Start from the incremental cache, if there is one (so even the first build doesn't redo everything)
+        self.cache = incrementalBuild.loadCache(incrementalBuild.cachePath(dataFolder))
+        # What's currently in the data folder
+        self.output = None
+        # The file's modification time and size when it was last converted
+        self.stamp = None
+
+        # Only one build at a time (the watcher and the endpoint can both ask for one)
+        self.lock = threading.Lock()
+        self.status = {
+            "file": filename,
+            "output": dataFolder,
+            "format": outputFormat,
+            "building": False,
+            "builds": 0,
+            "lastBuild": None,
+            "seconds": None,
+            "people": None,
+            "error": None,
+        }
+
+    # The file's modification time and size (or None, if it isn't there right now)
+    def fileStamp(self):
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    # Reconverts the tree, and returns the status afterwards
+    def rebuild(self):
+        with self.lock:
+            self.status["building"] = True
+            self.stamp = self.fileStamp()
+            start = time.perf_counter()
+
+            try:
+                index, self.cache = incrementalBuild.updateTree(self.filename, self.cache)
+
+                # (The thumbnails are cached, so only new and changed pictures are redone)
+                mediaFile = None
+                if self.withMedia:
+                    mediaFile = media.buildMedia(index, self.dataFolder, self.mediaRoot, self.mediaWorkers,
+                                                 compress=self.compress)
+
+                relationshipsFile = None
+                if self.relationshipRoot is not None:
+                    relationshipsFile = relationships.writeRelationships(index, self.relationshipRoot,
+                                                                         self.dataFolder, self.compress)
+
+                output = export.buildOutput(index, self.output)
+                export.writeOutput(self.dataFolder, self.outputFormat, output, self.output,
+                                   layoutCount=self.layoutCount, mediaFile=mediaFile,
+                                   relationshipsFile=relationshipsFile, compress=self.compress)
+                self.output = output
+                self.status.update(people=len(output.entries), error=None)
+            except Exception as e:
+                # Keep going (and keep the last good output) - the next save will probably fix it
+                traceback.print_exc()
+                self.status["error"] = f"{type(e).__name__}: {e}"
+
+            self.status.update(building=False, builds=self.status["builds"] + 1, lastBuild=time.time(),
+                               seconds=time.perf_counter() - start)
+            print(f"Converted {self.filename} in {self.status['seconds']:.2f}s")
+            return dict(self.status)
+
+    # Checks the file for changes until stopped, and rebuilds whenever it does
+    # A change only counts once the file has stopped changing (so a save that's still being written is skipped)
+    def watch(self, stopped):
+        pending = None
+        while not stopped.wait(POLL_INTERVAL):
+            stamp = self.fileStamp()
+            if stamp is None or stamp == self.stamp:
+                pending = None
+            elif stamp != pending:
+                pending = stamp
+            else:
+                pending = None
+                self.rebuild()
+
+    # Converts the tree, then watches it and serves the endpoint until interrupted
+    def run(self, port=DEFAULT_PORT):
+        self.rebuild()
+
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", port), makeHandler(self))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Watching {self.filename} (status at http://127.0.0.1:{port}/status, Ctrl+C to stop)")
+
+        stopped = threading.Event()
+        try:
+            self.watch(stopped)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+
+        # Leave the cache behind, so an --incremental run (or the next daemon) starts warm
+        with self.lock:
+            incrementalBuild.saveCache(incrementalBuild.cachePath(self.dataFolder), self.cache)
+
+
+# The endpoint:
+#   GET /status   - how the last build went
+#   POST /rebuild - rebuilds right away (and responds once it's done)
+def makeHandler(conversionDaemon):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/status":
+                self.respond(200, dict(conversionDaemon.status))
+            else:
+                self.respond(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path == "/rebuild":
+                self.respond(200, conversionDaemon.rebuild())
+            else:
+                self.respond(404, {"error": "not found"})
+
+        def respond(self, code, body):
+            data = json.dumps(body).encode("utf8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        # (Every status check would be logged otherwise)
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
@@ -0,0 +1,381 @@
+import functools
+import json
+import os
+import re
+from operator import attrgetter
+
+import icu
+
+import columnar
+import gedcomUtils as gu
+import layout
+import outputFiles
+import profiling
+import searchIndex
+
+# Roughly how many people's details go in each details shard
+DETAILS_SHARD_SIZE = 500
+
+
+# Everything the viewer gets, before it's written out
+# The structure and details aren't kept here - they're made from each person as they're written (see PersonOutput),
+#   so the output never has to be in memory all at once
+class TreeOutput:
+    def __init__(self):
+        # Everyone's output (sorted by name, the way the structure is)
+        self.entries = []
+        # Everyone's output, by ID (in the order they're in the GEDCOM file)
+        self.people = {}
+        # (person ID, month-day) pairs, sorted by date
+        self.birthdays = []
+        # Everyone with a birth year, sorted by it, for the viewer's index window (see writeIndexes)
+        self.byBirthYear = []
+        # Every place, and who was born, died, married and was buried there (see gedcomUtils.Gazetteer)
+        self.places = {}
+        # The roots the tree's been laid out from in advance (see layout.py)
+        self.layoutRoots = []
+        # The published name of each file the viewer loads (by what's in it), and of each details shard
+        #   (see outputFiles.publish)
+        self.files = {}
+        self.shards = []
+
+
+# Everything that goes in the output for one person
+class PersonOutput:
+    __slots__ = ("person", "birthday", "tokens", "sortKey", "birthdayKey", "surname", "birthYear")
+
+    def __init__(self, personObj, collator):
+        # The Person object it was made from
+        self.person = personObj
+
+        # Sanity check - do the Ukrainian name genders check out?
+        surname = re.search('/([^/)]+)', personObj.name[0]).group(1)
+
+        if personObj.sex.upper() == "F":
+            # Surname check ("ий")
+            if surname.endswith("ий"):
+                print("{0} should end in 'а', not 'ий'".format(personObj.name[0]))
+        elif personObj.sex.upper() == "M":
+            if surname.endswith("ська"):
+                print("{0} should end in 'ий', not 'а'".format(personObj.name[0]))
+
+        # We add the information to the birthday list
+        self.birthday = None
+        self.birthdayKey = 0
+
+        # If birth data exists, and we get rid of the wrapper list, and we have a proper date
+        if personObj.birthData and personObj.birthData[0] and personObj.birthData[0][0]:
+            date = gu.SimpleDate(personObj.birthData[0][0])
+
+            # (Before/after/between dates aren't really birthdays)
+            if date.month and date.day and date.qualifier in ["", "ABT"]:
+                self.birthday = [personObj.id, f"{date.month}-{date.day}"]
+                self.birthdayKey = date.month * 32 + date.day
+
+        self.tokens = searchIndex.nameTokens(personObj.name)
+
+        # Everything the output gets sorted by is worked out once, here
+        # Sorting in ukrainian (by surname first):
+        # We split only the first parenthesis
+        nonSurnames, surnames = personObj.name[0].split("/", 1)
+        self.sortKey = collator.getSortKey(surnames + nonSurnames)
+        self.surname = surnames.split("/", 1)[0].strip()
+
+        year = personObj.simpleBirthData[0]
+        self.birthYear = int(year) if year else None
+
+
+    # The person's entry in the structure
+    def structure(self):
+        personObj = self.person
+        return {
+            "id": personObj.id,
+            "name": personObj.name[0],
+            "sex": personObj.sex,
+            "parents": personObj.parents,
+            "spouses": personObj.spouses,
+            "children": personObj.children,
+            "parentsHidden": personObj.parentsHidden,
+            "childrenHidden": personObj.childrenHidden,
+            "birth": personObj.simpleBirthData,
+            "death": personObj.simpleDeathData,
+            # The little bit of the details we need to draw the tree (the rest are loaded when they're needed)
+            "redirects": personObj.redirects,
+            "redirectsTo": personObj.redirectsTo,
+            "pic": personObj.pics[0] if personObj.pics else "",
+            "hasNotes": len(personObj.notes) > 0,
+        }
+
+    # The person's details
+    def detail(self):
+        personObj = self.person
+        return {
+            "id": personObj.id,
+            "pics": personObj.pics,
+            "names": personObj.name,
+            "notes": personObj.notes,
+            "events": [*personObj.birthData,
+                       # We only bother sorting the middle stuff
+                       # Birth, death, and burial order never change (hopefully)
+                       *gu.sortEventsByDate([
+                           # Marriage events
+                           *personObj.marriageData,
+                           # Divorce events
+                           *personObj.divorceData,
+                           # Occupation events
+                           *personObj.occupationData
+                       ]),
+                       *personObj.deathData,  # Death event
+                       *personObj.burialData],  # Burial data
+            "redirects": personObj.redirects,
+            "redirectsTo": personObj.redirectsTo,
+        }
+
+
+# The Ukrainian collator we sort names with
+# It's only made once per process (so converting many trees in a row doesn't pay for it every time)
+@functools.lru_cache(None)
+def getCollator():
+    return icu.Collator.createInstance(icu.Locale('uk_UK.UTF-8'))
+
+
+# Builds the output (everyone's entries, sorted, the birthdays, and the place table) for everyone in the index
+# Given the previous output, anyone still made from the same Person object keeps their previous output
+#   (Person objects aren't changed once they're built, so it would come out the same)
+def buildOutput(index, previous=None) -> TreeOutput:
+    output = TreeOutput()
+    collator = getCollator()
+    previousPeople = previous.people if previous is not None else {}
+
+    # Now, we do the real work
+    entries = output.entries
+    with profiling.stage("output") as s:
+        for personObj in index.personList:
+            entry = previousPeople.get(personObj.id)
+            if entry is None or entry.person is not personObj:
+                entry = PersonOutput(personObj, collator)
+
+            entries.append(entry)
+            output.people[personObj.id] = entry
+        s.items = len(entries)
+
+    # Sort the structures and birthday files file (the sort keys are all ready to go)
+    with profiling.stage("sort"):
+        output.birthdays = [entry.birthday for entry in sorted(
+            (entry for entry in entries if entry.birthday is not None), key=attrgetter("birthdayKey"))]
+
+        entries.sort(key=attrgetter("sortKey"))
+
+        # (People with the same birth year stay in name order)
+        output.byBirthYear = sorted((entry for entry in entries if entry.birthYear is not None),
+                                    key=attrgetter("birthYear"))
+
+    # Every place, in Ukrainian order, with the people in each in name order
+    # (Dummy people's events are the real person's, so they'd only be listed twice)
+    with profiling.stage("places") as s:
+        gazetteer = gu.Gazetteer()
+        for entry in entries:
+            if not entry.person.redirects:
+                gazetteer.addPerson(entry.person)
+        output.places = gazetteer.table(collator.getSortKey)
+        s.items = len(output.places["places"])
+
+    return output
+
+
+# Whether the given part (eg. PersonOutput.structure) of two lists of entries comes out the same
+# Only the entries that were rebuilt have to be compared (the rest are the very same objects)
+def sameOutput(entries, previousEntries, part):
+    return len(entries) == len(previousEntries) and all(
+        entry is previousEntry or part(entry) == part(previousEntry)
+        for entry, previousEntry in zip(entries, previousEntries))
+
+
+# Writes the output to the data folder
+# Every file is written a person at a time (as their output is made), then moved into place once it's complete
+# Each file is named after its contents (with compressed copies next to it, if compress is set), and the manifest
+#   says which is which - so the browser can keep them for good, and only has to check the manifest each time
+# Given the previous output (that's already in the data folder), only the files that changed are rewritten
+# The trees for the layoutCount most commonly viewed roots are laid out in advance, so the viewer can skip that
+# mediaFile and relationshipsFile are the media manifest and relationship table to list in the manifest, if there
+#   are any (see media.buildMedia and relationships.writeRelationships)
+def writeOutput(dataFolder, outputFormat, output, previous=None, layoutCount=layout.DEFAULT_LAYOUTS, mediaFile=None,
+                relationshipsFile=None, compress=True):
+    manifestOutput = f"{dataFolder}manifest.json"
+
+    if not os.path.exists(dataFolder):
+        os.makedirs(dataFolder)
+
+    # The files from last time are kept until the next time round, in case a viewer's still loading them
+    previousManifest = readManifest(manifestOutput)
+    publish = functools.partial(outputFiles.publish, dataFolder, compress=compress)
+
+    # (Whatever isn't rewritten keeps its name from last time)
+    output.files = dict(previous.files) if previous is not None else {}
+
+    tablesChanged = (previous is None or output.birthdays != previous.birthdays
+                     or not sameOutput(output.entries, previous.entries, PersonOutput.structure))
+    if tablesChanged:
+        with profiling.stage("write tables") as s:
+            tables = writeTables(dataFolder, outputFormat, (entry.structure() for entry in output.entries),
+                                 output.birthdays)
+            output.files.update((key, publish(name)) for key, name in tables.items())
+            s.items = len(output.entries)
+
+    # Generate the details files
+    with profiling.stage("write details") as s:
+        output.shards = writeDetails(output.people, dataFolder, previous.people if previous is not None else None,
+                                     previous.shards if previous is not None else None, compress)
+        s.items = len(output.shards)
+
+    # Generate the indexes
+    if tablesChanged:
+        with profiling.stage("write indexes"):
+            writeIndexes(f"{dataFolder}indexes.json", output)
+            output.files["indexes"] = publish("indexes.json")
+
+    # Generate the place table
+    if previous is None or output.places != previous.places:
+        with profiling.stage("write places") as s:
+            outputFiles.writeJson(f"{dataFolder}places.json", output.places, streamed=2)
+            output.files["places"] = publish("places.json")
+            s.items = len(output.places["places"])
+
+    # Generate the search index (it refers to people by their position in the structure)
+    if tablesChanged or not sameOutput(output.entries, previous.entries, attrgetter("tokens")):
+        with profiling.stage("write searchIndex"):
+            tokens = (entry.tokens if not entry.person.redirects else None for entry in output.entries)
+            outputFiles.writeJson(f"{dataFolder}searchIndex.json", searchIndex.buildSearchIndex(tokens), streamed=2)
+            output.files["searchIndex"] = publish("searchIndex.json")
+
+    # Lay out the most commonly viewed trees (they only depend on the structure)
+    if tablesChanged and layoutCount > 0:
+        with profiling.stage("write layouts") as s:
+            people = {personId: entry.person for personId, entry in output.people.items()}
+            # (The viewer starts on @I0000@ if there is one, and the first person in the structure otherwise)
+            startId = "@I0000@" if "@I0000@" in people or not output.entries else output.entries[0].person.id
+            output.layoutRoots = layout.chooseRoots(people, startId, layoutCount)
+            layout.writeLayouts(f"{dataFolder}layouts.json", people, output.layoutRoots)
+            output.files["layouts"] = publish("layouts.json")
+            s.items = len(output.layoutRoots)
+    elif not tablesChanged:
+        output.layoutRoots = previous.layoutRoots
+    else:
+        output.files.pop("layouts", None)
+
+    if mediaFile is not None:
+        output.files["media"] = mediaFile
+    else:
+        output.files.pop("media", None)
+
+    if relationshipsFile is not None:
+        output.files["relationships"] = relationshipsFile
+    else:
+        output.files.pop("relationships", None)
+
+    # Generate the manifest (which tells the viewer what to load)
+    # It's the one file that isn't renamed (or cached) - it's tiny, and it's what points to the rest
+    manifest = {
+        "format": outputFormat,
+        "shardCount": len(output.shards),
+        "shards": output.shards,
+        "files": output.files,
+    }
+    outputFiles.writeJson(manifestOutput, manifest)
+
+    # Then clear out everything that neither this manifest nor the last one points to
+    outputFiles.removeStale(dataFolder, ["", "details"], manifestFiles(manifest) | manifestFiles(previousManifest))
+
+
+# Reads the manifest that's in the data folder (or gives an empty one, if there isn't one)
+def readManifest(filename):
+    try:
+        with open(filename, encoding="utf8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# All the files the given manifest points to
+def manifestFiles(manifest):
+    return {*manifest.get("shards", []), *manifest.get("files", {}).values()}
+
+
+# Writes the structure and birthdays, in the given format ("json" or "columnar")
+# The structure can be any iterable (eg. a generator, so it's only made as it's written)
+# Returns the files that were written (by what's in them), for the manifest
+def writeTables(dataFolder, outputFormat, structure, birthdays):
+    # Data filenames
+    structureOutput = f"{dataFolder}structure.json"
+    birthdayOutput = f"{dataFolder}birthdays.json"
+    columnarOutput = f"{dataFolder}data.bin"
+
+    if outputFormat == "columnar":
+        # The structure and birthdays both go in one columnar file
+        columnar.writeColumnar(columnarOutput, structure, birthdays)
+        return {"data": "data.bin"}
+    else:
+        # Generate the structure file
+        outputFiles.writeJson(structureOutput, structure)
+
+        # Generate the birthdays file
+        outputFiles.writeJson(birthdayOutput, birthdays)
+        return {"structure": "structure.json", "birthdays": "birthdays.json"}
+
+
+# Writes the pre-sorted (person ID, label) lists for the viewer's index windows: by surname and birth year
+# (The birth places are in the place table)
+def writeIndexes(filename, output):
+    outputFiles.writeJson(filename, {
+        "surname": ([entry.person.id, entry.surname] for entry in output.entries),
+        "birthYear": ([entry.person.id, str(entry.birthYear)] for entry in output.byBirthYear),
+    }, streamed=2)
+
+
+# Which details shard a person goes in (32-bit FNV-1a hash of their ID)
+# The viewer works this out the same way (see Data.shardOf in loadData.ts), so it has to stay in sync
+def shardOf(personId, shardCount):
+    h = 0x811c9dc5
+    for byte in personId.encode("utf8"):
+        h = ((h ^ byte) * 0x01000193) & 0xffffffff
+    return h % shardCount
+
+
+# How many details shards there are for the given number of people
+def shardCountFor(people):
+    return max(1, -(-people // DETAILS_SHARD_SIZE))
+
+
+# Writes everyone's details in shards (data/details/0.json, 1.json, ... - then published, see outputFiles.publish),
+#   and returns the list of them
+# The viewer only fetches a shard when it needs someone's details, so it doesn't have to load them all up front
+# The details are only made a shard at a time, as it's written
+# Given the previous output (by ID) and its shards, only the shards with someone whose details changed are rewritten
+def writeDetails(people, dataFolder, previous=None, previousShards=None, compress=True):
+    detailsFolder = os.path.join(dataFolder, "details")
+    os.makedirs(detailsFolder, exist_ok=True)
+    shardCount = shardCountFor(len(people))
+
+    if previous is not None and shardCountFor(len(previous)) == shardCount:
+        changed = {shardOf(personId, shardCount) for personId in people.keys() | previous.keys()
+                   if personId not in people or personId not in previous
+                   or people[personId] is not previous[personId]
+                   and people[personId].detail() != previous[personId].detail()}
+        shards = list(previousShards)
+    else:
+        changed = set(range(shardCount))
+        shards = [None] * shardCount
+
+    # Who's in each of the shards being written
+    members = {i: [] for i in changed}
+    for personId, entry in people.items():
+        shard = members.get(shardOf(personId, shardCount))
+        if shard is not None:
+            shard.append(entry)
+
+    for i in sorted(changed):
+        outputFiles.writeJson(os.path.join(detailsFolder, f"{i}.json"),
+                              {entry.person.id: entry.detail() for entry in members.pop(i)})
+        shards[i] = outputFiles.publish(dataFolder, f"details/{i}.json", compress)
+
+    return shards
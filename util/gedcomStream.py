@@ -0,0 +1,121 @@
+import re
+from typing import Iterator, List, Tuple
+
+from gedcom.parser import GedcomFormatViolationError
+
+# The same line format python-gedcom accepts: level [pointer] tag [value]
+# (except that the last line doesn't need a line break)
+GEDCOM_LINE = re.compile(r'^(0|[1-9]+[0-9]*) (@[^@]+@ |)([A-Za-z0-9_]+)( [^\n\r]*|)([\r\n]{1,2})?')
+
+
+# A lightweight GEDCOM line (and the lines nested under it)
+# It has the same accessors as a python-gedcom Element, so Person can read either one,
+#   but it's only a handful of slots (rather than a full Element per line)
+class Record:
+    __slots__ = ("level", "pointer", "tag", "value", "children")
+
+    def __init__(self, level: int, pointer: str, tag: str, value: str):
+        self.level = level
+        self.pointer = pointer
+        self.tag = tag
+        self.value = value
+        self.children: List[Record] = []
+
+    def get_level(self) -> int:
+        return self.level
+
+    def get_pointer(self) -> str:
+        return self.pointer
+
+    def get_tag(self) -> str:
+        return self.tag
+
+    def get_value(self) -> str:
+        return self.value
+
+    def get_child_elements(self) -> List["Record"]:
+        return self.children
+
+
+# Parses a single GEDCOM line into a Record
+def parseLine(lineNumber: int, line: str) -> Record:
+    match = GEDCOM_LINE.match(line)
+    if match is None:
+        raise GedcomFormatViolationError(f"Line <{lineNumber}:{line}> of document violates GEDCOM format 5.5")
+
+    level, pointer, tag, value, _crlf = match.groups()
+    return Record(int(level), pointer.rstrip(" "), tag, value[1:])
+
+
+# Reads a GEDCOM file, and yields the raw lines of one level-0 record at a time (with the line number it starts on)
+def readRawRecords(filename) -> Iterator[Tuple[int, List[str]]]:
+    start = 1
+    lines: List[str] = []
+
+    with open(filename, "rb") as f:
+        for lineNumber, line in enumerate(f, 1):
+            line = line.decode("utf8")
+            # (Skipping the byte order mark, if there is one)
+            if lineNumber == 1:
+                line = line.lstrip("\ufeff")
+
+            # Every level-0 line starts a new record
+            if line.startswith("0") and lines:
+                yield start, lines
+                start, lines = lineNumber, []
+            lines.append(line)
+
+    if lines:
+        yield start, lines
+
+
+# Builds a Record (and the lines nested under it) out of the raw lines of a level-0 record
+def parseRecord(lineNumber: int, lines: List[str]) -> Record:
+    # The chain of records from the level-0 record down to the last line read
+    path: List[Record] = []
+
+    for i, line in enumerate(lines, lineNumber):
+        record = parseLine(i, line)
+
+        if record.level > len(path):
+            raise GedcomFormatViolationError(f"Line {i} of document violates GEDCOM format 5.5"
+                                             "\nLines must be no more than one level higher than previous line.")
+
+        if record.level == 0:
+            path = [record]
+        else:
+            # Back up to this line's parent
+            del path[record.level:]
+            path[-1].children.append(record)
+            path.append(record)
+
+    return path[0]
+
+
+# Reads a GEDCOM file, and yields one level-0 record (INDI, FAM, OBJE, NOTE, etc.) at a time
+# Only the record currently being read is kept in memory
+# If tags are given, only the records with those tags are built (the rest are skipped over)
+def readRecords(filename, tags=None) -> Iterator[Record]:
+    for lineNumber, lines in readRawRecords(filename):
+        if tags is None or parseLine(lineNumber, lines[0]).tag in tags:
+            yield parseRecord(lineNumber, lines)
+
+
+# Reads the records into lists of individuals, objects, families and notes (like main.generateArrays does)
+# The objects, families and notes are read up front (people refer to them),
+#   but the individuals are only read, one at a time, as they're iterated over
+def generateArrays(filename):
+    objects = []
+    families = []
+    notes = []
+
+    for record in readRecords(filename, {"OBJE", "FAM", "NOTE"}):
+        if record.tag == "OBJE":
+            objects.append(record)
+        elif record.tag == "FAM":
+            families.append(record)
+        elif record.tag == "NOTE":
+            notes.append(record)
+
+    individuals = readRecords(filename, {"INDI"})
+    return individuals, objects, families, notes
@@ -1,8 +1,11 @@
 import os
 import re
-from datetime import datetime
+import sys
+from calendar import monthrange
+from datetime import datetime, MAXYEAR
+from functools import lru_cache
 from dateutil import parser
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 # Where should we redirect the images to?
 from gedcom.element.element import Element
@@ -20,46 +23,137 @@ def filterNull(*args: any) -> List[any]:
     return list(filter(None, args))
 
 
+# Interns the given strings, so repeated IDs and places are only stored once
+def intern(*args: str) -> List[str]:
+    return [sys.intern(arg) for arg in args]
+
+
 ########################
 #### DATE UTILITIES ####
 ########################
 
+# GEDCOM date qualifiers, and what we show them as
+# (estimated, calculated and interpreted dates are all just approximate, as far as the viewer is concerned)
+DATE_QUALIFIERS = {"ABT": "ABT", "EST": "ABT", "CAL": "ABT", "INT": "ABT", "BEF": "BEF", "AFT": "AFT"}
+MONTHS = {month: i for i, month in enumerate(
+    ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"], 1)}
+
+# Standard GEDCOM dates ([[DD] MON] YYYY)
+GEDCOM_DATE = re.compile(r"(?:(?:(\d{1,2}) )?([A-Z]{3}) )?(\d{4})")
+# The dates we write out ourselves (YYYY[-M[-D]])
+ISO_DATE = re.compile(r"(\d{4})(?:-(\d{1,2})(?:-(\d{1,2}))?)?")
+DATE_RANGE = re.compile(r"BET (.+) AND (.+)")
+# An interpreted date can be followed by the original phrase, eg. INT MAY 1452 (MAY 1452, OR JULY 1451)
+DATE_PHRASE = re.compile(r" ?\(.*\)$")
+
+
+# Parses a date string into (qualifier, year, month, day, end of the range)
+# The standard forms are parsed by hand, and anything else falls back to dateutil
+# The same date strings come up over and over again, so the results are cached
+@lru_cache(maxsize=65536)
+def parseDate(date_string: str) -> Tuple[str, Optional[int], Optional[int], Optional[int], Optional[str]]:
+    cleanStr: str = " ".join(date_string.upper().split())
+
+    # Date ranges (BET ... AND ...) - we keep the start, and the (raw) end
+    dateRange = DATE_RANGE.fullmatch(cleanStr)
+    if dateRange is not None:
+        _qualifier, year, month, day, _end = parseDate(dateRange.group(1))
+        return "BET", year, month, day, dateRange.group(2)
+
+    # Strip any qualifier (ABT, BEF, AFT, etc.)
+    qualifier: str = ""
+    words = cleanStr.split(" ", 1)
+    if len(words) == 2 and words[0] in DATE_QUALIFIERS:
+        qualifier = DATE_QUALIFIERS[words[0]]
+        cleanStr = DATE_PHRASE.sub("", words[1])
+
+    if cleanStr == "":
+        return qualifier, None, None, None, None
+
+    parts = parseSimpleDate(cleanStr)
+    if parts is not None:
+        return (qualifier, *parts, None)
+
+    return parseOddDate(date_string)
+
+
+# Parses a standard GEDCOM date ([[DD] MON] YYYY) or one of our own (YYYY[-M[-D]]) into (year, month, day)
+# Returns None if it's neither (or isn't a real date)
+def parseSimpleDate(cleanStr: str) -> Optional[Tuple[Optional[int], Optional[int], Optional[int]]]:
+    match = GEDCOM_DATE.fullmatch(cleanStr)
+    if match is not None:
+        day, month, year = match.groups()
+        if month is not None and month not in MONTHS:
+            return None
+        month = MONTHS[month] if month is not None else None
+    else:
+        match = ISO_DATE.fullmatch(cleanStr)
+        if match is None:
+            return None
+        year, month, day = match.groups()
+        month = int(month) if month is not None else None
+
+    year = int(year)
+    day = int(day) if day is not None else None
+
+    # Make sure it's a real date (dateutil would complain about these, so we let it)
+    if month is not None and not 1 <= month <= 12:
+        return None
+    if day is not None and not 1 <= day <= monthrange(year, month)[1]:
+        return None
+
+    return year, month, day
+
+
+# Parses any other date with dateutil
+def parseOddDate(date_string: str) -> Tuple[str, Optional[int], Optional[int], Optional[int], Optional[str]]:
+    year: Optional[int] = None
+    month: Optional[int] = None
+    day: Optional[int] = None
+    qualifier: str = "ABT" if "ABT" in date_string.upper() else ""
+
+    # Strip any ABT approximation
+    cleanStr: str = re.sub("ABT", "", date_string.upper())
+    cleanStr = cleanStr.strip()
+
+    # We set the years if the date isn't an empty string
+    if cleanStr != "":
+        # Parse the date
+        date = parser.parse(cleanStr)
+
+        # The string is either space-separated or dash-separated, so we take the larger of the two
+        n = max(len(cleanStr.split()), len(cleanStr.split("-")))
+
+        # Check what parts of the date we should keep
+        if n >= 1:
+            year = date.year
+        if n >= 2:
+            month = date.month
+        if n == 3:
+            day = date.day
+
+    return qualifier, year, month, day, None
+
+
 # Represents a simple date
 class SimpleDate:
     def __init__(self, date_string: str):
-        year: Optional[int] = None
-        month: Optional[int] = None
-        day: Optional[int] = None
-        self.approximate = "ABT" in date_string.upper()
-
-        # Strip any ABT approximation
-        cleanStr: str = re.sub("ABT", "", date_string.upper())
-        cleanStr = cleanStr.strip()
-
-        # We set the years if the date isn't an empty string
-        if cleanStr != "":
-            # Parse the date
-            date = parser.parse(cleanStr)
-
-            # The string is either space-separated or dash-separated, so we take the larger of the two
-            n = max(len(cleanStr.split()), len(cleanStr.split("-")))
-
-            # Check what parts of the date we should keep
-            if n >= 1:
-                year = date.year
-            if n >= 2:
-                month = date.month
-            if n == 3:
-                day = date.day
-
-        # Save the results
-        self.year = year
-        self.month = month
-        self.day = day
+        end: Optional[str]
+        self.qualifier, self.year, self.month, self.day, end = parseDate(date_string)
+        self.approximate = self.qualifier == "ABT"
+        # The end of the range, for BET ... AND ... dates
+        self.end: Optional[SimpleDate] = SimpleDate(end) if end is not None else None
+
+        # Sorts chronologically, with the dateless last
+        self.sortKey: Tuple[int, int, int] = (self.year if self.year is not None else MAXYEAR + 1,
+                                              self.month or 0, self.day or 0)
 
     # Returns a string representation of this date
     def toString(self) -> str:
-        prefix: str = "ABT " if self.approximate else ""
+        if self.end is not None:
+            return f"BET {self.dateString()} AND {self.end.dateString()}"
+
+        prefix: str = self.qualifier + " " if self.qualifier else ""
         return prefix + self.dateString()
 
     # Returns a simple string representation of this date (no approximation)
@@ -70,52 +164,145 @@ class SimpleDate:
     # Returns a datetime object of this date
     def toDateObj(self):
         # If we don't have a date, we just return the largest possible time (for sorting purposes)
-        if self.year is None and self.month is None and self.day is None:
+        if self.year is None:
             return datetime.max
-        # Otherwise, we parse and return the datetime object
-        return parser.parse(self.dateString())
+        return datetime(self.year, self.month or 1, self.day or 1)
 
 
 # Given a list of events, sorts them chronologically
-def sortEventsByDate(lst: List[List[str]]) -> List[List[str]]:
-    # Takes the date from the event (index 0), parses it, and converts to datetime for easy comparison
-    lst.sort(key=lambda event: SimpleDate(event[0]).toDateObj())
+def sortEventsByDate(lst: List[Tuple[str, ...]]) -> List[Tuple[str, ...]]:
+    # Takes the date from the event (index 0), and uses its (cached) sort key
+    lst.sort(key=lambda event: SimpleDate(event[0]).sortKey)
     return lst
 
 
+#########################
+#### PLACE UTILITIES ####
+#########################
+
+# The kinds of events the gazetteer lists people under (see Gazetteer)
+PLACE_EVENTS = ["births", "deaths", "marriages", "burials"]
+
+
+# Tidies up a place (extra spaces, empty parts - eg. "Lviv ,, Ukraine" -> "Lviv, Ukraine"), and interns it,
+#   so each distinct place is only stored once, however many people's events it's in
+# The same place strings come up over and over again, so the results are cached
+@lru_cache(maxsize=65536)
+def normalizePlace(place: str) -> str:
+    parts = (" ".join(part.split()) for part in place.split(","))
+    return sys.intern(", ".join(part for part in parts if part))
+
+
+# Splits a normalized place (smallest part first, as GEDCOM has them) into its settlement, region and country
+#   eg. "Winnipeg, Manitoba, Canada" -> ("Winnipeg", "Manitoba", "Canada"), "Lviv, Ukraine" -> ("Lviv", "", "Ukraine")
+# Anything between the first and last parts (a county, a province...) goes in the region
+@lru_cache(maxsize=65536)
+def placeHierarchy(place: str) -> Tuple[str, str, str]:
+    parts = place.split(", ")
+    if len(parts) == 1:
+        return place, "", ""
+    return sys.intern(parts[0]), sys.intern(", ".join(parts[1:-1])), sys.intern(parts[-1])
+
+
+# The whole place again, from its (settlement, region, country)
+def placeName(hierarchy) -> str:
+    return ", ".join(part for part in hierarchy if part)
+
+
+# Every distinct place in the tree, and who was born, died, married and was buried in each one
+# Each place is numbered once, in the order it's given by table (see export.buildOutput)
+class Gazetteer:
+    def __init__(self):
+        # The people with an event in each place, by the kind of event (see PLACE_EVENTS)
+        self.people = {}
+
+    # Adds a person under a place (if there is one), for the given kind of event
+    def add(self, place, kind, personId):
+        if place:
+            people = self.people.setdefault(place, {}).setdefault(kind, [])
+            # (Someone can marry more than once in the same place)
+            if not people or people[-1] != personId:
+                people.append(personId)
+
+    # Adds all of a person's events
+    def addPerson(self, person):
+        for kind, events, placeField in [("births", person.birthData, 1), ("deaths", person.deathData, 1),
+                                         ("marriages", person.marriageData, 2), ("burials", person.burialData, 1)]:
+            for event in events:
+                self.add(event[placeField], kind, person.id)
+
+    # The place table: each place's (settlement, region, country), in the order of the given sort key,
+    #   and the people in each place (for each kind of event) as (place number, [person IDs]) pairs, in that order
+    def table(self, sortKey=None):
+        places = sorted(self.people, key=sortKey)
+        return {
+            "places": [placeHierarchy(place) for place in places],
+            **{kind: [(number, self.people[place][kind]) for number, place in enumerate(places)
+                      if kind in self.people[place]] for kind in PLACE_EVENTS},
+        }
+
+
 ###############################
 #### GEDCOM-SPECIFIC UTILS ####
 ###############################
 
 
-# From a list, get the first element matching the given ID
-def getObj(obj_id, objects):
-    for obj in objects:
-        if obj.get_pointer() == obj_id:
-            return obj
-
-    return None
-
-
-# Gets a person by their ID
-def getPerson(person_id, people):
-    for person in people:
-        if person.id == person_id:
-            return person
-
-    return None
-
-
-# Gets ancestors
-def getAncestors(person, people, i=1):
-    ancestors = []
-    for parent in person.parents:
-        # Append this person
-        ancestors.append([parent, i])
-        # Append this person's ancestors
-        ancestors += getAncestors(getPerson(parent, people), people, i + 1)
-
-    return ancestors
+# Pointer-indexed lookups over the GEDCOM records and the Person objects built from them
+# Built once from the generateArrays output, and shared by everything that resolves a reference
+class GedcomIndex:
+    def __init__(self, individuals, objects, families, notes):
+        # (This can be a one-shot generator, when streaming the GEDCOM file)
+        self.individuals = individuals
+        # Maps each xref pointer (eg. "@F0001@") to its element, one map per record type
+        self.families = indexByPointer(families)
+        self.objects = indexByPointer(objects)
+        self.notes = indexByPointer(notes)
+
+        # Maps each person's ID to their Person object
+        self.people = {}
+        # Keeps the people in the order they were added (this can grow while being iterated over)
+        self.personList = []
+
+        # If set, every family/object/note pointer looked up gets added to it
+        # (used to find out which records a person was built from)
+        self.touched: Optional[set] = None
+
+    # Gets a family by its pointer
+    def getFamily(self, family_id):
+        return self.getRecord(self.families, family_id)
+
+    # Gets an object by its pointer
+    def getObject(self, obj_id):
+        return self.getRecord(self.objects, obj_id)
+
+    # Gets a note by its pointer
+    def getNote(self, note_id):
+        return self.getRecord(self.notes, note_id)
+
+    # Gets a record by its pointer, from one of the pointer maps
+    def getRecord(self, records, pointer):
+        if not pointer:
+            return None
+        if self.touched is not None:
+            self.touched.add(pointer)
+        return records.get(pointer)
+
+    # Gets a person by their ID
+    def getPerson(self, person_id):
+        return self.people.get(person_id) if person_id else None
+
+    # Adds a person to the index
+    def addPerson(self, person):
+        self.people[person.id] = person
+        self.personList.append(person)
+
+
+# Maps each element's pointer to the element (the first element wins if a pointer is repeated)
+def indexByPointer(elements):
+    index = {}
+    for element in elements:
+        index.setdefault(element.get_pointer(), element)
+    return index
 
 
 ###################
@@ -143,33 +330,68 @@ def getTags(element: Element, tag, value=True):
     return array
 
 
+# Gets the (date, place) of the given event (eg. "BIRT") of an element
+# Works on both python-gedcom Elements and gedcomStream Records
+def getEventData(element, event):
+    date, place = "", ""
+
+    for child in element.get_child_elements():
+        if child.get_tag() == event:
+            for childOfChild in child.get_child_elements():
+                if childOfChild.get_tag() == "DATE":
+                    date = childOfChild.get_value()
+                if childOfChild.get_tag() == "PLAC":
+                    place = childOfChild.get_value()
+
+    return date, place
+
+
+# Gets the year of the given event (the last word of its date), or -1 if there isn't one
+def getEventYear(element, event):
+    date, _place = getEventData(element, event)
+    if date == "":
+        return -1
+
+    try:
+        return int(date.split()[-1])
+    except ValueError:
+        return -1
+
+
 # Person object
+# Slotted (there can be hundreds of thousands of these), and only holds on to its GEDCOM record while
+#   the person's information is being extracted
 class Person:
+    __slots__ = ("simpleBirthData", "birthData", "simpleDeathData", "deathData", "burialData", "occupationData",
+                 "parents", "spouses", "sFamilies", "cFamilies", "children", "ancestors", "pics", "notes",
+                 "marriageData", "divorceData", "redirects", "redirectsTo", "parentsHidden", "childrenHidden",
+                 "indiv", "id", "name", "sex")
+
     # Create a person object
-    def __init__(self, individual, families, objects, notes, originalPerson=True):
+    def __init__(self, individual, index, originalPerson=True):
         # Initialize variables
-        self.simpleBirthData: List[str] = []
-        self.birthData: List[List[str]] = []
-        self.simpleDeathData: List[str] = []
-        self.deathData: List[List[str]] = []
-        self.burialData: List[List[str]] = []
-        self.occupationData: List[List[str]] = []
+        self.simpleBirthData: Tuple[str, ...] = ()
+        self.birthData: Tuple[Tuple[str, ...], ...] = ()
+        self.simpleDeathData: Tuple[str, ...] = ()
+        self.deathData: Tuple[Tuple[str, ...], ...] = ()
+        self.burialData: Tuple[Tuple[str, ...], ...] = ()
+        self.occupationData: Tuple[Tuple[str, ...], ...] = ()
 
         # Family
         self.parents: List[str] = []
         self.spouses: List[str] = []
-        self.sFamilies: List = []
-        self.cFamilies = []
+        self.sFamilies: List = ()
+        self.cFamilies = ()
         self.children: List[str] = []
-        self.ancestors = []
+        self.ancestors = ()
 
         # Objects
-        self.pics: List[str] = []
-        self.notes: List[str] = []
+        self.pics: Tuple[str, ...] = ()
+        self.notes: Tuple[str, ...] = ()
 
         # Events
-        self.marriageData: List[List[str]] = []
-        self.divorceData: List[List[str]] = []
+        self.marriageData: Tuple[Tuple[str, ...], ...] = ()
+        self.divorceData: Tuple[Tuple[str, ...], ...] = ()
 
         # originalPerson checks if this is a normal person (default is true)
         # The only cases this wouldn't be true is for dummy placeholders
@@ -183,9 +405,9 @@ class Person:
 
             # Initialize personal information
             self.indiv = individual
-            self.id: str = self.indiv.get_pointer()
+            self.id: str = sys.intern(self.indiv.get_pointer())
             self.name: List[str] = getTags(self.indiv, "NAME")
-            self.sex: str = getTag(self.indiv, "SEX").lower()
+            self.sex: str = sys.intern(getTag(self.indiv, "SEX").lower())
 
             # Set life data
             self.saveDeathData()
@@ -194,17 +416,35 @@ class Person:
             self.getBurialData()
 
             # Family
-            self.sFamilies = self.getFamilies(families, "FAMS")
-            self.cFamilies = self.getFamilies(families, "FAMC")
-            self.getParents(families)
+            self.sFamilies = self.getFamilies(index, "FAMS")
+            self.cFamilies = self.getFamilies(index, "FAMC")
+            self.getParents(index)
             self.getSpouses()
             self.getChildren()
             self.getMarriageData()
             self.getDivorceData()
 
             # Pictures and notes
-            self.getPics(objects)
-            self.getNotes(notes)
+            self.getPics(index)
+            self.getNotes(index)
+
+            # We've got everything we need from the GEDCOM records
+            self.indiv = None
+            self.sFamilies, self.cFamilies = (), ()
+
+    # Pickles as a plain tuple of the slots (much quicker for the build cache and worker processes)
+    def __getstate__(self):
+        return tuple(getattr(self, slot, None) for slot in Person.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(Person.__slots__, state):
+            setattr(self, slot, value)
+
+    # A copy that can be changed without changing this person (the lists aren't shared)
+    def copy(self):
+        person = Person.__new__(Person)
+        person.__setstate__(tuple(list(value) if isinstance(value, list) else value for value in self.__getstate__()))
+        return person
 
     ####################
     #### BASIC INFO ####
@@ -213,29 +453,31 @@ class Person:
     # Gets the simple birth data (date and place)
     def saveBirthData(self):
         # Get the basic birth information
-        date, location, _x = self.indiv.get_birth_data()
+        date, location = getEventData(self.indiv, "BIRT")
 
-        year_int: int = self.indiv.get_birth_year()
+        year_int: int = getEventYear(self.indiv, "BIRT")
         year: str = str(year_int) if year_int != -1 else ''
 
-        # The simple birth data consists of the year, and the first part of the location
+        # The simple birth data consists of the year, and the settlement
         # eg ["1903", "Kyiv"]
-        self.simpleBirthData = [year, location.split(",")[0]]
+        location = normalizePlace(location)
+        self.simpleBirthData = (year, placeHierarchy(location)[0])
 
         # Now, we save the birth data as an event
         if date == "" and location == "":
-            self.birthData = []
+            self.birthData = ()
         else:
-            self.birthData = [[SimpleDate(date).toString(), location, "B"]]
+            self.birthData = ((SimpleDate(date).toString(), location, "B"),)
 
     # Gets death data
     def saveDeathData(self):
-        date, location, _x = self.indiv.get_death_data()
+        date, location = getEventData(self.indiv, "DEAT")
 
-        year_int: int = self.indiv.get_death_year()
+        year_int: int = getEventYear(self.indiv, "DEAT")
         year: str = str(year_int) if year_int != -1 else ''
 
-        self.simpleDeathData = [year, location.split(",")[0]]
+        location = normalizePlace(location)
+        self.simpleDeathData = (year, placeHierarchy(location)[0])
 
         dType: str = ""
 
@@ -246,44 +488,46 @@ class Person:
                         dType = childOfChild.get_value()
 
         if date == "" and location == "" and dType == "":
-            self.deathData = []
+            self.deathData = ()
         else:
-            self.deathData = [[SimpleDate(date).toString(), location, dType, "D"]]
+            self.deathData = ((SimpleDate(date).toString(), location, dType, "D"),)
 
     ##############################
     #### FAMILIAL INFORMATION ####
     ##############################
 
     # Gets this person's parents (if any)
-    def getParents(self, families):
+    def getParents(self, index):
         # Get the family in which this person is a child
-        family = getObj(getTag(self.indiv, "FAMC"), families)
+        family = index.getFamily(getTag(self.indiv, "FAMC"))
         # Grab the parents, and filter any null values (ie. unknown parents)
-        self.parents = filterNull(getTag(family, "HUSB"), getTag(family, "WIFE"))
+        self.parents = intern(*filterNull(getTag(family, "HUSB"), getTag(family, "WIFE")))
 
     # Gets all the families in which this person is a spouse
-    def getFamilies(self, families, familyType) -> List[FamilyElement]:
+    def getFamilies(self, index, familyType) -> List[FamilyElement]:
         # Gets the FAMS (spousal families), and converts them into objects
-        return [getObj(family, families) for family in getTags(self.indiv, familyType)]
+        return [index.getFamily(family) for family in getTags(self.indiv, familyType)]
 
     # Gets the spouse of the given family
     def getSpouse(self, family):
         # We get the husband and wife of the given family (minus any null values)
         s1, s2 = getTag(family, "HUSB"), getTag(family, "WIFE")
-        return s1 if not s1 == self.id else s2
+        spouse = s1 if not s1 == self.id else s2
+        # Families can be missing a spouse, which we give as an empty string
+        return sys.intern(spouse) if spouse else ""
 
-    # Gets this person's spouses
+    # Gets this person's spouses (leaving out any missing ones, so everything else can rely on real IDs)
     def getSpouses(self):
-        self.spouses = [self.getSpouse(family) for family in self.sFamilies]
+        self.spouses = [spouse for spouse in map(self.getSpouse, self.sFamilies) if spouse]
 
     # Gets the children of this person (if any)
     def getChildren(self):
         self.children = []
         for family in self.sFamilies:
-            self.children.extend(getTags(family, "CHIL"))
+            self.children.extend(intern(*getTags(family, "CHIL")))
 
     # gets pictures from this person
-    def getPics(self, objects):
+    def getPics(self, index):
         # gets the pictures from all of the objects
         picLst: List[str] = []
 
@@ -292,7 +536,7 @@ class Person:
 
         for parentObj in objectsToFetch:
             for obj in getTags(parentObj, "OBJE"):
-                allPicObjects.append(getObj(obj, objects))
+                allPicObjects.append(index.getObject(obj))
 
         # Iterates over all of the objects associated with this person
         for obj in allPicObjects:
@@ -301,12 +545,12 @@ class Person:
             imageFileName = IMAGES_FOLDER + imageFileName.split("photos", 1)[-1]
             picLst.append(imageFileName)
 
-        self.pics = picLst
+        self.pics = tuple(picLst)
 
     # Gets this person's notes
-    def getNotes(self, notes):
+    def getNotes(self, index):
         # Gets all the objects for this given person
-        rawNotes = [getObj(note, notes) for note in getTags(self.indiv, "NOTE")]
+        rawNotes = [index.getNote(note) for note in getTags(self.indiv, "NOTE")]
 
         # gets the notes from all of the objects
         result: List[str] = []
@@ -320,7 +564,7 @@ class Person:
                     parsedNote += val if val != "" else "\n\n\t"
 
             result.append(parsedNote)
-        self.notes = result
+        self.notes = tuple(result)
 
     # Abstract function for divorce and marriage data
     def getMDData(self, event_type):
@@ -340,9 +584,10 @@ class Person:
             if date == '' and place == '':
                 continue
             else:
-                events.append([SimpleDate(date).toString(), self.getSpouse(family), place, event_type.upper()])
+                events.append((SimpleDate(date).toString(), self.getSpouse(family), normalizePlace(place),
+                               event_type.upper()))
 
-        return events
+        return tuple(events)
 
     def getMarriageData(self):
         self.marriageData = self.getMDData("MARR")
@@ -364,13 +609,13 @@ class Person:
                 if sub.get_tag() == "DATE":
                     date = sub.get_value()
 
-            occupations.append([date, value, "OCC"])
+            occupations.append((date, value, "OCC"))
 
-        self.occupationData = occupations
+        self.occupationData = tuple(occupations)
 
     # gets burial data
     def getBurialData(self):
-        date, place, _x = self.indiv.get_burial_data()
+        date, place = getEventData(self.indiv, "BURI")
         bType = ""
 
         for child in self.indiv.get_child_elements():
@@ -386,11 +631,11 @@ class Person:
                             bType += sub.get_value()
 
         if date == '' and place == '' and bType == '':
-            self.burialData = []
+            self.burialData = ()
         else:
-            self.burialData = [[date, place, bType, "BUR"]]
+            self.burialData = ((date, normalizePlace(place), bType, "BUR"),)
 
-    def initRedirect(self, redirectingTo, people):
+    def initRedirect(self, redirectingTo, index):
         self.redirects = True
         self.redirectsTo = redirectingTo.id
         self.parentsHidden = False
@@ -399,17 +644,17 @@ class Person:
 
         # Give it an ID that doesn't exist
         ID = redirectingTo.id
-        while getPerson(ID, people) is not None:
+        while index.getPerson(ID) is not None:
             ID += "1"
 
         self.id = ID
 
         self.name = list(redirectingTo.name)
         self.sex = redirectingTo.sex
-        self.simpleBirthData = list(redirectingTo.simpleBirthData)
-        self.birthData = list(redirectingTo.birthData)
-        self.simpleDeathData = list(redirectingTo.simpleDeathData)
-        self.deathData = list(redirectingTo.deathData)
+        self.simpleBirthData = redirectingTo.simpleBirthData
+        self.birthData = redirectingTo.birthData
+        self.simpleDeathData = redirectingTo.simpleDeathData
+        self.deathData = redirectingTo.deathData
 
     def replaceSpouse(self, old, new):
         # Switch this person's spouses
@@ -424,76 +669,49 @@ class Person:
     def replaceParent(self, old, new):
         self.parents = [new if p == old else p for p in self.parents]
 
-    def areAncestorsShared(self, person):
-        # Clean up the ancestors - remove the generational counts, and remove duplicates
-        ancestors1 = list(set([ancestor[0] for ancestor in self.ancestors]))
-        ancestors2 = list(set([ancestor[0] for ancestor in person.ancestors]))
-
-        # Check if the ancestor lists overlap
-        union = set()
-        for ancestorSet in [ancestors1, ancestors2]:
-            if len(ancestorSet) == 0:
-                # Can't be any overlap if one list is empty
-                return False
-            for ancestor in ancestorSet:
-                if ancestor in union:
-                    return True
-                union.add(ancestor)
-        return False
-
-    # Handles the case of the common ancestor
+    # Handles the case of the common ancestor (see ancestry.handleIntraFamilyMarriages)
     # Basically, to avoid completely destroying the tree structure, we use dummy people
     # A dummy person is just a link to the real person, but doesn't show any children/parents
     # Therefore, only one set of parents/children shows at once, so the conflict doesn't ever show up
-    def handleCommonAncestor(self, people):
-        # Get this person's ancestors (if not already gotten)
-        if len(self.ancestors) == 0:
-            self.ancestors = getAncestors(self, people, 1)
-
-        for spouse_id in self.spouses:
-            # Get the spouse object
-            spouse = getPerson(spouse_id, people)
-
-            # Get this spouse's ancestors (if not already gotten)
-            if len(spouse.ancestors) == 0:
-                spouse.ancestors = getAncestors(spouse, people, 1)
-
-            if self.areAncestorsShared(spouse):
-                if self.name > spouse.name:
-                    person1, person2 = self, spouse
-                else:
-                    person1, person2 = spouse, self
-
-                # Duplicate person2
-                duplicateP2 = Person(None, None, None, None, originalPerson=False)
-                duplicateP2.initRedirect(person2, people)
-
-                # The duplicate has the ancestors hidden
-                duplicateP2.parentsHidden = True
-                # The real one has the children hidden
-                person2.childrenHidden = True
-
-                # Find the overlap of the children (in case of multiple marriages)
-                children = [x for x in self.children if x in person2.children]
-
-                for child in children:
-                    getPerson(child, people).replaceParent(person2.id, duplicateP2.id)
-
-                duplicateP2.children = children
-                # person2 only keeps the children not of this marriage
-                person2.children = [x for x in person2.children if x not in children]
-
-                person1.replaceSpouse(person2, duplicateP2)
-                people.append(duplicateP2)
-
-                # Now, we deal with the duplicate person1
-                duplicateP1 = Person(None, None, None, None, originalPerson=False)
-                duplicateP1.initRedirect(person1, people)
-                duplicateP1.parentsHidden = True
-                duplicateP1.childrenHidden = True
-
-                person2.spouses.append(duplicateP1.id)
-                duplicateP1.spouses = [person2.id]
-                people.append(duplicateP1)
-
-                print(f'Duplicate families: {person1.name}, {person2.name}')
+    def splitMarriage(self, spouse, index):
+        if self.name > spouse.name:
+            person1, person2 = self, spouse
+        else:
+            person1, person2 = spouse, self
+
+        # Duplicate person2
+        duplicateP2 = Person(None, index, originalPerson=False)
+        duplicateP2.initRedirect(person2, index)
+
+        # The duplicate has the ancestors hidden
+        duplicateP2.parentsHidden = True
+        # The real one has the children hidden
+        person2.childrenHidden = True
+
+        # Find the overlap of the children (in case of multiple marriages)
+        children = [x for x in self.children if x in person2.children]
+
+        for child in children:
+            # (Skipping any children that are listed, but don't exist)
+            childObj = index.getPerson(child)
+            if childObj is not None:
+                childObj.replaceParent(person2.id, duplicateP2.id)
+
+        duplicateP2.children = children
+        # person2 only keeps the children not of this marriage
+        person2.children = [x for x in person2.children if x not in children]
+
+        person1.replaceSpouse(person2, duplicateP2)
+        index.addPerson(duplicateP2)
+
+        # Now, we deal with the duplicate person1
+        duplicateP1 = Person(None, index, originalPerson=False)
+        duplicateP1.initRedirect(person1, index)
+        duplicateP1.parentsHidden = True
+        duplicateP1.childrenHidden = True
+
+        person2.spouses.append(duplicateP1.id)
+        duplicateP1.spouses = [person2.id]
+        index.addPerson(duplicateP1)
+
+        print(f'Duplicate families: {person1.name}, {person2.name}')
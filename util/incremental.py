@@ -0,0 +1,183 @@
+import hashlib
+import marshal
+import os
+
+import ancestry
+import gedcomStream
+import gedcomUtils as gu
+
+# Bump this whenever what gets cached (or how it's worked out) changes
+CACHE_VERSION = 4
+
+# The level-0 records that people are built from
+RECORD_TAGS = ["INDI", "FAM", "OBJE", "NOTE"]
+
+
+# Everything we keep between runs
+class BuildCache:
+    def __init__(self):
+        # The content hash of every record, by pointer
+        self.hashes = {}
+        # Every person as they were extracted (before any marriages were split), by ID
+        self.people = {}
+        # The pointers of the records each person was built from, by ID
+        self.dependencies = {}
+        # Everyone's ancestors, in parents-first order (see ancestry.computeAncestors)
+        self.ancestors = {}
+        # Whether or not each couple shares an ancestor
+        self.verdicts = {}
+
+
+# The cache file sits next to the data folder (eg. ../data/ -> ../data.cache)
+def cachePath(dataFolder):
+    return os.path.normpath(dataFolder) + ".cache"
+
+
+# Loads the cache from the last run (or an empty one, if there isn't a usable one)
+def loadCache(filename) -> BuildCache:
+    cache = BuildCache()
+    try:
+        with open(filename, "rb") as f:
+            version, hashes, people, cache.dependencies, cache.ancestors, cache.verdicts = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return BuildCache()
+
+    # marshal's format can change between Python versions, so the cache is only good for this one
+    if version != (CACHE_VERSION, marshal.version):
+        return BuildCache()
+
+    cache.hashes = hashes
+    for personId, state in people.items():
+        person = gu.Person.__new__(gu.Person)
+        person.__setstate__(state)
+        cache.people[personId] = person
+    return cache
+
+
+# Saves the cache for the next run
+# Everything in it is made of plain builtins, so we can use marshal (which is a lot quicker than pickle)
+def saveCache(filename, cache):
+    people = {personId: person.__getstate__() for personId, person in cache.people.items()}
+    contents = ((CACHE_VERSION, marshal.version), cache.hashes, people, cache.dependencies, cache.ancestors,
+                cache.verdicts)
+
+    # Write it out to the side first, so an interrupted run can't leave half a cache behind
+    temp = filename + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(marshal.dumps(contents))
+    os.replace(temp, filename)
+
+
+# A pointer map of records that are only parsed (from their raw lines) when they're looked up
+class LazyRecords:
+    def __init__(self):
+        self.raw = {}
+        self.parsed = {}
+
+    def add(self, pointer, lineNumber, lines):
+        self.raw.setdefault(pointer, (lineNumber, lines))
+
+    def get(self, pointer):
+        if pointer not in self.parsed:
+            raw = self.raw.get(pointer)
+            self.parsed[pointer] = gedcomStream.parseRecord(*raw) if raw is not None else None
+        return self.parsed[pointer]
+
+
+# Builds the tree, only redoing the work that the changes since the last run could affect:
+#   - people are only re-extracted if one of the records they were built from changed
+#   - ancestors are only recomputed for those people, and their descendants
+#   - marriages are only rechecked if one of the spouses has new ancestors
+# The cache is kept in a file between runs
+def buildTree(filename, cacheFile):
+    previous = loadCache(cacheFile)
+    index, cache, marriages, changed = rebuild(filename, previous)
+
+    # Save the people before their marriages get split up (that changes them)
+    # (If nothing changed, the cache we loaded is still good)
+    if changed or not previous.hashes:
+        saveCache(cacheFile, cache)
+    ancestry.splitMarriages(index, marriages)
+    return index
+
+
+# The same as buildTree, but with the cache kept in memory (for the daemon, see daemon.py)
+# Returns the tree, and the cache for next time
+def updateTree(filename, previous):
+    index, cache, marriages, _changed = rebuild(filename, previous)
+
+    # Splitting marriages changes the people involved (and the children of the marriage),
+    #   so they're split in copies, and the cache keeps the people as they were
+    # (The cached people are never changed, so they can be reused as they are next time)
+    if marriages:
+        positions = {person.id: i for i, person in enumerate(index.personList)}
+        for person, spouse in marriages:
+            for personId in [person.id, spouse.id, *person.children, *spouse.children]:
+                if personId in positions:
+                    index.personList[positions[personId]] = index.people[personId] = index.people[personId].copy()
+
+        marriages = [(index.people[person.id], index.people[spouse.id]) for person, spouse in marriages]
+
+    ancestry.splitMarriages(index, marriages)
+    return index, cache
+
+
+# Does the work for buildTree and updateTree (everything up to splitting the marriages)
+# Returns the tree, the new cache, the marriages to split, and which records changed
+def rebuild(filename, previous):
+    cache = BuildCache()
+
+    index = gu.GedcomIndex([], [], [], [])
+    records = {tag: LazyRecords() for tag in RECORD_TAGS}
+    index.families, index.objects, index.notes = records["FAM"], records["OBJE"], records["NOTE"]
+
+    # Hash every record (this is the only time the whole file is looked at)
+    individuals = []
+    for lineNumber, lines in gedcomStream.readRawRecords(filename):
+        header = gedcomStream.parseLine(lineNumber, lines[0])
+        if header.tag not in records or not header.pointer or header.pointer in cache.hashes:
+            continue
+
+        cache.hashes[header.pointer] = hashlib.blake2b("".join(lines).encode("utf8"), digest_size=16).digest()
+        records[header.tag].add(header.pointer, lineNumber, lines)
+        if header.tag == "INDI":
+            individuals.append(header.pointer)
+
+    # Which records are new, changed, or gone?
+    changed = {pointer for pointer, h in cache.hashes.items() if previous.hashes.get(pointer) != h}
+    changed.update(previous.hashes.keys() - cache.hashes.keys())
+
+    # Which people were built from those records?
+    outdated = set()
+    for personId, dependencies in previous.dependencies.items():
+        if not changed.isdisjoint(dependencies):
+            outdated.add(personId)
+
+    rebuilt = set()
+    for pointer in individuals:
+        if pointer in previous.people and pointer not in outdated:
+            person = previous.people[pointer]
+            cache.dependencies[person.id] = previous.dependencies[person.id]
+        else:
+            # Keep track of every record this person gets built from
+            index.touched = {pointer}
+            person = gu.Person(records["INDI"].get(pointer), index)
+            cache.dependencies[person.id] = index.touched
+            index.touched = None
+            rebuilt.add(person.id)
+
+        index.addPerson(person)
+        cache.people[person.id] = person
+
+    # Now the ancestors, for the rebuilt (or removed) people and their descendants
+    removed = previous.people.keys() - cache.people.keys()
+    stale = ancestry.staleDescendants(index, rebuilt | removed)
+
+    cache.ancestors = ancestry.computeAncestors(index, previous.ancestors, stale)
+    for personId, personAncestors in cache.ancestors.items():
+        index.getPerson(personId).ancestors = personAncestors
+
+    marriages, cache.verdicts = ancestry.findIntraFamilyMarriages(index, cache.ancestors, previous.verdicts, stale)
+
+    print(f"Rebuilt {len(rebuilt)} of {len(cache.people)} people ({len(stale)} with new ancestors)")
+    return index, cache, marriages, changed
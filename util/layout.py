@@ -0,0 +1,298 @@
+import sys
+from typing import Dict, List, Optional
+
+import outputFiles
+
+# These all have to match the viewer (see utils.ts, nodes.ts, text.ts and tree.ts)
+# How many generations down from the root the viewer draws (generationLimit)
+GENERATION_LIMIT = 6
+# How many generations up from the focused person the viewer looks for the root (see CanvasView.getTopAncestor)
+TOP_ANCESTOR_GENERATIONS = 4
+# The gap between siblings (horizontalMargin), and between cousins' subtrees (subtreeSpacing)
+SIBLING_SPACING = 20
+SUBTREE_SPACING = 30
+# The padding on each side of a person's text (sidePadding), and the gap between spouses (spousalSpacing)
+SIDE_PADDING = 20
+SPOUSAL_SPACING = 20
+# The font sizes of the name and the dates (baseFont and detailFont)
+NAME_SIZE = 14
+DETAIL_SIZE = 11
+# The words the dates start with (the widest of them is assumed, since it depends on the viewer's language)
+DATE_WORDS = {"birth": ["Born", "Народився", "Народилася"], "death": ["Died", "Помер", "Померла"]}
+
+# How many roots get a layout, by default
+DEFAULT_LAYOUTS = 10
+
+# Roughly how wide characters are (in ems) - the viewer measures the real text, and we can't,
+#   so these are on the wide side (most sans-serif fonts are narrower)
+NARROW = set("ijlI|!.,:;'`\"")
+SEMI_NARROW = set("frtJ()[]{}- /1")
+WIDE = set("mwMWжшщюфыЖШЩЮФЫ@%")
+
+
+def charWidth(c):
+    if c in NARROW:
+        return 0.32
+    if c in SEMI_NARROW:
+        return 0.45
+    if c in WIDE:
+        return 1.0
+    if c.isupper():
+        return 0.75
+    if ord(c) > 0x2fff:
+        # (CJK and the like are a full em)
+        return 1.0
+    return 0.65
+
+
+# Roughly how wide (in pixels) the given text is, in the given font size
+def textWidth(text, size):
+    return sum(charWidth(c) for c in text) * size
+
+
+# Roughly how wide a person's node is in the viewer (see makeNodeText in nodes.ts)
+def personWidth(person):
+    # The name is split into the forenames and surname (JS's split("/", 2))
+    widths = [textWidth(part, NAME_SIZE) for part in person.name[0].split("/")[:2]]
+
+    for kind, data in [("birth", person.simpleBirthData), ("death", person.simpleDeathData)]:
+        if data and data[0] != "":
+            widths.append(max(textWidth(f"{word} {data[0]}", DETAIL_SIZE) for word in DATE_WORDS[kind]))
+
+    return max(widths) + SIDE_PADDING * 2
+
+
+# A node in the viewer's tree: one person, or a person and their spouses (see INode in nodes.ts)
+class LayoutNode:
+    __slots__ = ("ids", "generation", "ancestors", "descendents", "width", "parent", "children", "number",
+                 "prelim", "mod", "shift", "change", "thread", "ancestor", "x")
+
+    def __init__(self, ids, generation, width):
+        self.ids = ids
+        self.generation = generation
+        self.ancestors = []
+        self.descendents = []
+        self.width = width
+
+        # The layout tree (each node only appears once in it, even if the viewer links to it twice)
+        self.parent = None
+        self.children = []
+        # Which child of its parent it is
+        self.number = 0
+
+        # The layout itself (see layoutTree)
+        self.prelim = 0.0
+        self.mod = 0.0
+        self.shift = 0.0
+        self.change = 0.0
+        self.thread = None
+        self.ancestor = self
+        self.x = 0.0
+
+
+# Builds the nodes for the tree the viewer draws from the given root, exactly as Tree.makeNode does (see tree.ts)
+# (Which group someone ends up in, and which generation, depends on the order they're come across in)
+def buildNodes(people, rootId) -> LayoutNode:
+    saved: Dict[str, LayoutNode] = {}
+
+    def makeNode(personId, generation):
+        if personId in saved:
+            return saved[personId]
+
+        person = people[personId]
+        ids = [personId, *(spouse for spouse in person.spouses if spouse in people)]
+        width = sum(personWidth(people[i]) for i in ids) + SPOUSAL_SPACING * (len(ids) - 1)
+
+        node = LayoutNode(ids, generation, width)
+        for i in ids:
+            saved[i] = node
+
+        # There is only one group of parents (covers divorces, re-marrying, etc.)
+        if person.parents and person.parents[0] in people:
+            node.ancestors = [makeNode(person.parents[0], generation - 1)]
+
+        if person.children and abs(generation) < GENERATION_LIMIT:
+            node.descendents = [makeNode(child, generation + 1) for child in person.children if child in people]
+        return node
+
+    # (makeNode goes up as well as down, so it can go deeper than the default limit on a big tree)
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, 10000))
+    try:
+        return makeNode(rootId, 0)
+    finally:
+        sys.setrecursionlimit(limit)
+
+
+# Lays out the tree below the root (the part the viewer draws), and returns each node's center, by its first ID
+# This is Buchheim, Jünger and Leipert's linear-time version of Walker's tidy tree layout,
+#   with each node's real width (and a wider gap between subtrees than between siblings, as in the viewer)
+def layoutTree(root: LayoutNode) -> Dict[str, float]:
+    # Pick out the layout tree: each node goes under the first parent it's come across under
+    order = [root]
+    seen = {id(root)}
+    for node in order:
+        for child in node.descendents:
+            if id(child) not in seen:
+                seen.add(id(child))
+                child.parent = node
+                child.number = len(node.children)
+                node.children.append(child)
+                order.append(child)
+
+    def distance(left, right):
+        gap = SIBLING_SPACING if left.parent is right.parent else SUBTREE_SPACING
+        return left.width / 2 + right.width / 2 + gap
+
+    def leftSibling(v) -> Optional[LayoutNode]:
+        return v.parent.children[v.number - 1] if v.parent is not None and v.number > 0 else None
+
+    def nextLeft(v):
+        return v.children[0] if v.children else v.thread
+
+    def nextRight(v):
+        return v.children[-1] if v.children else v.thread
+
+    def moveSubtree(wm, wp, shift):
+        subtrees = wp.number - wm.number
+        wp.change -= shift / subtrees
+        wp.shift += shift
+        wm.change += shift / subtrees
+        wp.prelim += shift
+        wp.mod += shift
+
+    def executeShifts(v):
+        shift = change = 0.0
+        for w in reversed(v.children):
+            w.prelim += shift
+            w.mod += shift
+            change += w.change
+            shift += w.shift + change
+
+    # Pushes v's subtree right, until it clears the subtrees of the siblings on its left
+    def apportion(v, defaultAncestor):
+        w = leftSibling(v)
+        if w is None:
+            return defaultAncestor
+
+        # The inside and outside contours of the left (m) and right (p) subtrees
+        vip = vop = v
+        vim = w
+        vom = v.parent.children[0]
+        sip, sop, sim, som = vip.mod, vop.mod, vim.mod, vom.mod
+
+        while nextRight(vim) is not None and nextLeft(vip) is not None:
+            vim = nextRight(vim)
+            vip = nextLeft(vip)
+            vom = nextLeft(vom)
+            vop = nextRight(vop)
+            vop.ancestor = v
+
+            shift = (vim.prelim + sim) - (vip.prelim + sip) + distance(vim, vip)
+            if shift > 0:
+                ancestor = vim.ancestor if vim.ancestor.parent is v.parent else defaultAncestor
+                moveSubtree(ancestor, v, shift)
+                sip += shift
+                sop += shift
+
+            sim += vim.mod
+            sip += vip.mod
+            som += vom.mod
+            sop += vop.mod
+
+        if nextRight(vim) is not None and nextRight(vop) is None:
+            vop.thread = nextRight(vim)
+            vop.mod += sim - sop
+        if nextLeft(vip) is not None and nextLeft(vom) is None:
+            vom.thread = nextLeft(vip)
+            vom.mod += sip - som
+            defaultAncestor = v
+        return defaultAncestor
+
+    # Places a node next to its left sibling (or, for the first child, where its own children put it)
+    def placeNode(v):
+        w = leftSibling(v)
+        if v.children:
+            # Centered over the children (from the left of the first to the right of the last, as in the viewer)
+            first, last = v.children[0], v.children[-1]
+            midpoint = ((first.prelim - first.width / 2) + (last.prelim + last.width / 2)) / 2
+            if w is not None:
+                v.prelim = w.prelim + distance(w, v)
+                v.mod = v.prelim - midpoint
+            else:
+                v.prelim = midpoint
+        else:
+            v.prelim = w.prelim + distance(w, v) if w is not None else 0.0
+
+    # Everyone's children are done before them (in reverse breadth-first order, so there's no recursion),
+    #   and each set of siblings left to right
+    for v in reversed(order):
+        if v.children:
+            defaultAncestor = v.children[0]
+            for child in v.children:
+                placeNode(child)
+                defaultAncestor = apportion(child, defaultAncestor)
+            executeShifts(v)
+    placeNode(root)
+
+    # Then add up the modifiers on the way back down
+    centers = {}
+    modSums = {id(root): 0.0}
+    for v in order:
+        modSum = modSums.pop(id(v))
+        v.x = v.prelim + modSum
+        centers[v.ids[0]] = round(v.x, 1)
+        for child in v.children:
+            modSums[id(child)] = modSum + v.mod
+    return centers
+
+
+# The root of the tree the viewer draws for each person (see CanvasView.getTopAncestor):
+#   their furthest ancestor up to TOP_ANCESTOR_GENERATIONS up (following the last parent first), or themselves
+# It's done a generation at a time for everyone at once, so it's linear in the size of the tree
+def topAncestors(people) -> Dict[str, str]:
+    # The first ancestor exactly i generations up, for everyone who has one (everyone is 0 generations up)
+    level = {personId: personId for personId in people}
+    roots = dict(level)
+
+    for i in range(1, TOP_ANCESTOR_GENERATIONS + 1):
+        nextLevel = {}
+        for personId, person in people.items():
+            for parent in reversed(person.parents):
+                # (A parent that isn't in the tree only counts as themselves, one generation up)
+                ancestor = parent if i == 1 else level.get(parent)
+                if ancestor is not None:
+                    nextLevel[personId] = ancestor
+                    break
+        level = nextLevel
+        roots.update(level)
+
+    return roots
+
+
+# The roots worth laying out in advance: the one the viewer starts on, then the ones the most people's trees have
+def chooseRoots(people, startId, count) -> List[str]:
+    tops = topAncestors(people)
+    usage = {}
+    for root in tops.values():
+        if root in people:
+            usage[root] = usage.get(root, 0) + 1
+
+    roots = []
+    if startId in people and tops[startId] in people:
+        roots.append(tops[startId])
+    for root in sorted(usage, key=usage.get, reverse=True):
+        if len(roots) >= count:
+            break
+        if root not in roots:
+            roots.append(root)
+    return roots[:count]
+
+
+# Lays out the trees for the given roots, and writes them to a JSON file:
+#   each node's center, by its first person's ID (see layoutTree), for each root
+def writeLayouts(filename, people, roots):
+    outputFiles.writeJson(filename, {
+        "generationLimit": GENERATION_LIMIT,
+        "roots": {root: layoutTree(buildNodes(people, root)) for root in roots},
+    }, streamed=2)
@@ -1,17 +1,35 @@
 import argparse
-import json
+import itertools
+import multiprocessing
 import os
-import re
+import sys
+import time
 from typing import List
 
-from dateutil import parser as date_parser
 from gedcom.element.family import FamilyElement
 from gedcom.element.object import ObjectElement
 from gedcom.parser import Parser
 from gedcom.element.individual import IndividualElement
-import icu
 
+import ancestry
+import batch
+import daemon
+import export
+import gedcomStream
 import gedcomUtils as gu
+import incremental as incrementalBuild
+import layout
+import media
+import parseCache
+import profiling
+import relationships
+
+# How many individuals each worker process extracts at a time
+CHUNK_SIZE = 500
+
+# The index each worker process builds its people against (see initWorker)
+workerIndex = None
+
 
 # Goes through all the elements, sorts them into their appropriate lists
 def generateArrays(gedcomParser):
@@ -33,153 +51,212 @@ def generateArrays(gedcomParser):
     return individuals, objects, families, notes
 
 
-# This is where the magic happens
-def main():
-    print("Running!")
+# Reads the GEDCOM file, and sorts its records into lists of individuals, objects, families and notes
+# With stream, the file is read one record at a time into lightweight records (rather than python-gedcom Elements)
+def readGedcom(filename, stream=False):
+    if stream:
+        return gedcomStream.generateArrays(filename)
 
-    # Parses arguments
-    parser = argparse.ArgumentParser(description="Parse GEDCOM files for web viewing")
-    parser.add_argument("--file", "-f", help="Source GEDCOM file", default="familyTree.ged")
-    args = parser.parse_args()
+    with profiling.stage("parse"):
+        gedcomParser = Parser()
+        gedcomParser.parse_file(filename)
 
-    # Gets our input filename
-    filename = args.file
+    with profiling.stage("generateArrays") as s:
+        arrays = generateArrays(gedcomParser)
+        s.items = sum(len(elements) for elements in arrays)
+    return arrays
 
-    # The folder for the data files
-    dataFolder = "../data/"
 
-    # Data filenames
-    structureOutput = f"{dataFolder}structure.json"
-    detailsOutput = f"{dataFolder}details.json"
-    burialOutput = f"{dataFolder}burials.json"
-    birthdayOutput = f"{dataFolder}birthdays.json"
+# Sets up a worker process with its own index of the families, objects and notes
+def initWorker(objects, families, notes):
+    global workerIndex
+    workerIndex = gu.GedcomIndex([], objects, families, notes)
 
-    # Initialize the structure and details containers
-    structure = []
-    details = {}
-    birthdays = []
-    burials = []
 
-    # Initialize the parser
-    gedcomParser = Parser()
-    gedcomParser.parse_file(filename)
-    # Creates lists of individuals, objects, and families
-    individuals, objects, families, notes = generateArrays(gedcomParser)
+# Builds the people for a chunk of individuals (in a worker process)
+def extractChunk(individuals):
+    return [gu.Person(indiv, workerIndex) for indiv in individuals]
+
+
+# Builds everyone's Person object, and adds them to the index (in file order)
+# With more than one job, the individuals are split into chunks and extracted across a process pool
+#   (the individuals have to be gedcomStream Records, since python-gedcom Elements don't pickle well)
+def extractPeople(index, objects, families, notes, jobs=1):
+    if jobs <= 1:
+        for indiv in index.individuals:
+            index.addPerson(gu.Person(indiv, index))
+        return
+
+    individuals = iter(index.individuals)
+    chunks = iter(lambda: list(itertools.islice(individuals, CHUNK_SIZE)), [])
 
-    # No initial person at first
-    initialPerson = None
+    with multiprocessing.Pool(jobs, initWorker, (objects, families, notes)) as pool:
+        # imap hands the chunks back in order, so we end up with exactly what a single process would make
+        for people in pool.imap(extractChunk, chunks):
+            for person in people:
+                index.addPerson(person)
+
+
+# Builds the whole tree (everyone's Person object, their ancestors, and any split marriages) from the GEDCOM file
+def buildTree(filename, stream=False, jobs=1):
+    # Creates lists of individuals, objects, and families
+    individuals, objects, families, notes = readGedcom(filename, stream or jobs > 1)
+    # Index them all by pointer, so every lookup is a single dict access
+    index = gu.GedcomIndex(individuals, objects, families, notes)
 
     # Create the person objects
-    personObjs = [gu.Person(indiv, families, objects, notes) for indiv in individuals]
-
-    # Now, we do the real work
-    for personObj in personObjs:
-        # Sanity check - do the Ukrainian name genders check out?
-        surname = re.search('/([^/)]+)', personObj.name[0]).group(1)
-
-        if personObj.sex.upper() == "F":
-            # Surname check ("ий")
-            if surname.endswith("ий"):
-                print("{0} should end in 'а', not 'ий'".format(personObj.name[0]))
-        elif personObj.sex.upper() == "M":
-            if surname.endswith("ська"):
-                print("{0} should end in 'ий', not 'а'".format(personObj.name[0]))
-
-        # We check for a common ancestor among all spouses:
-        personObj.handleCommonAncestor(personObjs)
-
-        person = {
-            "id": personObj.id,
-            "name": personObj.name[0],
-            "sex": personObj.sex,
-            "parents": personObj.parents,
-            "spouses": personObj.spouses,
-            "children": personObj.children,
-            "parentsHidden": personObj.parentsHidden,
-            "childrenHidden": personObj.childrenHidden,
-            "birth": personObj.simpleBirthData,
-            "death": personObj.simpleDeathData,
-        }
-
-        if initialPerson is None:
-            initialPerson = person['id']
-
-        detail = {
-            "id": personObj.id,
-            "pics": personObj.pics,
-            "names": personObj.name,
-            "notes": personObj.notes,
-            "events": personObj.birthData +
-                      # We only bother sorting the middle stuff
-                      # Birth, death, and burial order never change (hopefully)
-                      gu.sortEventsByDate(
-                          # Marriage events
-                          personObj.marriageData +
-                          # Divorce events
-                          personObj.divorceData +
-                          # Occupation events
-                          personObj.occupationData
-                      ) +
-                      personObj.deathData +  # Death event
-                      personObj.burialData,  # Burial data
-            "redirects": personObj.redirects,
-            "redirectsTo": personObj.redirectsTo,
-            "ancestors": personObj.ancestors,
-        }
-
-        structure.append(person)
-
-        details[person["id"]] = detail
-
-        # We add the information to the collections - the birthday list and the burial list
-
-        # If birth data exists, and we get rid of the wrapper list, and we have a proper date
-        if personObj.birthData and personObj.birthData[0] and personObj.birthData[0][0]:
-            date = gu.SimpleDate(personObj.birthData[0][0])
-
-            if date.month and date.day:
-                birthdays.append([person["id"], f"{date.month}-{date.day}"])
-
-        # Burial list
-        if personObj.burialData and personObj.burialData[0] and personObj.burialData[0][1]:
-            burialPlace = personObj.burialData[0][1]
-
-            if burialPlace != "":
-                burials.append([person["id"], burialPlace])
-
-    jsonStyling = {"indent": 4, "separators": (',', ':')}
-
-    # Sort the structures and birthday files file
-    # Sorting in ukrainian:
-    collator = icu.Collator.createInstance(icu.Locale('uk_UK.UTF-8'))
-
-    def reverseNameOrder(p):
-        # We split only the first parenthesis
-        nonSurnames, surnames = p["name"].split("/", 1)
-        return surnames + nonSurnames
-
-    structure.sort(key=lambda p: collator.getSortKey(reverseNameOrder(p)))
-    birthdays.sort(key=lambda birthday: date_parser.parse(birthday[1]))
-    burials.sort(key=lambda burial: burial[1])
-
-    if not os.path.exists(dataFolder):
-        os.makedirs(dataFolder)
-
-    # Generate the structure file
-    with open(structureOutput, "w+", encoding="utf8") as f:
-        json.dump(structure, f, **jsonStyling)
-
-    # Generate the details file
-    with open(detailsOutput, "w+", encoding="utf8") as f:
-        json.dump(details, f, **jsonStyling)
-
-    # Generate the birthdays file
-    with open(birthdayOutput, "w+", encoding="utf8") as f:
-        json.dump(birthdays, f, **jsonStyling)
-
-    # Generate the burials file
-    with open(burialOutput, "w+", encoding="utf8") as f:
-        json.dump(burials, f, **jsonStyling)
+    with profiling.stage("people") as s:
+        extractPeople(index, objects, families, notes, jobs)
+        s.items = len(index.personList)
+
+    # Work out everyone's ancestors in one go, before any dummy people get added
+    with profiling.stage("ancestors") as s:
+        ancestors = ancestry.computeAncestors(index)
+        for personId, personAncestors in ancestors.items():
+            index.getPerson(personId).ancestors = personAncestors
+        s.items = sum(len(personAncestors) for personAncestors in ancestors.values())
+
+    # Split up any marriages between people with a common ancestor
+    with profiling.stage("marriages") as s:
+        people = len(index.personList)
+        ancestry.handleIntraFamilyMarriages(index, ancestors)
+        s.items = len(index.personList) - people
+    return index
+
+
+# Converts the given GEDCOM file into the JSON data files in dataFolder
+# With incremental, only the people affected by changes since the last (incremental) run are redone
+# With relationshipRoot (a person's ID), everyone's relationship to them is worked out up front too
+# The trees for the layoutCount most commonly viewed roots are laid out in advance (see layout.py)
+# With withMedia, the pictures (under mediaRoot) are checked, and thumbnailed across mediaWorkers processes
+# With compress, compressed copies of the output files are written too (see outputFiles.publish)
+def convert(filename, dataFolder="../data/", stream=False, jobs=1, incremental=False, outputFormat="json",
+            cacheDir=None, cacheSize=parseCache.DEFAULT_CACHE_SIZE, relationshipRoot=None,
+            layoutCount=layout.DEFAULT_LAYOUTS, withMedia=False, mediaRoot=None, mediaWorkers=1, compress=True):
+    # If this exact file has been converted before, we can skip straight to the output
+    index = None
+    if cacheDir is not None:
+        with profiling.stage("parseCache load"):
+            cacheEntry = parseCache.entryPath(cacheDir, filename)
+            index = parseCache.load(cacheEntry)
+
+    if index is not None:
+        print("Loaded the tree from the parse cache")
+    else:
+        if incremental:
+            with profiling.stage("incremental") as s:
+                index = incrementalBuild.buildTree(filename, incrementalBuild.cachePath(dataFolder))
+                s.items = len(index.personList)
+        else:
+            index = buildTree(filename, stream, jobs)
+
+        if cacheDir is not None:
+            with profiling.stage("parseCache save"):
+                parseCache.save(cacheEntry, index, cacheSize)
+
+    mediaFile = None
+    if withMedia:
+        with profiling.stage("media"):
+            mediaFile = media.buildMedia(index, dataFolder, mediaRoot, mediaWorkers, compress=compress)
+
+    relationshipsFile = None
+    if relationshipRoot is not None:
+        with profiling.stage("relationships"):
+            relationshipsFile = relationships.writeRelationships(index, relationshipRoot, dataFolder, compress)
+
+    output = export.buildOutput(index)
+    export.writeOutput(dataFolder, outputFormat, output, layoutCount=layoutCount, mediaFile=mediaFile,
+                       relationshipsFile=relationshipsFile, compress=compress)
+
+    return len(output.entries)
+
+
+# This is where the magic happens
+def main():
+    print("Running!")
+
+    # Parses arguments
+    parser = argparse.ArgumentParser(description="Parse GEDCOM files for web viewing")
+    parser.add_argument("--file", "-f", help="Source GEDCOM file", default="familyTree.ged")
+    parser.add_argument("--batch", nargs="+", metavar="PATH",
+                        help="Convert many GEDCOM files (or directories of them) without stopping, "
+                             "each into its own folder under --output-dir")
+    parser.add_argument("--output-dir", default="../data/",
+                        help="Where the batch output goes (one folder per tree)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="How many trees to convert at the same time in batch mode")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read the GEDCOM file one record at a time (uses much less memory on large files)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Extract the people across this many processes (reads the file as with --stream)")
+    parser.add_argument("--incremental", "-i", action="store_true",
+                        help="Only redo the people affected by changes since the last incremental run "
+                             "(keeps a cache file next to the data folder)")
+    parser.add_argument("--format", choices=["json", "columnar"], default="json",
+                        help="Write the structure and birthdays as JSON files, "
+                             "or as one compact columnar file (data.bin)")
+    parser.add_argument("--cache-dir",
+                        help="Keep the parsed tree in this directory, and skip parsing if the file hasn't changed")
+    parser.add_argument("--cache-size", type=int, default=parseCache.DEFAULT_CACHE_SIZE // 2 ** 20,
+                        help="The most space (in MB) the cache directory can take up")
+    parser.add_argument("--profile", nargs="?", const="profile.json", metavar="REPORT",
+                        help="Time each stage of the conversion (and count calls to the hot helpers), "
+                             "and write a JSON report (profile.json by default)")
+    parser.add_argument("--profile-stats", metavar="STATS",
+                        help="Also run cProfile, and save its stats to this file (for pstats)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Measure each stage's memory with tracemalloc (more precise, but much slower)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running, and reconvert the file whenever it changes "
+                             "(with a status endpoint on localhost)")
+    parser.add_argument("--port", type=int, default=daemon.DEFAULT_PORT,
+                        help="The port for the --watch status endpoint")
+    parser.add_argument("--relationships", metavar="ROOT",
+                        help="Also write everyone's relationship to this person (by ID, ie. @I1@) "
+                             "to relationships.json")
+    parser.add_argument("--layouts", type=int, default=layout.DEFAULT_LAYOUTS, metavar="N",
+                        help="Lay out the trees of the N most commonly viewed people in advance, "
+                             "so the viewer can skip that (0 for none)")
+    parser.add_argument("--media", action="store_true",
+                        help="Check that all the pictures are there, and make thumbnails of them for the viewer "
+                             "(needs Pillow - missing pictures are listed in mediaReport.json)")
+    parser.add_argument("--media-root",
+                        help="The folder the pictures' paths start from (the folder the data folder is in, by default)")
+    parser.add_argument("--media-workers", type=int, default=os.cpu_count() or 1,
+                        help="How many processes make the thumbnails")
+    parser.add_argument("--no-compress", action="store_true",
+                        help="Don't write compressed (.gz and .br) copies of the output files")
+    args = parser.parse_args()
+
+    options = {"stream": args.stream, "jobs": args.jobs, "incremental": args.incremental, "outputFormat": args.format,
+               "cacheDir": args.cache_dir, "cacheSize": args.cache_size * 2 ** 20,
+               "relationshipRoot": args.relationships, "layoutCount": args.layouts,
+               "withMedia": args.media, "mediaRoot": args.media_root, "mediaWorkers": args.media_workers,
+               "compress": not args.no_compress}
+
+    # Batch mode doesn't wait around at the end (there's no one watching)
+    if args.batch:
+        start = time.perf_counter()
+        results = batch.convertAll(convert, batch.findGedcomFiles(args.batch), args.output_dir, args.workers, options)
+        batch.printSummary(results, time.perf_counter() - start)
+        batch.writeReport(results, args.output_dir)
+        sys.exit(0 if all(result["error"] is None for result in results) else 1)
+
+    if args.watch:
+        # The daemon always keeps the tree in memory, and rebuilds it incrementally (a record at a time),
+        #   so the options for how the tree is first read don't apply
+        if args.jobs > 1 or args.cache_dir is not None:
+            parser.error("--jobs and --cache-dir can't be used with --watch (it keeps the tree in memory instead)")
+        for option in ["stream", "jobs", "incremental", "cacheDir", "cacheSize"]:
+            del options[option]
+        daemon.ConversionDaemon(args.file, **options).run(args.port)
+        return
+
+    if args.profile is not None or args.profile_stats is not None or args.profile_memory:
+        profiling.profile(convert, args.file, reportFile=args.profile, statsFile=args.profile_stats,
+                          traceMemory=args.profile_memory, **options)
+    else:
+        convert(args.file, **options)
 
     # Hang so user can see output before closing
     input("Done!")
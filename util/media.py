@@ -0,0 +1,232 @@
+import hashlib
+import json
+import multiprocessing
+import os
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    # (Pillow is optional - without it, the pictures are still checked, but no thumbnails are made)
+    Image = ImageOps = None
+
+import outputFiles
+import profiling
+
+# The thumbnail sizes (the longest side, in pixels): for the icons on the tree, and for the info window
+THUMBNAIL_SIZES = [64, 320]
+# Where the thumbnails go (in the data folder)
+THUMBNAIL_FOLDER = "thumbnails"
+THUMBNAIL_QUALITY = 85
+
+# Bump this whenever what gets cached (or how it's worked out) changes
+CACHE_VERSION = 1
+
+# How much of a file is hashed at a time
+HASH_CHUNK = 1 << 20
+
+# The EXIF tag that says which way up a picture goes (5 to 8 mean it's on its side)
+ORIENTATION_TAG = 0x0112
+
+
+# The cache file sits next to the data folder, like the incremental one (eg. ../data/ -> ../data.media.cache)
+def cachePath(dataFolder):
+    return os.path.normpath(dataFolder) + ".media.cache"
+
+
+# The pictures sit under the site's root (eg. resources/photos/...), which is the folder the data folder is in
+def defaultRoot(dataFolder):
+    return os.path.dirname(os.path.normpath(dataFolder)) or "."
+
+
+# Finds every picture the tree refers to (the people's, and their families'), each only once
+# Returns the files that are there (with the URLs that refer to each), and the URLs that aren't (with who they're for)
+def findMedia(index, mediaRoot):
+    references = {}
+    for person in index.personList:
+        for url in person.pics:
+            people = references.setdefault(url, [])
+            if person.id not in people:
+                people.append(person.id)
+
+    files = {}
+    missing = {}
+    for url, people in references.items():
+        # (Different URLs can lead to the same file, ie. photos/a/../b.jpg)
+        path = os.path.normpath(os.path.join(mediaRoot, url))
+        if os.path.isfile(path):
+            files.setdefault(path, []).append(url)
+        else:
+            missing[url] = people
+    return files, missing
+
+
+def hashFile(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# The thumbnails are named after the picture's contents, so the same picture (wherever it is) only gets made once
+# Pictures that might be see-through stay PNGs, and everything else is a JPEG
+def thumbnailName(digest, size, transparent):
+    return f"{digest[:20]}-{size}.{'png' if transparent else 'jpg'}"
+
+
+# Hashes a picture, and makes whichever of its thumbnails aren't there yet (this is what each worker runs)
+# Returns the path, and what was found out about the file: its hash, the picture's size, and its thumbnails' names
+#   (by size) - or why it couldn't be read
+def processFile(task):
+    path, thumbnailFolder, sizes = task
+    try:
+        digest = hashFile(path)
+        if Image is None:
+            return path, {"hash": digest, "dimensions": None, "thumbnails": {}}
+
+        with Image.open(path) as image:
+            # (Scans are often saved sideways, with a tag that says which way is up)
+            width, height = image.size
+            if image.getexif().get(ORIENTATION_TAG, 1) in (5, 6, 7, 8):
+                width, height = height, width
+            transparent = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+
+            # (There's no point making a thumbnail that's bigger than the picture)
+            thumbnails = {str(size): thumbnailName(digest, size, transparent)
+                          for size in sorted(sizes, reverse=True) if max(width, height) > size}
+            todo = [(int(size), os.path.join(thumbnailFolder, name)) for size, name in thumbnails.items()
+                    if not os.path.exists(os.path.join(thumbnailFolder, name))]
+
+            if todo:
+                # JPEGs can be decoded at a fraction of their size, which is much quicker for big scans
+                image.draft("RGB", (todo[0][0], todo[0][0]))
+                source = ImageOps.exif_transpose(image)
+                # Biggest first, so each is shrunk from the last one (rather than from the full picture)
+                for size, target in todo:
+                    source.thumbnail((size, size), Image.LANCZOS)
+                    thumbnail = source if transparent else source.convert("RGB")
+                    with outputFiles.atomicOpen(target, "wb") as f:
+                        thumbnail.save(f, "PNG" if transparent else "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+
+        return path, {"hash": digest, "dimensions": [width, height], "thumbnails": thumbnails}
+    except Exception as e:
+        # (A broken picture shouldn't stop the rest - it goes in the report instead)
+        return path, {"error": f"{type(e).__name__}: {e}"}
+
+
+# Loads the cache from the last run (or an empty one, if there isn't a usable one)
+# It holds what was found out about each file (by path), along with its modification time and size when it was
+def loadCache(filename, sizes):
+    try:
+        with open(filename, encoding="utf8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # (Different thumbnail sizes mean everything has to be redone anyway)
+    if cache.get("version") != CACHE_VERSION or cache.get("sizes") != sizes:
+        return {}
+    return cache["files"]
+
+
+def saveCache(filename, files, sizes):
+    outputFiles.writeJson(filename, {"version": CACHE_VERSION, "sizes": sizes, "files": files}, streamed=2)
+
+
+# Whether the cached entry for a file is still good (the file hasn't changed, and all its thumbnails are there)
+# (Files that couldn't be read stay that way until they change)
+def isFresh(entry, stamp, thumbnailFolder):
+    if entry is None or entry["stamp"] != stamp:
+        return False
+    if "error" in entry:
+        return True
+    # (If Pillow's been installed since, the thumbnails need making)
+    if entry["dimensions"] is None and Image is not None:
+        return False
+    return all(os.path.exists(os.path.join(thumbnailFolder, name)) for name in entry["thumbnails"].values())
+
+
+# Checks every picture in the tree, and makes thumbnails of them in the data folder, with up to `workers` processes
+# Only new and changed files are redone (see loadCache)
+# Writes media.json (each picture's size and thumbnails, and which pictures are missing, for the viewer),
+#   and mediaReport.json (which pictures are missing or couldn't be read, and who they're for)
+# Returns media.json's published name (see outputFiles.publish)
+def buildMedia(index, dataFolder, mediaRoot=None, workers=1, sizes=THUMBNAIL_SIZES, compress=True):
+    mediaRoot = mediaRoot if mediaRoot is not None else defaultRoot(dataFolder)
+    thumbnailFolder = os.path.join(dataFolder, THUMBNAIL_FOLDER)
+    os.makedirs(thumbnailFolder, exist_ok=True)
+
+    with profiling.stage("find") as s:
+        files, missing = findMedia(index, mediaRoot)
+        s.items = len(files)
+
+    with profiling.stage("thumbnails") as s:
+        cacheFile = cachePath(dataFolder)
+        cache = loadCache(cacheFile, sizes)
+
+        entries = {}
+        stamps = {}
+        tasks = []
+        for path in files:
+            stat = os.stat(path)
+            stamps[path] = [stat.st_mtime_ns, stat.st_size]
+            if isFresh(cache.get(path), stamps[path], thumbnailFolder):
+                entries[path] = cache[path]
+            else:
+                tasks.append((path, thumbnailFolder, sizes))
+
+        if workers > 1 and len(tasks) > 1:
+            # (chunksize 1, since some pictures take much longer than others)
+            with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+                results = list(pool.imap_unordered(processFile, tasks, chunksize=1))
+        else:
+            results = [processFile(task) for task in tasks]
+
+        for path, entry in results:
+            entries[path] = {"stamp": stamps[path], **entry}
+        s.items = len(tasks)
+
+        # Clear out the thumbnails nothing uses any more
+        used = {name for entry in entries.values() for name in entry.get("thumbnails", {}).values()}
+        for name in os.listdir(thumbnailFolder):
+            if name not in used:
+                os.remove(os.path.join(thumbnailFolder, name))
+
+        saveCache(cacheFile, {path: entries[path] for path in files}, sizes)
+
+    with profiling.stage("manifest"):
+        manifest = {}
+        unreadable = {}
+        for path, urls in files.items():
+            entry = entries[path]
+            if "error" in entry:
+                unreadable.update((url, entry["error"]) for url in urls)
+                continue
+            picture = {"thumbnails": {size: f"{THUMBNAIL_FOLDER}/{name}" for size, name in entry["thumbnails"].items()}}
+            if entry["dimensions"] is not None:
+                picture["width"], picture["height"] = entry["dimensions"]
+            for url in urls:
+                manifest[url] = picture
+
+        outputFiles.writeJson(f"{dataFolder}media.json", {
+            "sizes": sizes,
+            "pictures": manifest,
+            # The viewer doesn't bother asking for these
+            "missing": [*missing, *unreadable],
+        }, streamed=2)
+        mediaFile = outputFiles.publish(dataFolder, "media.json", compress)
+
+        report = {
+            "root": os.path.abspath(mediaRoot),
+            "pictures": len(files),
+            "processed": len(tasks),
+            "missing": missing,
+            "unreadable": unreadable,
+        }
+        outputFiles.writeJson(f"{dataFolder}mediaReport.json", report, streamed=2)
+
+    if Image is None:
+        print("Pillow isn't installed, so no thumbnails were made (pip install Pillow)")
+    if missing or unreadable:
+        print(f"{len(missing)} pictures are missing, and {len(unreadable)} couldn't be read "
+              f"(see {dataFolder}mediaReport.json)")
+    return mediaFile
@@ -0,0 +1,161 @@
+import contextlib
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import re
+import shutil
+from collections.abc import Iterator
+
+try:
+    import brotli
+except ImportError:
+    # (Brotli is optional - without it, only the .gz copies are made)
+    brotli = None
+
+# How the JSON files are formatted
+JSON_STYLING = {"indent": 4, "separators": (',', ':')}
+ENCODER = json.JSONEncoder(**JSON_STYLING)
+
+# How much is buffered before it's written out (in characters)
+WRITE_BUFFER = 1 << 20
+
+# How many items are encoded at a time (see encodeChunks)
+BATCH_SIZE = 1000
+
+# How many hex digits of the content hash go in a published file's name (see publish)
+HASH_LENGTH = 12
+# Published files look like structure.0123456789ab.json (or details/3.0123456789ab.json.gz, etc.)
+HASHED_NAME = re.compile(r"\.[0-9a-f]{%d}\.[a-z]+(\.gz|\.br)?$" % HASH_LENGTH)
+
+# How hard the compressed copies are compressed (the highest levels are several times slower, for very little)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Files smaller than this aren't worth compressing
+COMPRESS_MIN_SIZE = 1024
+
+# How much of a file is read at a time, when hashing and compressing it
+READ_CHUNK = 1 << 20
+
+
+# Opens a file to write to, which only replaces the real one once it's been written in full
+# (So the viewer - or a crash halfway through - never sees a half-written file)
+# The temporary file is named after the process, so two processes writing the same file don't trip each other up
+@contextlib.contextmanager
+def atomicOpen(filename, mode="w", **kwargs):
+    temp = f"{filename}.{os.getpid()}.tmp"
+    try:
+        with open(temp, mode, **kwargs) as f:
+            yield f
+        os.replace(temp, filename)
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+# The JSON text for a value, as a series of chunks
+# Lists, dicts and iterators (eg. generators) fewer than `streamed` levels deep are encoded a batch of items at a time,
+#   so they never have to be in memory all at once - everything deeper is encoded in one go
+def encodeChunks(value, streamed=1, depth=0):
+    indent = "\n" + " " * (4 * depth)
+    if not (depth < streamed and isinstance(value, (list, tuple, dict, Iterator))):
+        text = ENCODER.encode(value)
+        yield text.replace("\n", indent) if depth else text
+        return
+
+    isDict = isinstance(value, dict)
+    items = iter(value.items() if isDict else value)
+    start, end = "{}" if isDict else "[]"
+    empty = True
+
+    if depth + 1 < streamed:
+        # The items are streamed too
+        for item in items:
+            yield (start if empty else ",") + indent + "    "
+            empty = False
+
+            if isDict:
+                key, item = item
+                yield ENCODER.encode(key) + ":"
+            yield from encodeChunks(item, streamed, depth + 1)
+    else:
+        # Each batch is encoded on its own, then spliced in (without its own brackets)
+        while batch := list(itertools.islice(items, BATCH_SIZE)):
+            text = ENCODER.encode(dict(batch) if isDict else batch)[1:-2]
+            yield (start if empty else ",") + (text.replace("\n", indent) if depth else text)
+            empty = False
+
+    yield start + end if empty else indent + end
+
+
+# Writes a value to a JSON file (formatted just like json.dump would) - in chunks, as it's encoded (see encodeChunks)
+def writeJson(filename, value, streamed=1):
+    with atomicOpen(filename, "w", encoding="utf8") as f:
+        buffer = []
+        size = 0
+        for chunk in encodeChunks(value, streamed):
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= WRITE_BUFFER:
+                f.write("".join(buffer))
+                buffer.clear()
+                size = 0
+        f.write("".join(buffer))
+
+
+def fileChunks(filename):
+    with open(filename, "rb") as f:
+        while chunk := f.read(READ_CHUNK):
+            yield chunk
+
+
+# Renames a finished file in the given folder after its contents (eg. structure.json -> structure.0123456789ab.json),
+#   so the viewer (and the browser, and any CDN) can cache it forever - a new version always has a new name
+# With compress, .gz (and .br, if brotli is installed) copies are written next to it, for web servers that can send
+#   those instead (eg. nginx's gzip_static and brotli_static)
+# Returns the new name (relative to the folder, like the name it was given)
+def publish(folder, name, compress=True):
+    filename = os.path.join(folder, name)
+    digest = hashlib.sha1()
+    for chunk in fileChunks(filename):
+        digest.update(chunk)
+
+    stem, extension = os.path.splitext(name)
+    hashedName = f"{stem}.{digest.hexdigest()[:HASH_LENGTH]}{extension}"
+    hashed = os.path.join(folder, hashedName)
+    os.replace(filename, hashed)
+
+    # (If the contents haven't changed since they were last published, the copies are already there)
+    if compress and os.path.getsize(hashed) >= COMPRESS_MIN_SIZE:
+        if not os.path.exists(hashed + ".gz"):
+            with atomicOpen(hashed + ".gz", "wb") as f:
+                # (No name or time in the header, so the same file always compresses the same way)
+                with gzip.GzipFile(filename="", mode="wb", fileobj=f, compresslevel=GZIP_LEVEL, mtime=0) as g:
+                    with open(hashed, "rb") as source:
+                        shutil.copyfileobj(source, g, READ_CHUNK)
+
+        if brotli is not None and not os.path.exists(hashed + ".br"):
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            with atomicOpen(hashed + ".br", "wb") as f:
+                for chunk in fileChunks(hashed):
+                    f.write(compressor.process(chunk))
+                f.write(compressor.finish())
+
+    return hashedName
+
+
+# Removes the published files (and their compressed copies) in the given folders that aren't in `keep`
+#   (names relative to the base folder, as publish gives them)
+def removeStale(baseFolder, subfolders, keep):
+    for subfolder in subfolders:
+        folder = os.path.join(baseFolder, subfolder)
+        if not os.path.isdir(folder):
+            continue
+
+        for name in os.listdir(folder):
+            match = HASHED_NAME.search(name)
+            relative = f"{subfolder}/{name}" if subfolder else name
+            # (A compressed copy goes with the file it's a copy of)
+            if match and relative[:len(relative) - len(match.group(1) or "")] not in keep:
+                os.remove(os.path.join(folder, name))
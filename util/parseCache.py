@@ -0,0 +1,78 @@
+import hashlib
+import marshal
+import os
+
+import gedcomUtils as gu
+
+# Bump this whenever what gets extracted from the GEDCOM file (or how) changes,
+#   so entries written by an older converter are never used
+CONVERTER_VERSION = 4
+
+# How big the cache directory can get before the least recently used entries are removed
+DEFAULT_CACHE_SIZE = 500 * 2 ** 20
+
+
+# Hashes the contents of the GEDCOM file
+def fileHash(filename) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(2 ** 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# The cache entry for a GEDCOM file (its contents, and the converter it was built with)
+# marshal's format can change between Python versions, so that's part of the key too
+def entryPath(cacheDir, filename) -> str:
+    return os.path.join(cacheDir, f"{fileHash(filename)}-v{CONVERTER_VERSION}-m{marshal.version}.cache")
+
+
+# Loads the finished tree from the given cache entry (or None, if there isn't a usable one)
+def load(path):
+    try:
+        with open(path, "rb") as f:
+            states = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    # Mark it as recently used (see evict)
+    os.utime(path)
+
+    index = gu.GedcomIndex([], [], [], [])
+    for state in states:
+        person = gu.Person.__new__(gu.Person)
+        person.__setstate__(state)
+        index.addPerson(person)
+    return index
+
+
+# Saves the finished tree (everyone, in order, with their marriages already split) to the given cache entry
+def save(path, index, maxSize=DEFAULT_CACHE_SIZE):
+    cacheDir = os.path.dirname(path)
+    os.makedirs(cacheDir, exist_ok=True)
+
+    # Write it out to the side first, so an interrupted run can't leave half an entry behind
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(marshal.dumps([person.__getstate__() for person in index.personList]))
+    os.replace(temp, path)
+
+    evict(cacheDir, maxSize, keep=path)
+
+
+# Removes the least recently used entries until the cache fits in the given size
+def evict(cacheDir, maxSize, keep=None):
+    entries = []
+    for name in os.listdir(cacheDir):
+        if name.endswith(".cache"):
+            path = os.path.join(cacheDir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _mtime, size, _path in entries)
+    for _mtime, size, path in sorted(entries):
+        if total <= maxSize:
+            break
+        if path != keep:
+            os.remove(path)
+            total -= size
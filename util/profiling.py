@@ -0,0 +1,266 @@
+import cProfile
+import collections
+import contextlib
+import functools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # (Windows)
+    resource = None
+
+import ancestry
+import gedcomStream
+import gedcomUtils as gu
+
+# The helpers whose calls get counted while profiling (owner, attribute, counter name)
+# They're only wrapped while a profiler is running, so they cost nothing the rest of the time
+HOT_HELPERS = [
+    (gu.GedcomIndex, "getPerson", "getPerson"),
+    (gu.GedcomIndex, "getFamily", "getFamily"),
+    (gu.GedcomIndex, "getObject", "getObject"),
+    (gu.GedcomIndex, "getNote", "getNote"),
+    (gu, "getTag", "getTag"),
+    (gu, "getTags", "getTags"),
+    (gu.SimpleDate, "__init__", "SimpleDate"),
+    (gu, "parseDate", "parseDate"),
+    (ancestry, "mergeParentAncestors", "mergeParentAncestors"),
+    (ancestry, "areAncestorsShared", "areAncestorsShared"),
+    (gedcomStream, "parseLine", "parseLine"),
+]
+
+# The profiler that's running (if any) - stages are only recorded while there is one
+active = None
+
+
+# One stage of the conversion (stages can be nested, eg. "output/sort")
+class Stage:
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        # Wall-clock and CPU time (in seconds)
+        self.wall = 0.0
+        self.cpu = 0.0
+        # The most memory (in bytes) used by the end of the stage (see Profiler)
+        self.peakMemory = 0
+        # How many things (people, records, files...) the stage dealt with, if that makes sense for it
+        self.items = None
+
+    def report(self):
+        return {"name": self.name, "depth": self.depth, "wall": self.wall, "cpu": self.cpu,
+                "peakMemory": self.peakMemory, "items": self.items}
+
+
+# Records how long each stage takes (and how much memory it uses), and how often the hot helpers are called
+# By default, the memory is the process's peak resident size so far (which is free to check)
+# With traceMemory, it's the most Python had allocated during the stage (from tracemalloc),
+#   which is more precise, but makes everything several times slower
+class Profiler:
+    def __init__(self, cprofile=False, traceMemory=False):
+        self.stages = []
+        self.counters = collections.Counter()
+        self.cprofile = cProfile.Profile() if cprofile else None
+        self.traceMemory = traceMemory
+        self.total = Stage("total", 0)
+
+        # The stages that have started, but not finished
+        self.open = []
+        self.originals = []
+        self.startWall = self.startCpu = 0.0
+
+    def start(self):
+        global active
+        active = self
+
+        for owner, attribute, counter in HOT_HELPERS:
+            self.countCalls(owner, attribute, counter)
+
+        if self.traceMemory:
+            tracemalloc.start()
+        self.startWall, self.startCpu = time.perf_counter(), time.process_time()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+    def stop(self):
+        global active
+        if self.cprofile is not None:
+            self.cprofile.disable()
+
+        self.total.wall = time.perf_counter() - self.startWall
+        self.total.cpu = time.process_time() - self.startCpu
+        if self.traceMemory:
+            self.total.peakMemory = max([tracemalloc.get_traced_memory()[1], *(s.peakMemory for s in self.stages)])
+            tracemalloc.stop()
+        else:
+            self.total.peakMemory = peakRss()
+
+        for owner, attribute, original in self.originals:
+            setattr(owner, attribute, original)
+        self.originals = []
+        active = None
+
+    # Swaps the given function for one that counts its calls (see stop, for putting it back)
+    def countCalls(self, owner, attribute, counter):
+        original = getattr(owner, attribute)
+        counters = self.counters
+
+        @functools.wraps(original)
+        def counted(*args, **kwargs):
+            counters[counter] += 1
+            return original(*args, **kwargs)
+
+        self.originals.append((owner, attribute, original))
+        setattr(owner, attribute, counted)
+
+    # Folds the peak memory since the last check into the given stages
+    def updatePeaks(self, stages):
+        peak = tracemalloc.get_traced_memory()[1]
+        for s in stages:
+            s.peakMemory = max(s.peakMemory, peak)
+        tracemalloc.reset_peak()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if self.traceMemory:
+            self.updatePeaks(self.open)
+        s = Stage("/".join([*(o.name for o in self.open), name]), len(self.open))
+        self.stages.append(s)
+        self.open.append(s)
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield s
+        finally:
+            s.wall = time.perf_counter() - wall
+            s.cpu = time.process_time() - cpu
+            if self.traceMemory:
+                self.updatePeaks(self.open)
+            else:
+                s.peakMemory = peakRss()
+            self.open.pop()
+
+    def report(self, filename=None):
+        return {
+            "file": filename,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "memory": "tracemalloc" if self.traceMemory else "maxrss",
+            "total": self.total.report(),
+            "stages": [s.report() for s in self.stages],
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    # Prints a table of the stages, and the call counts
+    def printSummary(self):
+        print(f"\n{'stage':<32} {'wall (s)':>9} {'cpu (s)':>9} {'peak (MB)':>10} {'items':>9}")
+        for s in [*self.stages, self.total]:
+            items = s.items if s.items is not None else "-"
+            peak = f"{s.peakMemory / 2 ** 20:.1f}" if s.peakMemory is not None else "-"
+            name = "  " * s.depth + s.name.rsplit("/", 1)[-1]
+            print(f"{name:<32} {s.wall:>9.3f} {s.cpu:>9.3f} {peak:>10} {items:>9}")
+
+        print(f"\n{'helper':<32} {'calls':>9}")
+        for counter, calls in sorted(self.counters.items()):
+            print(f"{counter:<32} {calls:>9}")
+
+    def writeReport(self, reportFile, filename=None):
+        with open(reportFile, "w+", encoding="utf8") as f:
+            json.dump(self.report(filename), f, indent=4)
+
+    # Saves the cProfile stats (open them with pstats, or snakeviz etc.)
+    def dumpStats(self, statsFile):
+        self.cprofile.dump_stats(statsFile)
+
+
+# The peak resident size of this process so far, in bytes (or None, where that can't be found out)
+def peakRss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # (It's in bytes on macOS, and kilobytes everywhere else)
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Records the given stage with the running profiler (or does nothing, if there isn't one)
+# Usage: with profiling.stage("people") as s: ... (and s.items = ..., if there's a count to go with it)
+@contextlib.contextmanager
+def stage(name):
+    if active is None:
+        yield Stage(name, 0)
+        return
+
+    with active.stage(name) as s:
+        yield s
+
+
+# Profiles the given function call, and returns what it returned
+def profile(function, *args, reportFile=None, statsFile=None, traceMemory=False, **kwargs):
+    profiler = Profiler(cprofile=statsFile is not None, traceMemory=traceMemory)
+    profiler.start()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        profiler.stop()
+
+    profiler.printSummary()
+    if reportFile is not None:
+        profiler.writeReport(reportFile, args[0] if args else None)
+        print(f"\nProfile written to {reportFile}")
+    if statsFile is not None:
+        profiler.dumpStats(statsFile)
+        print(f"cProfile stats written to {statsFile}")
+    return result
+
+
+# Compares two reports stage by stage, and returns the stages (and helpers) that got slower (or busier)
+#   by more than the threshold (eg. 0.1 for 10%)
+def compareReports(baseline, current, threshold=0.1):
+    regressions = []
+    before = {s["name"]: s for s in [*baseline["stages"], baseline["total"]]}
+
+    print(f"{'stage':<32} {'before (s)':>10} {'after (s)':>10} {'change':>8}")
+    for s in [*current["stages"], current["total"]]:
+        old = before.get(s["name"])
+        if old is None:
+            continue
+
+        change = (s["wall"] - old["wall"]) / old["wall"] if old["wall"] > 0 else 0.0
+        # (Very short stages are too noisy to judge)
+        regressed = change > threshold and s["wall"] - old["wall"] > 0.01
+        print(f"{s['name']:<32} {old['wall']:>10.3f} {s['wall']:>10.3f} {change:>+8.0%}{'  <-' if regressed else ''}")
+        if regressed:
+            regressions.append(s["name"])
+
+    # Call counts don't depend on the machine, so any real increase is worth a look
+    for counter, calls in current["counters"].items():
+        old = baseline["counters"].get(counter)
+        if old and (calls - old) / old > threshold:
+            print(f"{counter} calls went from {old} to {calls}")
+            regressions.append(counter)
+
+    return regressions
+
+
+# Usage: profiling.py baseline.json current.json [--threshold 0.1]
+# Exits with 1 if anything regressed (so it can be used in a script)
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare two --profile reports")
+    parser.add_argument("baseline", help="The report to compare against")
+    parser.add_argument("current", help="The new report")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="How much slower (as a fraction) a stage can get before it counts as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf8") as f:
+        baselineReport = json.load(f)
+    with open(args.current, encoding="utf8") as f:
+        currentReport = json.load(f)
+
+    sys.exit(1 if compareReports(baselineReport, currentReport, args.threshold) else 0)
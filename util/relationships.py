@@ -0,0 +1,301 @@
+import argparse
+import os
+from typing import Dict, List, Optional
+
+import outputFiles
+
+# Ordinals for the cousin degrees (anything past these is written "11th", "12th", ...)
+ORDINALS = ["", "1st", "2nd", "3rd", "4th", "5th", "6th", "7th", "8th", "9th", "10th"]
+
+# What someone is called, by their sex (and "" for when it isn't known)
+TERMS = {
+    "parent": {"M": "father", "F": "mother", "": "parent"},
+    "child": {"M": "son", "F": "daughter", "": "child"},
+    "grandparent": {"M": "grandfather", "F": "grandmother", "": "grandparent"},
+    "grandchild": {"M": "grandson", "F": "granddaughter", "": "grandchild"},
+    "sibling": {"M": "brother", "F": "sister", "": "sibling"},
+    "auntUncle": {"M": "uncle", "F": "aunt", "": "aunt/uncle"},
+    "nieceNephew": {"M": "nephew", "F": "niece", "": "niece/nephew"},
+    "spouse": {"M": "husband", "F": "wife", "": "spouse"},
+}
+
+
+# How two people are related: how many generations up each of them is to their nearest common ancestor
+#   (either of them can be the common ancestor themselves, ie. father and son - the father is 0 up, the son 1)
+# Half relatives only share one of the common ancestors at that level (ie. half-siblings share one parent)
+#   - it only applies when neither of them is the common ancestor
+# In-laws are related through a spouse (theirs, or a relative's), and a spouse is an in-law 0 generations up
+class Kinship:
+    __slots__ = ("ancestor", "up1", "up2", "half", "inLaw")
+
+    def __init__(self, ancestor, up1, up2, half=False, inLaw=False):
+        self.ancestor = ancestor
+        self.up1 = up1
+        self.up2 = up2
+        self.half = half
+        self.inLaw = inLaw
+
+    # How this looks in the relationship table (see writeRelationshipTable)
+    def toList(self):
+        return [self.ancestor, self.up1, self.up2, self.half, self.inLaw]
+
+    # What the second person is to the first (ie. "mother", "2nd cousin once removed"), given the second's sex
+    def describe(self, sex=""):
+        sex = sex.upper() if sex.upper() in ["M", "F"] else ""
+        up1, up2 = self.up1, self.up2
+
+        if up1 == 0 and up2 == 0:
+            return TERMS["spouse"][sex] if self.inLaw else "self"
+
+        if up1 == 0 or up2 == 0:
+            # One is the other's ancestor
+            generations = up1 or up2
+            kind = "parent" if up1 else "child"
+            term = TERMS[kind][sex] if generations == 1 else TERMS[f"grand{kind}"][sex]
+            term = "great-" * max(0, generations - 2) + term
+        elif up1 == 1 and up2 == 1:
+            term = TERMS["sibling"][sex]
+        elif up2 == 1:
+            # The second is a sibling of one of the first's ancestors
+            term = "great-" * (up1 - 2) + TERMS["auntUncle"][sex]
+        elif up1 == 1:
+            # The second is descended from one of the first's siblings
+            term = "great-" * (up2 - 2) + TERMS["nieceNephew"][sex]
+        else:
+            degree = min(up1, up2) - 1
+            term = f"{ORDINALS[degree] if degree < len(ORDINALS) else f'{degree}th'} cousin"
+            removed = abs(up1 - up2)
+            if removed:
+                term += " " + {1: "once", 2: "twice"}.get(removed, f"{removed} times") + " removed"
+
+        if self.half:
+            term = "half-" + term
+        return term + "-in-law" if self.inLaw else term
+
+
+# Answers how people in the tree are related, from the parents and spouses in the GedcomIndex
+# People are numbered in the order they're in the index, and dummy people (see Person.splitMarriage) stand in for
+#   someone else, so they're numbered as that person (the same way the viewer's Pedigree does it, see pedigree.ts)
+class RelationshipEngine:
+    def __init__(self, index):
+        people = [person for person in index.personList if not person.redirects]
+        self.ids: List[str] = [person.id for person in people]
+        self.sexes: List[str] = [person.sex for person in people]
+        self.numbers: Dict[str, int] = {personId: i for i, personId in enumerate(self.ids)}
+
+        # Dummy people share the number of whoever they redirect to
+        for person in index.personList:
+            if person.redirects and person.redirectsTo in self.numbers:
+                self.numbers[person.id] = self.numbers[person.redirectsTo]
+
+        self.parents: List[List[int]] = [[] for _ in people]
+        self.children: List[List[int]] = [[] for _ in people]
+        self.spouses: List[List[int]] = [[] for _ in people]
+
+        for person in index.personList:
+            number = self.numbers.get(person.id)
+            if number is None:
+                continue
+
+            for parent in person.parents:
+                parentNumber = self.numbers.get(parent)
+                if parentNumber is not None and parentNumber not in self.parents[number]:
+                    self.parents[number].append(parentNumber)
+                    self.children[parentNumber].append(number)
+
+            for spouse in person.spouses:
+                spouseNumber = self.numbers.get(spouse)
+                if spouseNumber is not None and spouseNumber != number and spouseNumber not in self.spouses[number]:
+                    self.spouses[number].append(spouseNumber)
+
+    # How many generations up each of the given person's ancestors is (taking the shortest path)
+    # The person themselves is included, at 0, and ancestors are in the order they're reached (nearest first)
+    def distances(self, number) -> Dict[int, int]:
+        # Breadth-first, so the first time we reach someone is by the shortest path
+        result = {number: 0}
+        queue = [number]
+        for person in queue:
+            generation = result[person] + 1
+            for parent in self.parents[person]:
+                if parent not in result:
+                    result[parent] = generation
+                    queue.append(parent)
+        return result
+
+    # How two people are related by blood (or None, if they aren't)
+    def bloodKinship(self, number1, number2) -> Optional[Kinship]:
+        distances1 = self.distances(number1)
+        distances2 = self.distances(number2)
+
+        # The nearest common ancestor (ties go to whoever's nearest the first person, as in the viewer)
+        best = None
+        for ancestor, up1 in distances1.items():
+            up2 = distances2.get(ancestor)
+            if up2 is not None and (best is None or up1 + up2 < best[1] + best[2]):
+                best = (ancestor, up1, up2)
+
+        if best is None:
+            return None
+
+        ancestor, up1, up2 = best
+        # Full relatives share (at least) two ancestors at that level, ie. both parents
+        shared = sum(1 for a, up in distances1.items() if up == up1 and distances2.get(a) == up2)
+        return Kinship(self.ids[ancestor], up1, up2, half=shared < 2 and up1 > 0 and up2 > 0)
+
+    # How two people (by ID) are related, or None if they aren't (or either isn't in the tree)
+    # Blood relatives come first, then spouses, then relatives by marriage (through either person's spouse)
+    def kinship(self, id1, id2) -> Optional[Kinship]:
+        number1 = self.numbers.get(id1)
+        number2 = self.numbers.get(id2)
+        if number1 is None or number2 is None:
+            return None
+
+        blood = self.bloodKinship(number1, number2)
+        if blood is not None:
+            return blood
+
+        if number2 in self.spouses[number1]:
+            return Kinship(None, 0, 0, inLaw=True)
+
+        # The nearest relative by marriage: a spouse's relative, or a relative's spouse
+        best = None
+        candidates = [(spouse, number2) for spouse in self.spouses[number1]]
+        candidates += [(number1, spouse) for spouse in self.spouses[number2]]
+        for person1, person2 in candidates:
+            k = self.bloodKinship(person1, person2)
+            if k is not None and (best is None or k.up1 + k.up2 < best.up1 + best.up2):
+                best = k
+
+        if best is not None:
+            best.inLaw = True
+        return best
+
+    # What the second person is to the first, in words (ie. "2nd cousin once removed")
+    def describe(self, id1, id2) -> Optional[str]:
+        k = self.kinship(id1, id2)
+        if k is None:
+            return None
+        return k.describe(self.sexes[self.numbers[id2]])
+
+    # How everyone related to the given person is related to them by blood, by number (see bloodKinship)
+    # Everyone is done in one pass down from the root's ancestors, in order of how far away they are
+    def bloodTable(self, root) -> Dict[int, Kinship]:
+        rootDistances = self.distances(root)
+        # (Ties go to whoever's nearest the root, as in bloodKinship)
+        order = {ancestor: i for i, ancestor in enumerate(rootDistances)}
+
+        # The best way found to reach each person so far: generations in total, generations up from the root,
+        #   and the common ancestors it goes through
+        found = {}
+        buckets = {}
+        for ancestor, up in rootDistances.items():
+            found[ancestor] = (up, up, {ancestor})
+            buckets.setdefault(up, []).append(ancestor)
+
+        total = 0
+        while buckets:
+            for person in buckets.pop(total, ()):
+                personTotal, up, ancestors = found[person]
+                if personTotal != total:
+                    # (There turned out to be a nearer way to them)
+                    continue
+
+                for child in self.children[person]:
+                    best = found.get(child)
+                    if best is None or (total + 1, up) < best[:2]:
+                        found[child] = (total + 1, up, set(ancestors))
+                        buckets.setdefault(total + 1, []).append(child)
+                    elif (total + 1, up) == best[:2]:
+                        best[2].update(ancestors)
+            total += 1
+
+        return {person: Kinship(self.ids[min(ancestors, key=order.get)], up, personTotal - up,
+                                half=len(ancestors) < 2 and 0 < up < personTotal)
+                for person, (personTotal, up, ancestors) in found.items()}
+
+    # How everyone related to the given person (by ID) is related to them, as if by kinship(rootId, ...)
+    def table(self, rootId) -> "RelationshipTable":
+        root = self.numbers[rootId]
+        kinships = self.bloodTable(root)
+
+        # Then the spouses, their relatives, and the relatives' spouses (the nearest of them, if there's a choice)
+        inLaws = {spouse: Kinship(None, 0, 0, inLaw=True) for spouse in self.spouses[root]}
+        for spouse in self.spouses[root]:
+            for person, k in self.bloodTable(spouse).items():
+                if person not in inLaws or k.up1 + k.up2 < inLaws[person].up1 + inLaws[person].up2:
+                    inLaws[person] = k
+        for relative, k in kinships.items():
+            for spouse in self.spouses[relative]:
+                if spouse not in inLaws or k.up1 + k.up2 < inLaws[spouse].up1 + inLaws[spouse].up2:
+                    inLaws[spouse] = Kinship(k.ancestor, k.up1, k.up2, k.half)
+
+        for person, k in inLaws.items():
+            if person not in kinships:
+                k.inLaw = True
+                kinships[person] = k
+
+        return RelationshipTable(self, rootId, {self.ids[person]: k for person, k in kinships.items()})
+
+
+# Everyone's relationship to one person, worked out up front (see RelationshipEngine.table)
+# Each lookup is a single dict access
+class RelationshipTable:
+    def __init__(self, engine, rootId, kinships):
+        self.engine = engine
+        self.rootId = rootId
+        # Everyone related to the root, by ID (dummy people are looked up as whoever they stand in for)
+        self.kinships: Dict[str, Kinship] = kinships
+
+    # How the given person is related to the root (or None, if they aren't)
+    def kinship(self, personId) -> Optional[Kinship]:
+        number = self.engine.numbers.get(personId)
+        return self.kinships.get(self.engine.ids[number]) if number is not None else None
+
+    # What the given person is to the root, in words
+    def describe(self, personId) -> Optional[str]:
+        k = self.kinship(personId)
+        if k is None:
+            return None
+        return k.describe(self.engine.sexes[self.engine.numbers[personId]])
+
+
+# Writes the table to a JSON file: the root, and everyone related to them, by ID
+#   ([common ancestor, generations up from the root, generations up from them, half, in-law])
+def writeRelationshipTable(filename, table):
+    outputFiles.writeJson(filename, {
+        "root": table.rootId,
+        "people": {personId: k.toList() for personId, k in table.kinships.items()},
+    }, streamed=2)
+
+
+# Works out everyone's relationship to rootId, and writes the table to relationships.json in the data folder
+# Returns its published name (see outputFiles.publish), or None if they aren't in the tree
+def writeRelationships(index, rootId, dataFolder, compress=True) -> Optional[str]:
+    engine = RelationshipEngine(index)
+    if rootId not in engine.numbers:
+        print(f"Can't work out the relationships: {rootId} isn't in the tree")
+        return None
+
+    os.makedirs(dataFolder, exist_ok=True)
+    writeRelationshipTable(os.path.join(dataFolder, "relationships.json"), engine.table(rootId))
+    return outputFiles.publish(dataFolder, "relationships.json", compress)
+
+
+# Usage: relationships.py tree.ged I1 I2 (how I2 is related to I1)
+#    or: relationships.py tree.ged I1 (how everyone is related to I1)
+if __name__ == "__main__":
+    import main
+
+    parser = argparse.ArgumentParser(description="Work out how people in a GEDCOM file are related")
+    parser.add_argument("file", help="The GEDCOM file")
+    parser.add_argument("person", help="The ID of the person to start from (ie. @I1@)")
+    parser.add_argument("other", nargs="?", help="The ID of the other person (everyone, if it's left out)")
+    args = parser.parse_args()
+
+    engine = RelationshipEngine(main.buildTree(args.file))
+    if args.other is not None:
+        print(engine.describe(args.person, args.other) or "Not related")
+    else:
+        relationshipTable = engine.table(args.person)
+        for personId in relationshipTable.kinships:
+            print(f"{personId}\t{relationshipTable.describe(personId)}")
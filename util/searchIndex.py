@@ -0,0 +1,56 @@
+import re
+import unicodedata
+
+# Cyrillic letters, and how they're written in Latin (the Ukrainian national transliteration,
+#   plus the few Russian letters it doesn't cover)
+# Both the names and the search terms are transliterated, so either alphabet finds the same people
+TRANSLITERATION = {
+    "а": "a", "б": "b", "в": "v", "г": "h", "ґ": "g", "д": "d", "е": "e", "є": "ie", "ж": "zh", "з": "z",
+    "и": "y", "і": "i", "ї": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p",
+    "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch",
+    "ь": "", "ю": "iu", "я": "ia", "ё": "e", "ы": "y", "э": "e", "ъ": "",
+    # (Latin letters that don't come apart into a letter and an accent)
+    "ł": "l", "ø": "o", "ß": "ss", "æ": "ae", "œ": "oe",
+}
+
+# Anything that separates the words of a name (spaces, punctuation, apostrophes and quotes)
+# The viewer splits search terms with the same pattern (see SearchIndex in searchIndex.ts)
+SEPARATORS = re.compile(r"[\s!-/:-@\[-`{-~«»‘’“”„]+")
+
+# Accents (once they've been split off their letters)
+ACCENTS = re.compile(r"[\u0300-\u036f]")
+
+
+# Boils a name (or search term) down to the plain lowercase Latin words we index
+def tokenize(text):
+    text = unicodedata.normalize("NFC", text.lower())
+    text = "".join(TRANSLITERATION.get(c, c) for c in text)
+    text = ACCENTS.sub("", unicodedata.normalize("NFKD", text))
+    return [token for token in SEPARATORS.split(text) if token]
+
+
+# All the tokens in a person's names (every name a person has is searchable, not just the one that's displayed)
+def nameTokens(names):
+    return {token for name in names for token in tokenize(name)}
+
+
+# Builds the search index, given everyone's tokens (see nameTokens), in the order they're in the (sorted) structure
+# Each person is referred to by their position in structure.json, and dummy people (whose tokens are None)
+#   are left out entirely
+def buildSearchIndex(tokens):
+    postings = {}
+    for i, personTokens in enumerate(tokens):
+        if personTokens is None:
+            continue
+
+        for token in personTokens:
+            postings.setdefault(token, []).append(i)
+
+    # The viewer compares strings by UTF-16 code units, so sort them the same way (for its binary search)
+    tokens = sorted(postings, key=lambda token: token.encode("utf-16-be"))
+
+    return {
+        "transliteration": TRANSLITERATION,
+        "tokens": tokens,
+        "postings": [postings[token] for token in tokens],
+    }
@@ -0,0 +1,252 @@
+import argparse
+import math
+import random
+
+# Synthetic GEDCOM files, for seeing how the converter scales (see benchmark.py)
+# The same arguments (and seed) always give exactly the same file
+
+GIVEN_NAMES = {
+    "M": ["Ivan", "Petro", "Mykola", "Vasyl", "Stepan", "Andriy", "Taras", "Yosyp", "Mykhailo", "Ostap",
+          "John", "William", "Joseph", "Thomas", "Іван", "Петро", "Богдан", "Олександр"],
+    "F": ["Maria", "Anna", "Olena", "Kateryna", "Nadia", "Oksana", "Iryna", "Sofia", "Halyna", "Lesia",
+          "Mary", "Elizabeth", "Rose", "Margaret", "Марія", "Ганна", "Оксана", "Ярослава"],
+}
+
+# (Latin, Cyrillic) spellings - some people get both, as two names
+SURNAMES = [("Shevchenko", "Шевченко"), ("Kovalenko", "Коваленко"), ("Bondarenko", "Бондаренко"),
+            ("Tkachenko", "Ткаченко"), ("Kravchenko", "Кравченко"), ("Melnyk", "Мельник"), ("Boyko", "Бойко"),
+            ("Koval", "Коваль"), ("Shevchuk", "Шевчук"), ("Polishchuk", "Поліщук"), ("Lysenko", "Лисенко"),
+            ("Marchenko", "Марченко"), ("Savchuk", "Савчук"), ("Rudenko", "Руденко"), ("Moroz", "Мороз"),
+            ("Hnatiuk", "Гнатюк"), ("Kennedy", "Кеннеді"), ("Fitzgerald", "Фіцджеральд")]
+
+PLACES = ["Kyiv, Ukraine", "Lviv, Ukraine", "Ternopil, Ukraine", "Ivano-Frankivsk, Ukraine", "Poltava, Ukraine",
+          "Chernihiv, Ukraine", "Kraków, Poland", "Przemyśl, Poland", "Winnipeg, Manitoba, Canada",
+          "Edmonton, Alberta, Canada", "Chicago, Illinois, USA", "Boston, Massachusetts, USA"]
+
+OCCUPATIONS = ["Farmer", "Teacher", "Priest", "Blacksmith", "Carpenter", "Merchant", "Nurse", "Engineer"]
+
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+
+
+# A random count averaging the given rate (eg. 0.3 -> 0 or 1, 1.5 -> 1 or 2)
+def randomCount(rng, rate):
+    whole = int(rate)
+    return whole + (rng.random() < rate - whole)
+
+
+# A random GEDCOM date in the given year (sometimes just the year, or an approximate one)
+def randomDate(rng, year):
+    kind = rng.random()
+    if kind < 0.15:
+        return str(year)
+    if kind < 0.25:
+        return f"ABT {year}"
+    return f"{rng.randint(1, 28)} {rng.choice(MONTHS)} {year}"
+
+
+# Writes a synthetic GEDCOM file with (about) the given number of people, and returns how many it has
+#   generations: how many generations deep the tree is (by default, it grows with the size)
+#   marriageRate: the chance each person marries
+#   remarriageRate: the chance a married person marries again (their children can come from either marriage)
+#   cousinRate: the chance a person marries a cousin (or someone else in their generation, if they have no cousins),
+#     instead of someone from outside the tree - this is what makes pedigree collapse (and split marriages)
+#   objectsPerPerson, notesPerPerson: how many pictures and notes each person has (on average)
+#   loops: how many people are made their own ancestor (a broken tree the converter has to cope with)
+def writeSyntheticGedcom(filename, size, seed=0, generations=None, marriageRate=0.75, remarriageRate=0.1,
+                         cousinRate=0.02, objectsPerPerson=0.2, notesPerPerson=0.2, loops=0):
+    rng = random.Random(seed)
+    if generations is None:
+        generations = max(2, round(math.log(max(size, 2), 4)))
+
+    # Everyone, as parallel lists (there can be millions of them)
+    sexes, surnames, births, famcs, famses = [], [], [], [], []
+    # Every family: husband, wife, children, and the year they married
+    husbands, wives, children, marriages = [], [], [], []
+
+    def addPerson(sex, surname, year, famc=-1):
+        sexes.append(sex)
+        surnames.append(surname)
+        births.append(year)
+        famcs.append(famc)
+        famses.append(None)
+        return len(sexes) - 1
+
+    def addFamily(person, spouse, year):
+        husband, wife = (person, spouse) if sexes[person] == "M" else (spouse, person)
+        husbands.append(husband)
+        wives.append(wife)
+        children.append([])
+        marriages.append(year)
+
+        family = len(husbands) - 1
+        for p in [husband, wife]:
+            if p != -1:
+                if famses[p] is None:
+                    famses[p] = []
+                famses[p].append(family)
+        return family
+
+    def otherSex(sex):
+        return "F" if sex == "M" else "M"
+
+    def outsider(sex, year):
+        return addPerson(sex, rng.randrange(len(SURNAMES)), year + rng.randint(-5, 5))
+
+    # Marries the given person to someone from outside the tree (and maybe marries them again, later on)
+    def marryOutsider(person):
+        year = births[person] + rng.randint(18, 35)
+        couples = [addFamily(person, outsider(otherSex(sexes[person]), births[person]), year)]
+        if rng.random() < remarriageRate:
+            year += rng.randint(3, 15)
+            couples.append(addFamily(person, outsider(otherSex(sexes[person]), births[person]), year))
+        return couples
+
+    # The families a person's grandparents were married in (cousins share at least one)
+    def grandparentFamilies(person):
+        famc = famcs[person]
+        if famc == -1:
+            return []
+        return [famcs[parent] for parent in [husbands[famc], wives[famc]] if parent != -1 and famcs[parent] != -1]
+
+    perGeneration = size / generations
+
+    # The first generation is all couples, married into the tree
+    couples = []
+    while len(sexes) < perGeneration - 1:
+        husband = outsider("M", 1700)
+        couples.append(addFamily(husband, outsider("F", 1700), 1700 + rng.randint(18, 30)))
+
+    for generation in range(1, generations):
+        target = perGeneration * (generation + 1)
+        newCouples = []
+        # People who'll marry within the tree, grouped by a family their grandparents married in
+        cousins = {}
+
+        while len(sexes) < target and couples:
+            family = rng.choice(couples)
+            father = husbands[family]
+            child = addPerson(rng.choice("MF"), surnames[father] if father != -1 else rng.randrange(len(SURNAMES)),
+                              marriages[family] + rng.randint(1, 20), family)
+            children[family].append(child)
+
+            chance = rng.random()
+            if chance < cousinRate:
+                grandparents = grandparentFamilies(child)
+                cousins.setdefault(grandparents[0] if grandparents else -1, []).append(child)
+            elif chance < marriageRate:
+                newCouples.extend(marryOutsider(child))
+
+        # Pair up the cousins (with someone of the other sex, who isn't their sibling)
+        leftover = []
+        for group in cousins.values():
+            unpaired = []
+            for person in group:
+                partner = next((p for p in unpaired if sexes[p] != sexes[person] and famcs[p] != famcs[person]), None)
+                if partner is None:
+                    unpaired.append(person)
+                else:
+                    unpaired.remove(partner)
+                    newCouples.append(addFamily(person, partner, max(births[person], births[partner]) + 20))
+            leftover.extend(unpaired)
+
+        # Whoever's left marries someone from outside the tree
+        for person in leftover:
+            newCouples.extend(marryOutsider(person))
+
+        couples = newCouples
+
+    # Make some people their own ancestors: someone becomes a parent of their earliest paternal ancestor
+    loopFamilies = set()
+    candidates = [p for p in range(len(sexes)) if famcs[p] != -1]
+    for _ in range(loops if candidates else 0):
+        person = rng.choice(candidates)
+        ancestor = person
+        while famcs[ancestor] != -1 and husbands[famcs[ancestor]] != -1:
+            ancestor = husbands[famcs[ancestor]]
+        if ancestor == person:
+            continue
+
+        family = addFamily(person, -1, births[person] + 25)
+        children[family].append(ancestor)
+        famcs[ancestor] = family
+        loopFamilies.add(family)
+
+    # Write it all out (the details are made up as we go)
+    objects = 0
+    notes = 0
+    with open(filename, "w", encoding="utf8", newline="\n") as f:
+        f.write("0 HEAD\n1 GEDC\n2 VERS 5.5.1\n2 FORM LINEAGE-LINKED\n1 CHAR UTF-8\n")
+
+        for person in range(len(sexes)):
+            sex = sexes[person]
+            latin, cyrillic = SURNAMES[surnames[person]]
+            year = births[person]
+
+            f.write(f"0 @I{person}@ INDI\n1 NAME {rng.choice(GIVEN_NAMES[sex])} /{latin}/\n")
+            if rng.random() < 0.3:
+                f.write(f"1 NAME {rng.choice(GIVEN_NAMES[sex])} /{cyrillic}/\n")
+            f.write(f"1 SEX {sex}\n")
+            f.write(f"1 BIRT\n2 DATE {randomDate(rng, year)}\n2 PLAC {rng.choice(PLACES)}\n")
+
+            if year < 1940 and rng.random() < 0.8:
+                f.write(f"1 DEAT\n2 DATE {randomDate(rng, year + rng.randint(1, 90))}\n")
+                if rng.random() < 0.5:
+                    f.write(f"2 PLAC {rng.choice(PLACES)}\n")
+                if rng.random() < 0.4:
+                    f.write(f"1 BURI\n2 PLAC {rng.choice(PLACES)}\n")
+
+            if rng.random() < 0.3:
+                f.write(f"1 OCCU {rng.choice(OCCUPATIONS)}\n2 DATE {year + rng.randint(18, 40)}\n")
+
+            for _ in range(randomCount(rng, objectsPerPerson)):
+                f.write(f"1 OBJE @O{objects}@\n")
+                objects += 1
+            for _ in range(randomCount(rng, notesPerPerson)):
+                f.write(f"1 NOTE @N{notes}@\n")
+                notes += 1
+
+            if famcs[person] != -1:
+                f.write(f"1 FAMC @F{famcs[person]}@\n")
+            for family in famses[person] or ():
+                f.write(f"1 FAMS @F{family}@\n")
+
+        for family in range(len(husbands)):
+            f.write(f"0 @F{family}@ FAM\n")
+            if husbands[family] != -1:
+                f.write(f"1 HUSB @I{husbands[family]}@\n")
+            if wives[family] != -1:
+                f.write(f"1 WIFE @I{wives[family]}@\n")
+            if family not in loopFamilies:
+                f.write(f"1 MARR\n2 DATE {randomDate(rng, marriages[family])}\n")
+            for child in children[family]:
+                f.write(f"1 CHIL @I{child}@\n")
+
+        for obj in range(objects):
+            f.write(f"0 @O{obj}@ OBJE\n1 FILE photos/synthetic/{obj}.jpg\n1 FORM jpg\n")
+
+        for note in range(notes):
+            f.write(f"0 @N{note}@ NOTE Synthetic note {note}.\n1 CONT It goes on for a second line.\n")
+
+        f.write("0 TRLR\n")
+
+    return len(sexes)
+
+
+# Usage: synthetic.py out.ged --size 10000 [--seed 1 --cousin-rate 0.05 ...]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic GEDCOM file")
+    parser.add_argument("file", help="Where to write it")
+    parser.add_argument("--size", type=int, default=1000, help="About how many people it should have")
+    parser.add_argument("--seed", type=int, default=0, help="The random seed (the same seed gives the same file)")
+    parser.add_argument("--generations", type=int, help="How many generations deep the tree is")
+    parser.add_argument("--marriage-rate", type=float, default=0.75, help="The chance each person marries")
+    parser.add_argument("--remarriage-rate", type=float, default=0.1, help="The chance a married person marries again")
+    parser.add_argument("--cousin-rate", type=float, default=0.02, help="The chance a person marries within the tree")
+    parser.add_argument("--objects", type=float, default=0.2, help="Pictures per person (on average)")
+    parser.add_argument("--notes", type=float, default=0.2, help="Notes per person (on average)")
+    parser.add_argument("--loops", type=int, default=0, help="How many people are made their own ancestor")
+    args = parser.parse_args()
+
+    people = writeSyntheticGedcom(args.file, args.size, args.seed, args.generations, args.marriage_rate,
+                                  args.remarriage_rate, args.cousin_rate, args.objects, args.notes, args.loops)
+    print(f"Wrote {people} people to {args.file}")
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Writes a small GEDCOM file out of people (ID -> (name, sex, birth date)) and families (ID -> (husband, wife, children))
+# Either spouse can be None, for a family that's missing one
+def writeGedcom(filename, people, families):
+    lines = ["0 HEAD", "1 CHAR UTF-8"]
+    for personId, (name, sex, birth) in people.items():
+        lines += [f"0 @{personId}@ INDI", f"1 NAME {name}", f"1 SEX {sex}"]
+        if birth:
+            lines += ["1 BIRT", f"2 DATE {birth}"]
+        for familyId, (husband, wife, children) in families.items():
+            if personId in children:
+                lines.append(f"1 FAMC @{familyId}@")
+            if personId in (husband, wife):
+                lines.append(f"1 FAMS @{familyId}@")
+    for familyId, (husband, wife, children) in families.items():
+        lines.append(f"0 @{familyId}@ FAM")
+        if husband:
+            lines.append(f"1 HUSB @{husband}@")
+        if wife:
+            lines.append(f"1 WIFE @{wife}@")
+        lines += [f"1 CHIL @{child}@" for child in children]
+    lines.append("0 TRLR")
+
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return str(filename)
+
+
+# A little tree with a single-parent family: a couple (I1, I2) with a son (I3),
+#   who has a daughter (I4) by an unrecorded mother
+@pytest.fixture
+def singleParentTree(tmp_path):
+    people = {
+        "I1": ("John /Smith/", "M", "1 JAN 1900"),
+        "I2": ("Mary /Jones/", "F", "2 FEB 1902"),
+        "I3": ("Tom /Smith/", "M", "3 MAR 1930"),
+        "I4": ("Ann /Smith/", "F", "4 APR 1960"),
+    }
+    families = {"F1": ("I1", "I2", ["I3"]), "F2": ("I3", None, ["I4"])}
+    return writeGedcom(tmp_path / "singleParent.ged", people, families)
@@ -0,0 +1,61 @@
+import ancestry
+import main
+
+from conftest import writeGedcom
+
+GENERATIONS = 25
+
+
+# Brother and sister marrying, generation after generation: everyone has 2^n paths up to the first couple,
+#   but only two ancestors in each generation above them
+def collapsedPedigree(tmp_path):
+    people = {}
+    families = {}
+    for generation in range(GENERATIONS):
+        people[f"A{generation}"] = (f"Adam /Gen{generation}/", "M", f"{1000 + 20 * generation}")
+        people[f"B{generation}"] = (f"Beth /Gen{generation}/", "F", f"{1000 + 20 * generation}")
+        if generation:
+            parents = (f"A{generation - 1}", f"B{generation - 1}")
+            families[f"F{generation}"] = (*parents, [f"A{generation}", f"B{generation}"])
+    return writeGedcom(tmp_path / "collapsed.ged", people, families)
+
+
+def expectedAncestors(generation):
+    return {f"@{side}{above}@": generation - above for side in "AB" for above in range(generation)}
+
+
+def test_collapsedPedigreeListsEachAncestorOnce(tmp_path):
+    index = main.buildTree(collapsedPedigree(tmp_path))
+
+    for generation in range(GENERATIONS):
+        personAncestors = index.getPerson(f"@A{generation}@").ancestors
+        assert len(personAncestors) == 2 * generation
+        # Each ancestor is at their nearest generation
+        assert dict(personAncestors) == expectedAncestors(generation)
+
+
+def test_collapsedPedigreeKeepsParentsFirst(tmp_path):
+    index = main.buildTree(collapsedPedigree(tmp_path))
+    personAncestors = index.getPerson(f"@B{GENERATIONS - 1}@").ancestors
+    father, mother = f"@A{GENERATIONS - 2}@", f"@B{GENERATIONS - 2}@"
+    # Depth-first: the father, then all of his ancestors, then the mother (whose ancestors were all seen already)
+    assert personAncestors[:2] == [(father, 1), (f"@A{GENERATIONS - 3}@", 2)]
+    assert personAncestors[1 + len(index.getPerson(father).ancestors):] == [(mother, 1)]
+
+
+def test_collapsedPedigreeSetsMatchLists(tmp_path):
+    index = main.buildTree(collapsedPedigree(tmp_path))
+    ancestors = ancestry.computeAncestors(index)
+    numbers, sets = ancestry.ancestorSets(ancestors)
+    lazySets = ancestry.LazyAncestorSets(ancestors)
+
+    for personId, personAncestors in ancestors.items():
+        assert list(sets[personId]) == sorted(numbers[ancestor] for ancestor, _i in personAncestors)
+        assert lazySets.get(personId) == {ancestor for ancestor, _i in personAncestors}
+
+
+def test_collapsedPedigreeMarriagesAreSplit(tmp_path):
+    index = main.buildTree(collapsedPedigree(tmp_path))
+    marriages, _verdicts = ancestry.findIntraFamilyMarriages(index, ancestry.computeAncestors(index))
+    # The split marriages are between the dummy copies now, so there's nothing left to split
+    assert marriages == []
@@ -0,0 +1,52 @@
+import json
+import os
+
+import columnar
+import export
+import main
+
+
+def readJsonTables(dataFolder):
+    files = export.readManifest(os.path.join(dataFolder, "manifest.json"))["files"]
+    tables = []
+    for name in ["structure", "birthdays"]:
+        with open(os.path.join(dataFolder, files[name]), encoding="utf8") as f:
+            tables.append(json.load(f))
+    return tables
+
+
+def readColumnarTables(dataFolder):
+    files = export.readManifest(os.path.join(dataFolder, "manifest.json"))["files"]
+    return list(columnar.readColumnar(os.path.join(dataFolder, files["data"])))
+
+
+def test_columnarRoundTripMatchesJson(tmp_path, singleParentTree):
+    main.convert(singleParentTree, f"{tmp_path}/json/", compress=False)
+    main.convert(singleParentTree, f"{tmp_path}/columnar/", outputFormat="columnar", compress=False)
+
+    structure, birthdays = readColumnarTables(f"{tmp_path}/columnar/")
+    assert [structure, birthdays] == readJsonTables(f"{tmp_path}/json/")
+
+
+def test_singleParentFamilyHasNoMissingSpouse(tmp_path, singleParentTree):
+    main.convert(singleParentTree, f"{tmp_path}/columnar/", outputFormat="columnar", compress=False)
+    structure, _birthdays = readColumnarTables(f"{tmp_path}/columnar/")
+    people = {p["id"]: p for p in structure}
+
+    assert people["@I3@"]["spouses"] == []
+    assert people["@I3@"]["children"] == ["@I4@"]
+    assert people["@I4@"]["parents"] == ["@I3@"]
+    assert people["@I1@"]["spouses"] == ["@I2@"]
+
+
+def test_stringsSurviveRoundTrip(tmp_path):
+    structure = [{
+        "id": "@I1@", "name": "Zoë 𝔊ödel", "sex": "F", "parents": [], "spouses": [], "children": ["@I2@"],
+        "parentsHidden": False, "childrenHidden": True, "birth": ["1900", "Kraków"], "death": ["", ""],
+        "redirects": False, "redirectsTo": "", "pic": "", "hasNotes": True,
+    }]
+    birthdays = [["@I1@", "1900"]]
+    filename = str(tmp_path / "data.bin")
+
+    columnar.writeColumnar(filename, structure, birthdays)
+    assert columnar.readColumnar(filename) == (structure, birthdays)
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+import daemon
+import export
+import main
+
+
+def readManifest(dataFolder):
+    return export.readManifest(os.path.join(dataFolder, "manifest.json"))
+
+
+def test_rebuildUsesTheOutputOptions(tmp_path, singleParentTree):
+    dataFolder = f"{tmp_path}/data/"
+    conversionDaemon = daemon.ConversionDaemon(singleParentTree, dataFolder, outputFormat="columnar",
+                                               relationshipRoot="@I4@", layoutCount=0, compress=False)
+    status = conversionDaemon.rebuild()
+
+    assert status["error"] is None
+    files = readManifest(dataFolder)["files"]
+    assert "data" in files and "structure" not in files
+    assert "layouts" not in files
+    assert os.path.exists(os.path.join(dataFolder, files["relationships"]))
+    assert not any(name.endswith(".gz") for name in os.listdir(dataFolder))
+
+
+def test_rebuildCompresses(tmp_path, singleParentTree):
+    dataFolder = f"{tmp_path}/data/"
+    daemon.ConversionDaemon(singleParentTree, dataFolder, layoutCount=1).rebuild()
+
+    files = readManifest(dataFolder)["files"]
+    assert "layouts" in files
+    assert os.path.exists(os.path.join(dataFolder, files["structure"] + ".gz"))
+
+
+@pytest.mark.parametrize("flags", [["--jobs", "2"], ["--cache-dir", "cache"]])
+def test_watchRejectsBuildOptions(monkeypatch, flags):
+    monkeypatch.setattr(sys, "argv", ["main.py", "--watch", *flags])
+    with pytest.raises(SystemExit):
+        main.main()
@@ -0,0 +1,71 @@
+import pytest
+
+from gedcomUtils import SimpleDate, parseDate, parseOddDate, sortEventsByDate
+
+# Dates the old (dateutil-only) parser took, which the hand-written one has to read the same way
+OLD_DATES = [
+    "1 JAN 1900",
+    "31 DEC 1899",
+    "29 FEB 1904",
+    "JAN 1900",
+    "1900",
+    "ABT 1900",
+    "ABT 3 MAR 1850",
+    "ABT MAR 1850",
+    "12 feb 1890",
+    "abt 12 feb 1890",
+    " 1  JAN   1900 ",
+    "1900-3-4",
+    "1900-03-04",
+    "1900-12",
+    "",
+]
+
+
+@pytest.mark.parametrize("date", OLD_DATES)
+def test_parseDateMatchesOldParser(date):
+    assert parseDate(date) == parseOddDate(date)
+
+
+@pytest.mark.parametrize("date, expected", [
+    ("1 JAN 1900", "1900-1-1"),
+    ("JAN 1900", "1900-1"),
+    ("ABT 3 MAR 1850", "ABT 1850-3-3"),
+    ("1900-03-04", "1900-3-4"),
+    ("", ""),
+])
+def test_toStringOfOldDates(date, expected):
+    assert SimpleDate(date).toString() == expected
+
+
+@pytest.mark.parametrize("date, expected", [
+    ("BEF 1900", ("BEF", 1900, None, None, None)),
+    ("AFT 2 JAN 1900", ("AFT", 1900, 1, 2, None)),
+    ("EST 1900", ("ABT", 1900, None, None, None)),
+    ("CAL MAY 1452", ("ABT", 1452, 5, None, None)),
+    ("INT MAY 1452 (MAY 1452, OR JULY 1451)", ("ABT", 1452, 5, None, None)),
+    ("BET 1900 AND 1910", ("BET", 1900, None, None, "1910")),
+    ("BET 1 JAN 1900 AND 2 FEB 1910", ("BET", 1900, 1, 1, "2 FEB 1910")),
+])
+def test_parseDateQualifiers(date, expected):
+    assert parseDate(date) == expected
+
+
+def test_toStringOfRanges():
+    assert SimpleDate("BET 1 JAN 1900 AND FEB 1910").toString() == "BET 1900-1-1 AND 1910-2"
+    assert SimpleDate("BEF 1900").toString() == "BEF 1900"
+
+
+def test_oddDatesFallBackToDateutil():
+    assert parseDate("January 5, 1900") == ("", 1900, 1, 5, None)
+
+
+def test_invalidDatesAreNotParsedByHand():
+    # Not a real date, so it goes through to dateutil (which turns it down, as it always has)
+    with pytest.raises(ValueError):
+        parseDate("30 FEB 1900")
+
+
+def test_sortEventsByDate():
+    events = [("", "no date"), ("1900", "year"), ("ABT 1 JAN 1899", "about"), ("FEB 1900", "month")]
+    assert [event[1] for event in sortEventsByDate(events)] == ["about", "year", "month", "no date"]
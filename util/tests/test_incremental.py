@@ -0,0 +1,62 @@
+import os
+import shutil
+
+import pytest
+
+import export
+import main
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples", "example2.ged")
+
+
+# Edits the example tree: a new birth date and name, and a child taken out of their parents' family
+def editTree(filename):
+    with open(filename, encoding="utf8") as f:
+        contents = f.read()
+    for old, new in [("2 DATE 20 FEB 1920", "2 DATE 21 FEB 1921"),
+                     ("1 NAME Kathleen Angus /Kennedy/", "1 NAME Kathleen /Kennedy/"),
+                     ("1 CHIL @I1@\n", ""),
+                     ("1 FAMC @F1@\n", "")]:
+        assert old in contents
+        contents = contents.replace(old, new, 1)
+    with open(filename, "w", encoding="utf8") as f:
+        f.write(contents)
+
+
+# Everything a conversion left in its data folder (the manifest, and what's in every file it points to)
+def readOutput(dataFolder):
+    manifest = export.readManifest(os.path.join(dataFolder, "manifest.json"))
+    contents = {}
+    for name in export.manifestFiles(manifest):
+        with open(os.path.join(dataFolder, name), "rb") as f:
+            contents[name] = f.read()
+    return manifest, contents
+
+
+@pytest.mark.parametrize("outputFormat", ["json", "columnar"])
+def test_incrementalRebuildMatchesFullRebuild(tmp_path, outputFormat):
+    tree = str(tmp_path / "tree.ged")
+    shutil.copy(EXAMPLE, tree)
+    incrementalFolder = f"{tmp_path}/incremental/"
+    fullFolder = f"{tmp_path}/full/"
+
+    main.convert(tree, incrementalFolder, incremental=True, outputFormat=outputFormat, compress=False)
+    editTree(tree)
+    main.convert(tree, incrementalFolder, incremental=True, outputFormat=outputFormat, compress=False)
+    main.convert(tree, fullFolder, outputFormat=outputFormat, compress=False)
+
+    incrementalManifest, incrementalContents = readOutput(incrementalFolder)
+    fullManifest, fullContents = readOutput(fullFolder)
+    assert incrementalManifest == fullManifest
+    assert incrementalContents == fullContents
+
+
+def test_unchangedIncrementalRebuildMatchesFullRebuild(tmp_path):
+    tree = str(tmp_path / "tree.ged")
+    shutil.copy(EXAMPLE, tree)
+
+    main.convert(tree, f"{tmp_path}/incremental/", incremental=True, compress=False)
+    main.convert(tree, f"{tmp_path}/incremental/", incremental=True, compress=False)
+    main.convert(tree, f"{tmp_path}/full/", compress=False)
+
+    assert readOutput(f"{tmp_path}/incremental/") == readOutput(f"{tmp_path}/full/")
@@ -0,0 +1,41 @@
+import json
+import os
+
+import export
+import layout
+import main
+
+
+def readPeople(filename):
+    return {person.id: person for person in main.buildTree(filename).personList}
+
+
+def test_singleParentNode(singleParentTree):
+    people = readPeople(singleParentTree)
+    root = layout.buildNodes(people, "@I3@")
+
+    assert root.ids == ["@I3@"]
+    assert [node.ids for node in root.ancestors] == [["@I1@", "@I2@"]]
+    assert [node.ids for node in root.descendents] == [["@I4@"]]
+    assert root.width == layout.personWidth(people["@I3@"])
+
+
+def test_singleParentLayout(singleParentTree):
+    people = readPeople(singleParentTree)
+    positions = layout.layoutTree(layout.buildNodes(people, "@I1@"))
+
+    assert set(positions) == {"@I1@", "@I3@", "@I4@"}
+    # A single child sits right under their parents
+    assert positions["@I3@"] == positions["@I1@"]
+    assert positions["@I4@"] == positions["@I3@"]
+
+
+def test_layoutsAreWritten(tmp_path, singleParentTree):
+    dataFolder = f"{tmp_path}/data/"
+    main.convert(singleParentTree, dataFolder, layoutCount=10, compress=False)
+
+    name = export.readManifest(os.path.join(dataFolder, "manifest.json"))["files"]["layouts"]
+    with open(os.path.join(dataFolder, name), encoding="utf8") as f:
+        layouts = json.load(f)
+    # (The viewer starts on the first person, whose tree takes in everyone below them)
+    assert set(layouts["roots"]["@I1@"]) == {"@I1@", "@I3@", "@I4@"}
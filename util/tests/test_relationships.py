@@ -0,0 +1,46 @@
+import json
+import os
+
+import export
+import main
+import relationships
+
+
+def readManifest(dataFolder):
+    return export.readManifest(os.path.join(dataFolder, "manifest.json"))
+
+
+def test_relationshipTableIsPublished(tmp_path, singleParentTree):
+    dataFolder = f"{tmp_path}/data/"
+    main.convert(singleParentTree, dataFolder, relationshipRoot="@I4@")
+
+    name = readManifest(dataFolder)["files"]["relationships"]
+    assert name != "relationships.json"
+    assert not os.path.exists(os.path.join(dataFolder, "relationships.json"))
+    with open(os.path.join(dataFolder, name), encoding="utf8") as f:
+        table = json.load(f)
+    assert table["root"] == "@I4@"
+    assert {"@I1@", "@I2@", "@I3@"} <= set(table["people"])
+
+
+def test_relationshipTableLeavesManifestWhenNotAskedFor(tmp_path, singleParentTree):
+    dataFolder = f"{tmp_path}/data/"
+    main.convert(singleParentTree, dataFolder, relationshipRoot="@I4@", compress=False)
+    main.convert(singleParentTree, dataFolder, compress=False)
+    assert "relationships" not in readManifest(dataFolder)["files"]
+
+
+def test_unknownRootWritesNoTable(tmp_path, singleParentTree):
+    dataFolder = f"{tmp_path}/data/"
+    main.convert(singleParentTree, dataFolder, relationshipRoot="@I99@", compress=False)
+    assert "relationships" not in readManifest(dataFolder)["files"]
+
+
+def test_singleParentFamily(singleParentTree):
+    engine = relationships.RelationshipEngine(main.buildTree(singleParentTree))
+
+    assert engine.spouses[engine.numbers["@I3@"]] == []
+    assert engine.describe("@I4@", "@I3@") == "father"
+    assert engine.describe("@I4@", "@I1@") == "grandfather"
+    assert engine.describe("@I3@", "@I2@") == "mother"
+    assert set(engine.table("@I3@").kinships) == {"@I1@", "@I2@", "@I3@", "@I4@"}
@@ -0,0 +1,51 @@
+import pytest
+
+import main
+import treeGraph
+
+from conftest import writeGedcom
+
+
+# A tree whose families are missing a spouse: Tom (I3) has a daughter (I4) by an unrecorded mother,
+#   and Ann (I4) has a son (I5) by an unrecorded father
+@pytest.fixture(params=["gedcom", "json", "columnar"])
+def graph(request, tmp_path):
+    people = {
+        "I1": ("John /Smith/", "M", "1 JAN 1900"),
+        "I2": ("Mary /Jones/", "F", "2 FEB 1902"),
+        "I3": ("Tom /Smith/", "M", "3 MAR 1930"),
+        "I4": ("Ann /Smith/", "F", "4 APR 1960"),
+        "I5": ("Bob /Smith/", "M", "5 MAY 1990"),
+    }
+    families = {"F1": ("I1", "I2", ["I3"]), "F2": ("I3", None, ["I4"]), "F3": (None, "I4", ["I5"])}
+    filename = writeGedcom(tmp_path / "oneSpouse.ged", people, families)
+
+    if request.param == "gedcom":
+        return treeGraph.load(filename)
+    main.convert(filename, f"{tmp_path}/data/", outputFormat=request.param, compress=False)
+    return treeGraph.load(f"{tmp_path}/data/")
+
+
+def test_oneSpouseFamiliesHaveNoSpouse(graph):
+    assert graph.person("@I3@")["spouses"] == []
+    assert graph.person("@I4@")["spouses"] == []
+    assert graph.person("@I1@")["spouses"] == ["@I2@"]
+
+
+def test_oneSpouseFamiliesKeepTheirChildren(graph):
+    assert graph.person("@I4@")["parents"] == ["@I3@"]
+    assert graph.person("@I5@")["parents"] == ["@I4@"]
+    # (Nearest first - the grandparents are the same distance away, so they can come in either order)
+    ancestors = graph.ancestors("@I5@")
+    assert ancestors[:2] == ["@I4@", "@I3@"] and sorted(ancestors[2:]) == ["@I1@", "@I2@"]
+    assert graph.descendants("@I1@") == ["@I3@", "@I4@", "@I5@"]
+
+
+def test_pathThroughOneSpouseFamilies(graph):
+    assert graph.path("@I5@", "@I2@") == ["@I5@", "@I4@", "@I3@", "@I2@"]
+    assert sorted(graph.relatives("@I5@")) == ["@I1@", "@I2@", "@I3@", "@I4@"]
+
+
+def test_find(graph):
+    assert sorted(graph.bySurname("Smith")) == ["@I1@", "@I3@", "@I4@", "@I5@"]
+    assert sorted(graph.find(surname="Smith", bornFrom=1950)) == ["@I4@", "@I5@"]
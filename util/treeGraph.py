@@ -0,0 +1,394 @@
+import argparse
+import bisect
+import functools
+import json
+import os
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+import columnar
+import gedcomUtils as gu
+import main
+
+# The birth year of someone who doesn't have one (the years are kept in an int array)
+NO_YEAR = -2 ** 31
+
+
+# How a surname or place is looked up (so "kyiv" finds "Kyiv")
+def searchKey(text):
+    return " ".join(text.split()).casefold()
+
+
+# Every part of a place, from the whole thing down (eg. "Lychakiv Cemetery, Lviv, Ukraine" -> the whole place,
+#   "Lychakiv Cemetery", "Lviv" and "Ukraine"), so a place can be looked up by any of them
+def placeKeys(place):
+    keys = {searchKey(place)}
+    keys.update(searchKey(part) for part in place.split(","))
+    keys.discard("")
+    return keys
+
+
+# The surname in a GEDCOM name (eg. "Ivan /Shevchenko/" -> "Shevchenko"), the way the index windows have it
+def surnameOf(name):
+    parts = name.split("/")
+    return parts[1].strip() if len(parts) > 1 else ""
+
+
+# The adjacency arrays for the given (from, to) links between `count` nodes:
+#   node i's neighbours are values[starts[i]:starts[i + 1]] (in node order)
+def adjacency(links, count):
+    starts = array("i", [0] * (count + 1))
+    for source, _target in links:
+        starts[source + 1] += 1
+    for i in range(count):
+        starts[i + 1] += starts[i]
+    return starts, array("i", (target for _source, target in sorted(links)))
+
+
+# A converted tree, held in memory for answering queries from other Python code (see loadGedcom and loadData)
+# Everyone is numbered (in the order they're in the structure), and their parents, children and spouses are
+#   adjacency arrays of those numbers, with indexes on their surname, birth year, birth place and burial place
+# Dummy people (see Person.splitMarriage) stand in for someone else, so they're numbered as that person
+#   (as in the RelationshipEngine)
+# The queries take and give people's IDs - the methods ending in Nodes work on the numbers themselves
+class TreeGraph:
+    # Builds the graph from the structure (entries like structure.json's) and the burials ((person ID, place) pairs)
+    def __init__(self, structure: Iterable[dict], burials: Iterable[List[str]]):
+        structure = list(structure)
+        people = [p for p in structure if not p["redirects"]]
+        self.ids: List[str] = [p["id"] for p in people]
+        self.numbers: Dict[str, int] = {personId: i for i, personId in enumerate(self.ids)}
+        for p in structure:
+            if p["redirects"] and p["redirectsTo"] in self.numbers:
+                self.numbers[p["id"]] = self.numbers[p["redirectsTo"]]
+        count = len(people)
+
+        self.names: List[str] = [p["name"] for p in people]
+        self.sexes: List[str] = [p["sex"] for p in people]
+        self.birthYears = array("i", (int(p["birth"][0]) if p["birth"][0] else NO_YEAR for p in people))
+        self.birthPlaces: List[str] = [p["birth"][1] for p in people]
+        self.deathYears = array("i", (int(p["death"][0]) if p["death"][0] else NO_YEAR for p in people))
+        self.burialPlaces: List[str] = [""] * count
+        for personId, place in burials:
+            number = self.numbers.get(personId)
+            if number is not None:
+                self.burialPlaces[number] = place
+
+        # The links go both ways in the GEDCOM file (a child's family, and a parent's children),
+        #   so both are taken, in case only one of them is there
+        parentLinks = set()
+        spouseLinks = set()
+        for p in structure:
+            number = self.numbers.get(p["id"])
+            if number is None:
+                continue
+            for parent in p["parents"]:
+                parentNumber = self.numbers.get(parent)
+                if parentNumber is not None and parentNumber != number:
+                    parentLinks.add((parentNumber, number))
+            for child in p["children"]:
+                childNumber = self.numbers.get(child)
+                if childNumber is not None and childNumber != number:
+                    parentLinks.add((number, childNumber))
+            for spouse in p["spouses"]:
+                spouseNumber = self.numbers.get(spouse)
+                if spouseNumber is not None and spouseNumber != number:
+                    spouseLinks.update([(number, spouseNumber), (spouseNumber, number)])
+
+        self.childStarts, self.childValues = adjacency(parentLinks, count)
+        self.parentStarts, self.parentValues = adjacency([(child, parent) for parent, child in parentLinks], count)
+        self.spouseStarts, self.spouseValues = adjacency(spouseLinks, count)
+
+        # The secondary indexes: everyone with each surname, birth place and burial place (in node order)
+        # Everyone's surname and birth place keys are kept too, for checking them in find
+        #   (each distinct one is only worked out, and stored, once)
+        surnameKey = functools.lru_cache(None)(lambda name: searchKey(surnameOf(name)))
+        placeKey = functools.lru_cache(None)(searchKey)
+        self.surnameKeys: List[str] = [surnameKey(name) for name in self.names]
+        self.birthPlaceKeys: List[str] = [placeKey(place) for place in self.birthPlaces]
+        self.surnameIndex: Dict[str, array] = {}
+        self.birthPlaceIndex: Dict[str, array] = {}
+        self.burialPlaceIndex: Dict[str, array] = {}
+        for number in range(count):
+            if self.surnameKeys[number]:
+                self.surnameIndex.setdefault(self.surnameKeys[number], array("i")).append(number)
+            if self.birthPlaceKeys[number]:
+                self.birthPlaceIndex.setdefault(self.birthPlaceKeys[number], array("i")).append(number)
+            for key in placeKeys(self.burialPlaces[number]):
+                self.burialPlaceIndex.setdefault(key, array("i")).append(number)
+
+        # Everyone with a birth year, sorted by it (and the years themselves, to bisect)
+        self.byBirthYear = array("i", sorted((n for n in range(count) if self.birthYears[n] != NO_YEAR),
+                                             key=self.birthYears.__getitem__))
+        self.sortedBirthYears = array("i", (self.birthYears[n] for n in self.byBirthYear))
+
+    def __len__(self):
+        return len(self.ids)
+
+    # The given person's number (or None, if they aren't in the tree)
+    def node(self, personId) -> Optional[int]:
+        return self.numbers.get(personId)
+
+    # What's known about the given person (or None, if they aren't in the tree)
+    def person(self, personId) -> Optional[dict]:
+        number = self.numbers.get(personId)
+        if number is None:
+            return None
+        return {
+            "id": self.ids[number],
+            "name": self.names[number],
+            "sex": self.sexes[number],
+            "birthYear": self.birthYears[number] if self.birthYears[number] != NO_YEAR else None,
+            "birthPlace": self.birthPlaces[number],
+            "deathYear": self.deathYears[number] if self.deathYears[number] != NO_YEAR else None,
+            "burialPlace": self.burialPlaces[number],
+            "parents": self.toIds(self.neighbours(self.parentStarts, self.parentValues, number)),
+            "spouses": self.toIds(self.neighbours(self.spouseStarts, self.spouseValues, number)),
+            "children": self.toIds(self.neighbours(self.childStarts, self.childValues, number)),
+        }
+
+    def toIds(self, numbers) -> List[str]:
+        ids = self.ids
+        return [ids[number] for number in numbers]
+
+    @staticmethod
+    def neighbours(starts, values, number):
+        return values[starts[number]:starts[number + 1]]
+
+    ####################
+    #### TRAVERSALS ####
+    ####################
+
+    # Breadth-first search from the given nodes, along the given adjacency arrays ((starts, values) pairs),
+    #   up to maxDepth steps away (or as far as it goes)
+    # Returns how many steps away everyone it reached is, nearest first (the starting nodes are 0 away)
+    def bfsNodes(self, starts: Iterable[int], edges, maxDepth=None) -> Dict[int, int]:
+        depths = dict.fromkeys(starts, 0)
+        frontier = list(depths)
+        depth = 0
+        while frontier and (maxDepth is None or depth < maxDepth):
+            depth += 1
+            nextFrontier = []
+            for number in frontier:
+                for edgeStarts, values in edges:
+                    for other in values[edgeStarts[number]:edgeStarts[number + 1]]:
+                        if other not in depths:
+                            depths[other] = depth
+                            nextFrontier.append(other)
+            frontier = nextFrontier
+        return depths
+
+    # Everyone reached from the given person along the given edges (not including them), nearest first
+    def reach(self, personId, edges, maxDepth=None) -> List[str]:
+        number = self.numbers.get(personId)
+        if number is None:
+            return []
+        depths = self.bfsNodes([number], edges, maxDepth)
+        del depths[number]
+        return self.toIds(depths)
+
+    # All the given person's ancestors (up to maxDepth generations up), nearest first
+    def ancestors(self, personId, maxDepth=None) -> List[str]:
+        return self.reach(personId, [(self.parentStarts, self.parentValues)], maxDepth)
+
+    # All the given person's descendants (up to maxDepth generations down), nearest first
+    def descendants(self, personId, maxDepth=None) -> List[str]:
+        return self.reach(personId, [(self.childStarts, self.childValues)], maxDepth)
+
+    # Everyone connected to the given person by any chain of parents, children and spouses
+    #   (up to maxDepth links away), nearest first
+    def relatives(self, personId, maxDepth=None) -> List[str]:
+        return self.reach(personId, self.allEdges(), maxDepth)
+
+    def allEdges(self):
+        return [(self.parentStarts, self.parentValues), (self.childStarts, self.childValues),
+                (self.spouseStarts, self.spouseValues)]
+
+    # The shortest chain of parents, children and spouses from one person to another (both included),
+    #   or None if they aren't connected
+    # It searches from both ends at once, a generation at a time, so it only goes half as deep from either
+    def path(self, id1, id2) -> Optional[List[str]]:
+        start, end = self.numbers.get(id1), self.numbers.get(id2)
+        if start is None or end is None:
+            return None
+        if start == end:
+            return [self.ids[start]]
+
+        edges = self.allEdges()
+        # Who each node was reached from, searching from the start, and from the end
+        forward, backward = {start: None}, {end: None}
+        forwardFrontier, backwardFrontier = [start], [end]
+        while forwardFrontier and backwardFrontier:
+            # (The smaller side goes next)
+            if len(forwardFrontier) <= len(backwardFrontier):
+                forwardFrontier, meeting = self.expand(forwardFrontier, forward, backward, edges)
+            else:
+                backwardFrontier, meeting = self.expand(backwardFrontier, backward, forward, edges)
+
+            if meeting is not None:
+                chain = []
+                number = meeting
+                while number is not None:
+                    chain.append(number)
+                    number = forward[number]
+                chain.reverse()
+                number = backward[meeting]
+                while number is not None:
+                    chain.append(number)
+                    number = backward[number]
+                return self.toIds(chain)
+        return None
+
+    # Takes one step out from the frontier (see path), and returns the next frontier,
+    #   and where it met the other side's search (or None)
+    @staticmethod
+    def expand(frontier, reached, otherReached, edges):
+        nextFrontier = []
+        for number in frontier:
+            for edgeStarts, values in edges:
+                for other in values[edgeStarts[number]:edgeStarts[number + 1]]:
+                    if other not in reached:
+                        reached[other] = number
+                        if other in otherReached:
+                            return nextFrontier, other
+                        nextFrontier.append(other)
+        return nextFrontier, None
+
+    #################
+    #### INDEXES ####
+    #################
+
+    # Everyone with the given surname, in the order they're in the structure
+    def bySurname(self, surname) -> List[str]:
+        return self.toIds(self.surnameIndex.get(searchKey(surname), ()))
+
+    # Everyone born in the given place (the first part of their birth place, as in the viewer), in structure order
+    def bornIn(self, place) -> List[str]:
+        return self.toIds(self.birthPlaceIndex.get(searchKey(place), ()))
+
+    # Everyone buried in the given place (any part of it - the cemetery, the town, the country...),
+    #   in structure order
+    def buriedIn(self, place) -> List[str]:
+        return self.toIds(self.burialPlaceIndex.get(searchKey(place), ()))
+
+    # Everyone born between the given years (inclusive, and either can be left open), by birth year
+    def bornBetween(self, start=None, end=None) -> List[str]:
+        return self.toIds(self.bornBetweenNodes(start, end))
+
+    def bornBetweenNodes(self, start=None, end=None):
+        low = bisect.bisect_left(self.sortedBirthYears, start) if start is not None else 0
+        high = bisect.bisect_right(self.sortedBirthYears, end) if end is not None else len(self.byBirthYear)
+        return self.byBirthYear[low:high]
+
+    # Everyone matching all of the given criteria (eg. find(bornFrom=1850, bornTo=1900, birthPlace="Kyiv")),
+    #   in structure order
+    # The most selective index is looked up, and the rest are checked person by person
+    def find(self, surname=None, bornFrom=None, bornTo=None, birthPlace=None, burialPlace=None) -> List[str]:
+        candidates = []
+        checks = []
+        if surname is not None:
+            key = searchKey(surname)
+            candidates.append(self.surnameIndex.get(key, ()))
+            checks.append(lambda n: self.surnameKeys[n] == key)
+        if birthPlace is not None:
+            birthKey = searchKey(birthPlace)
+            candidates.append(self.birthPlaceIndex.get(birthKey, ()))
+            checks.append(lambda n: self.birthPlaceKeys[n] == birthKey)
+        if burialPlace is not None:
+            burialKey = searchKey(burialPlace)
+            candidates.append(self.burialPlaceIndex.get(burialKey, ()))
+            checks.append(lambda n: burialKey in placeKeys(self.burialPlaces[n]))
+        if bornFrom is not None or bornTo is not None:
+            candidates.append(self.bornBetweenNodes(bornFrom, bornTo))
+            low = bornFrom if bornFrom is not None else NO_YEAR + 1
+            high = bornTo if bornTo is not None else -NO_YEAR - 1
+            checks.append(lambda n: low <= self.birthYears[n] <= high)
+        if not candidates:
+            return list(self.ids)
+
+        # (Each candidate list goes with its own check, which it doesn't need)
+        smallest = min(range(len(candidates)), key=lambda i: len(candidates[i]))
+        rest = checks[:smallest] + checks[smallest + 1:]
+        return self.toIds(sorted(n for n in candidates[smallest] if all(check(n) for check in rest)))
+
+
+# The graph of everyone in a GedcomIndex (see main.buildTree)
+def fromIndex(index) -> TreeGraph:
+    structure = ({
+        "id": person.id,
+        "name": person.name[0] if person.name else "",
+        "sex": person.sex,
+        "parents": person.parents,
+        "spouses": person.spouses,
+        "children": person.children,
+        "birth": person.simpleBirthData,
+        "death": person.simpleDeathData,
+        "redirects": person.redirects,
+        "redirectsTo": person.redirectsTo,
+    } for person in index.personList)
+    burials = ((person.id, person.burialData[0][1]) for person in index.personList
+               if person.burialData and person.burialData[0][1])
+    return TreeGraph(structure, burials)
+
+
+# Reads a GEDCOM file into a graph (with stream, it's read a record at a time - see main.readGedcom)
+def loadGedcom(filename, stream=True, jobs=1) -> TreeGraph:
+    return fromIndex(main.buildTree(filename, stream, jobs))
+
+
+# Reads the converter's output (in either format) from a data folder into a graph
+# (The burials come from the place table)
+def loadData(dataFolder) -> TreeGraph:
+    with open(os.path.join(dataFolder, "manifest.json"), encoding="utf8") as f:
+        manifest = json.load(f)
+    files = manifest["files"]
+
+    with open(os.path.join(dataFolder, files["places"]), encoding="utf8") as f:
+        places = json.load(f)
+    placeNames = [gu.placeName(place) for place in places["places"]]
+    burials = [(personId, placeNames[number]) for number, people in places["burials"] for personId in people]
+
+    if manifest["format"] == "columnar":
+        structure, _birthdays = columnar.readColumnar(os.path.join(dataFolder, files["data"]))
+    else:
+        with open(os.path.join(dataFolder, files["structure"]), encoding="utf8") as f:
+            structure = json.load(f)
+    return TreeGraph(structure, burials)
+
+
+# Reads a tree from either a GEDCOM file or a data folder
+def load(path) -> TreeGraph:
+    return loadData(path) if os.path.isdir(path) else loadGedcom(path)
+
+
+# Usage: treeGraph.py tree.ged descendants @I1@
+#    or: treeGraph.py ../data/ find --born 1850 1900 --birth-place Kyiv
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query a family tree (a GEDCOM file, or a converted data folder)")
+    parser.add_argument("source", help="The GEDCOM file or data folder")
+    parser.add_argument("query", choices=["ancestors", "descendants", "relatives", "path", "find"],
+                        help="What to look up")
+    parser.add_argument("people", nargs="*", help="The person's ID (or both people's, for path)")
+    parser.add_argument("--depth", type=int, help="How many generations (or links) to go at most")
+    parser.add_argument("--surname")
+    parser.add_argument("--born", type=int, nargs=2, metavar=("FROM", "TO"), help="Born between these years")
+    parser.add_argument("--birth-place")
+    parser.add_argument("--burial-place")
+    args = parser.parse_args()
+
+    graph = load(args.source)
+    if args.query == "path":
+        if len(args.people) != 2:
+            parser.error("path needs two people")
+        results = graph.path(*args.people) or []
+    elif args.query == "find":
+        bornFrom, bornTo = args.born or (None, None)
+        results = graph.find(args.surname, bornFrom, bornTo, args.birth_place, args.burial_place)
+    else:
+        if len(args.people) != 1:
+            parser.error(f"{args.query} needs one person")
+        results = getattr(graph, args.query)(args.people[0], args.depth)
+
+    for personId in results:
+        person = graph.person(personId)
+        print(f"{personId}\t{person['name']}\t{person['birthYear'] or ''}\t{person['birthPlace']}")